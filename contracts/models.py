@@ -93,6 +93,20 @@ class Contract(models.Model):
     def get_distributor_name(self):
         return self.distributor.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.clear_consumer_unit_contracts_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.clear_consumer_unit_contracts_cache()
+        return result
+
+    def clear_consumer_unit_contracts_cache(self):
+        consumer_unit = self._state.fields_cache.get("consumer_unit")
+        if consumer_unit is not None:
+            consumer_unit.clear_contracts_cache()
+
 
 class EnergyBill(models.Model):
     contract = models.ForeignKey("Contract", on_delete=models.PROTECT)
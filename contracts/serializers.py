@@ -3,7 +3,7 @@ from datetime import date
 from rest_framework import serializers
 
 from contracts.models import Contract, EnergyBill
-from contracts.validators import CsvFileValidator
+from contracts.validators import CsvFileValidator, EnergyBillImportFileValidator
 from tariffs.models import Distributor
 from universities.models import ConsumerUnit
 
@@ -97,6 +97,15 @@ class EnergyBillSerializer(serializers.HyperlinkedModelSerializer):
         fields = "__all__"
 
 
+class EnergyBillBulkSerializer(serializers.ModelSerializer):
+    """Valida os campos de uma fatura da importação em lote. Unidade
+    consumidora e contrato são os mesmos para todas e validados uma vez."""
+
+    class Meta:
+        model = EnergyBill
+        exclude = ["consumer_unit", "contract"]
+
+
 class ContractDemandSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contract
@@ -189,3 +198,12 @@ class CSVFileSerializer(serializers.Serializer):
     def validate_file(self, file):
         validator = CsvFileValidator()
         return validator(file)
+
+
+class EnergyBillImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    university_id = serializers.IntegerField()
+
+    def validate_file(self, file):
+        validator = EnergyBillImportFileValidator()
+        return validator(file)
@@ -1,20 +1,28 @@
 import datetime
 import math
 
+from bisect import bisect_right
 from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
 
 from mec_energia.error_response_manage import (
     AlreadyHasEnergyBill,
+    ConsumerUnitCodeNotFoundError,
     DateNotCoverByContractError,
     DuplicatedDateError,
     EnergyBillValueError,
     ErrorMensageParser,
     FormatDateError,
+    FutureDateError,
     ValueMaxError,
 )
+from recommendation.invalidation import invalidate_recommendations_for_bills
+from universities.models import ConsumerUnit
 
 from . import models
-from .utils import ContractUtils
+from .utils import EnergyBillDateParser
 
 month_translation = {
     "January": "Janeiro",
@@ -32,13 +40,52 @@ month_translation = {
 }
 
 
+class UploadValidationContext:
+    """Dados da unidade consumidora usados na validação de todas as linhas de
+    uma planilha, carregados uma vez por upload: com eles a validação de cada
+    linha é feita em memória"""
+
+    def __init__(self, consumer_unit_id, energy_bill_months=None, contract_start_dates=None):
+        if energy_bill_months is None:
+            energy_bill_months = set(
+                (bill_date.year, bill_date.month)
+                for bill_date in models.EnergyBill.objects.filter(consumer_unit=consumer_unit_id).values_list(
+                    "date", flat=True
+                )
+                if bill_date is not None
+            )
+        if contract_start_dates is None:
+            contract_start_dates = models.Contract.objects.filter(consumer_unit=consumer_unit_id).values_list(
+                "start_date", flat=True
+            )
+
+        self.energy_bill_months = energy_bill_months
+        self.contract_start_dates = sorted(contract_start_dates)
+        self.date_parser = EnergyBillDateParser()
+
+    def has_energy_bill(self, energy_bill_date: datetime.date) -> bool:
+        return (energy_bill_date.year, energy_bill_date.month) in self.energy_bill_months
+
+    def check_covered_by_contract(self, energy_bill_date: datetime.date) -> "tuple[bool, datetime.date | None]":
+        """Mesmo retorno de `EnergyBill.check_energy_bill_covered_by_contract`"""
+        if not self.contract_start_dates:
+            return False, None
+        if energy_bill_date >= self.contract_start_dates[0]:
+            return True, None
+        return False, self.contract_start_dates[-1]
+
+
 class ContractServices:
     def get_file_errors(self, csv_reader, consumer_unit_id):
-        energy_bill_data = []
+        return list(self.iter_file_errors(csv_reader, consumer_unit_id))
+
+    def iter_file_errors(self, csv_reader, consumer_unit_id):
+        """Valida as linhas da planilha à medida que são lidas"""
+        context = UploadValidationContext(consumer_unit_id)
         seen_dates = set()
 
         for index, row in enumerate(csv_reader):
-            row_errors, date = self.process_csv_row(row, index, consumer_unit_id)
+            row_errors, date = self.process_csv_row(row, index, consumer_unit_id, context)
 
             if str(date) in seen_dates:
                 row_errors["date"].append(DuplicatedDateError)
@@ -71,21 +118,22 @@ class ContractServices:
                     "errors": row_errors.get("off_peak_measured_demand_in_kw"),
                 },
             }
-            energy_bill_data.append(energy_bill_row)
+            yield energy_bill_row
 
-        return energy_bill_data
+    def validate_csv_row(self, row, consumer_unit_id, context=None):
+        if context is None:
+            context = UploadValidationContext(consumer_unit_id)
 
-    def validate_csv_row(self, row, consumer_unit_id):
         errors = defaultdict(list)
-        date = ContractUtils().validate_date(row["date"])
+        date = context.date_parser.parse(row["date"])
 
         if not isinstance(date, datetime.date):
             errors["date"].append(FormatDateError)
 
-        elif models.EnergyBill.check_energy_bill_month_year(consumer_unit_id, date):
+        elif context.has_energy_bill(date):
             errors["date"].append(AlreadyHasEnergyBill)
         else:
-            covered, contract_date = models.EnergyBill.check_energy_bill_covered_by_contract(consumer_unit_id, date)
+            covered, contract_date = context.check_covered_by_contract(date)
             if not covered:
                 month_name = contract_date.strftime("%B")
                 month_name_pt = month_translation[month_name]
@@ -125,6 +173,198 @@ class ContractServices:
 
         return errors, date
 
-    def process_csv_row(self, row, index, consumer_unit_id):
-        row_errors, date = self.validate_csv_row(row, consumer_unit_id)
+    def process_csv_row(self, row, index, consumer_unit_id, context=None):
+        row_errors, date = self.validate_csv_row(row, consumer_unit_id, context)
         return row_errors, date
+
+
+class EnergyBillServices:
+    """Validação em memória de várias faturas de uma mesma unidade
+    consumidora: os meses já lançados e os contratos são carregados uma vez"""
+
+    ALREADY_EXISTS_ERROR = "There is already an energy bill this month and year for this consumer unit"
+    NOT_COVERED_ERROR = "No contract covers the date of this energy bill"
+    FUTURE_DATE_ERROR = "A data da fatura não pode ser posterior à data atual."
+
+    def __init__(self, consumer_unit):
+        self.energy_bill_months = set(
+            (bill_date.year, bill_date.month)
+            for bill_date in models.EnergyBill.objects.filter(consumer_unit=consumer_unit).values_list(
+                "date", flat=True
+            )
+            if bill_date is not None
+        )
+        oldest_contract = consumer_unit.oldest_contract
+        self.oldest_contract_start_date = oldest_contract.start_date if oldest_contract else None
+
+    def validate_date(self, energy_bill_date: datetime.date) -> str | None:
+        """Retorna o erro da data, se houver, e reserva o mês para as próximas
+        faturas do lote"""
+        month = (energy_bill_date.year, energy_bill_date.month)
+
+        if month in self.energy_bill_months:
+            return self.ALREADY_EXISTS_ERROR
+
+        if self.oldest_contract_start_date is None or energy_bill_date < self.oldest_contract_start_date:
+            return self.NOT_COVERED_ERROR
+
+        if energy_bill_date > datetime.date.today():
+            return self.FUTURE_DATE_ERROR
+
+        self.energy_bill_months.add(month)
+        return None
+
+
+class EnergyBillImportServices:
+    """Importação de uma planilha com as faturas de várias unidades
+    consumidoras de uma universidade, identificadas pelo código.
+
+    As linhas são validadas com as mesmas regras do upload de planilha e as
+    faturas só são gravadas se nenhuma linha tiver erro: todas de uma vez, em
+    uma transação, com a invalidação das recomendações feita uma única vez."""
+
+    VALUE_FIELDS = [
+        "invoice_in_reais",
+        "peak_consumption_in_kwh",
+        "off_peak_consumption_in_kwh",
+        "peak_measured_demand_in_kw",
+        "off_peak_measured_demand_in_kw",
+    ]
+
+    def __init__(self, university_id):
+        self.university_id = university_id
+
+    def import_rows(self, rows) -> "tuple[bool, list[dict]]":
+        """Retorna se as faturas foram gravadas e o relatório de cada unidade"""
+        rows_by_code = defaultdict(list)
+        for index, row in enumerate(rows, 1):
+            rows_by_code[self._normalize_code(row.pop("consumer_unit_code", None))].append((index, row))
+
+        consumer_units = {
+            consumer_unit.code: consumer_unit
+            for consumer_unit in ConsumerUnit.objects.filter(
+                university_id=self.university_id, code__in=list(rows_by_code)
+            ).with_contracts()
+        }
+        energy_bill_months = self._load_energy_bill_months(consumer_units.values())
+
+        report = []
+        energy_bills = []
+        for code, code_rows in rows_by_code.items():
+            consumer_unit = consumer_units.get(code)
+            if consumer_unit is None:
+                report.append(
+                    {
+                        "code": code,
+                        "consumer_unit": None,
+                        "created": 0,
+                        "errors": [ErrorMensageParser.parse(ConsumerUnitCodeNotFoundError, code)],
+                        "rows": [],
+                    }
+                )
+                continue
+
+            unit_energy_bills, row_errors = self._validate_rows(
+                consumer_unit, code_rows, energy_bill_months[consumer_unit.id]
+            )
+            energy_bills += unit_energy_bills
+            report.append(
+                {
+                    "code": code,
+                    "consumer_unit": consumer_unit.id,
+                    "created": len(unit_energy_bills),
+                    "errors": [],
+                    "rows": row_errors,
+                }
+            )
+
+        if any(unit["errors"] or unit["rows"] for unit in report):
+            for unit in report:
+                unit["created"] = 0
+            return False, report
+
+        # bulk_create não dispara post_save: a recomendação é invalidada uma vez
+        with transaction.atomic():
+            models.EnergyBill.objects.bulk_create(energy_bills)
+            invalidate_recommendations_for_bills([(bill.consumer_unit_id, bill.date) for bill in energy_bills])
+
+        return True, report
+
+    def _load_energy_bill_months(self, consumer_units) -> "dict[int, set[tuple[int, int]]]":
+        energy_bill_months = defaultdict(set)
+        energy_bills = models.EnergyBill.objects.filter(consumer_unit__in=list(consumer_units)).values_list(
+            "consumer_unit_id", "date"
+        )
+
+        for consumer_unit_id, bill_date in energy_bills:
+            if bill_date is not None:
+                energy_bill_months[consumer_unit_id].add((bill_date.year, bill_date.month))
+
+        return energy_bill_months
+
+    def _validate_rows(self, consumer_unit, rows, energy_bill_months):
+        contracts = consumer_unit.get_contracts_by_start_date()
+        contract_start_dates = [contract.start_date for contract in contracts]
+        context = UploadValidationContext(consumer_unit.id, energy_bill_months, contract_start_dates)
+        contract_services = ContractServices()
+        today = datetime.date.today()
+        seen_months = set()
+
+        energy_bills = []
+        row_errors = []
+        for index, row in rows:
+            errors, bill_date = contract_services.validate_csv_row(row, consumer_unit.id, context)
+
+            if isinstance(bill_date, datetime.date):
+                month = (bill_date.year, bill_date.month)
+                if month in seen_months:
+                    errors["date"].append(DuplicatedDateError)
+                seen_months.add(month)
+
+                if bill_date > today:
+                    errors["date"].append(FutureDateError)
+
+            if errors:
+                row_errors.append({"row": index, "date": self._display_date(bill_date), "errors": dict(errors)})
+                continue
+
+            # Contrato vigente na data da fatura
+            contract = contracts[bisect_right(contract_start_dates, bill_date) - 1]
+            energy_bills.append(
+                models.EnergyBill(
+                    consumer_unit=consumer_unit,
+                    contract=contract,
+                    date=bill_date,
+                    **{field: self._to_decimal(row.get(field)) for field in self.VALUE_FIELDS},
+                )
+            )
+
+        return energy_bills, row_errors
+
+    @staticmethod
+    def _normalize_code(value) -> str:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ""
+        # Códigos numéricos são lidos da planilha como números
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    @staticmethod
+    def _display_date(value):
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return str(value)
+
+    @staticmethod
+    def _to_decimal(value) -> Decimal | None:
+        if isinstance(value, str):
+            value = value.replace(",", ".").strip()
+            if not value:
+                return None
+        value = float(value)
+        if math.isnan(value):
+            return None
+        return Decimal(value).quantize(Decimal("1.00"), rounding=ROUND_HALF_UP)
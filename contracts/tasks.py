@@ -0,0 +1,35 @@
+from django.core.files.storage import default_storage
+from rest_framework.exceptions import ValidationError
+
+from contracts.services import EnergyBillImportServices
+from contracts.validators import EnergyBillImportFileValidator
+from jobs.queue import task
+from utils.mixins.cache_mixin import BaseCacheMixin
+
+
+@task("contracts.import_energy_bills")
+def import_energy_bills(university_id: int, file_name: str) -> dict:
+    """Importa a planilha de faturas de várias unidades consumidoras, salva em
+    `default_storage` pela requisição. O arquivo é removido ao final da
+    importação; se todas as tentativas falharem, ele é mantido."""
+    with default_storage.open(file_name) as file:
+        try:
+            rows = EnergyBillImportFileValidator()(file)
+            created, report = EnergyBillImportServices(university_id).import_rows(rows)
+            result = {"created": created, "consumer_units": report}
+        except ValidationError as e:
+            created = False
+            result = {"created": False, "file": e.detail}
+
+    default_storage.delete(file_name)
+
+    if created:
+        BaseCacheMixin().delete_multiple_view_cache(
+            [
+                "contracts.views.EnergyBillViewSet",
+                "contracts.views.ContractViewSet",
+                "universities.views.ConsumerUnitViewSet",
+            ]
+        )
+
+    return result
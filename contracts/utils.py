@@ -1,6 +1,7 @@
 import logging
+import re
 
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 
 import arrow
@@ -8,6 +9,13 @@ import arrow
 DATE_FORMAT = ["MMM/YYYY", "MM/YYYY", "MMM/YY", "DD/MM/YYYY", "YYYY-MM-DD", "YYYY-MM"]
 logger = logging.getLogger("uc_sheet")
 
+MONTH_ABBREVIATIONS = {
+    name.lower(): month
+    for month, name in enumerate(
+        ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"], 1
+    )
+}
+
 
 class ContractUtils:
     def validate_date(self, energy_bill_date):
@@ -27,3 +35,78 @@ class ContractUtils:
 
     def check_file_extension(self, file_name):
         return Path(file_name).suffix[1:].lower()
+
+
+class EnergyBillDateParser:
+    """`ContractUtils.validate_date` para muitas linhas de uma planilha.
+
+    Os formatos de `DATE_FORMAT` são reconhecidos com expressões regulares
+    compiladas e o último formato encontrado é testado primeiro, já que uma
+    planilha costuma usar um único formato. Valores que não casam com nenhum
+    formato ou datas inválidas seguem para o `arrow`, que dá o mesmo
+    resultado e registra o erro."""
+
+    def __init__(self):
+        self.formats = [
+            (re.compile(r"([A-Za-z]{3})/(\d{4})"), self._month_name_year),
+            (re.compile(r"(\d{2})/(\d{4})"), self._month_year),
+            (re.compile(r"([A-Za-z]{3})/(\d{2})"), self._month_name_short_year),
+            (re.compile(r"(\d{2})/(\d{2})/(\d{4})"), self._day_month_year),
+            (re.compile(r"(\d{4})-(\d{2})-(\d{2})"), self._year_month_day),
+            (re.compile(r"(\d{4})-(\d{2})"), self._year_month),
+        ]
+        self.last_format = 0
+
+    def parse(self, energy_bill_date):
+        if isinstance(energy_bill_date, datetime):
+            return energy_bill_date.date()
+
+        if isinstance(energy_bill_date, str):
+            parsed_date = self._parse_known_format(energy_bill_date)
+            if parsed_date is not None:
+                return parsed_date
+
+        return ContractUtils().validate_date(energy_bill_date)
+
+    def _parse_known_format(self, value: str) -> date | None:
+        order = [self.last_format] + [index for index in range(len(self.formats)) if index != self.last_format]
+
+        for index in order:
+            pattern, build = self.formats[index]
+            match = pattern.fullmatch(value)
+            if match is None:
+                continue
+            try:
+                parsed_date = build(*match.groups())
+            except (KeyError, ValueError):
+                return None
+            self.last_format = index
+            return parsed_date
+
+        return None
+
+    @staticmethod
+    def _month_name_year(month, year):
+        return date(int(year), MONTH_ABBREVIATIONS[month.lower()], 1)
+
+    @staticmethod
+    def _month_year(month, year):
+        return date(int(year), int(month), 1)
+
+    @staticmethod
+    def _month_name_short_year(month, year):
+        # Mesma regra do `arrow` para anos com dois dígitos
+        year = int(year)
+        return date(1900 + year if year > 68 else 2000 + year, MONTH_ABBREVIATIONS[month.lower()], 1)
+
+    @staticmethod
+    def _day_month_year(day, month, year):
+        return date(int(year), int(month), int(day))
+
+    @staticmethod
+    def _year_month_day(year, month, day):
+        return date(int(year), int(month), int(day))
+
+    @staticmethod
+    def _year_month(year, month):
+        return date(int(year), int(month), 1)
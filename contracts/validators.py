@@ -1,8 +1,12 @@
 import csv
 import logging
+import math
+import re
 
 from io import TextIOWrapper
+from itertools import chain, repeat
 
+import openpyxl
 import pandas as pd
 
 from django.utils.deconstruct import deconstructible
@@ -12,15 +16,47 @@ from contracts.utils import ContractUtils
 
 logger = logging.getLogger("uc_sheet")
 
+# Linhas lidas de cada vez nos arquivos CSV
+CHUNK_SIZE = 500
+
+# Trecho do início do CSV usado para descobrir o delimitador
+SNIFF_SIZE = 64 * 1024
+
+# A primeira linha da planilha modelo traz as orientações de preenchimento e a
+# segunda, os cabeçalhos
+HEADER_ROW = 1
+
+HEADERS_TRANSLATION = {
+    "Data": "date",
+    "Valor (R$)": "invoice_in_reais",
+    "Consumo Ponta (kWh)": "peak_consumption_in_kwh",
+    "Consumo Fora Ponta (kWh)": "off_peak_consumption_in_kwh",
+    "Demanda Ponta (kW)": "peak_measured_demand_in_kw",
+    "Demanda Fora Ponta (kW)": "off_peak_measured_demand_in_kw",
+}
+
+NUMBER_PATTERN = re.compile(r"[+-]?\d+(,\d*)?")
+
 
 @deconstructible
 class CsvFileValidator:
-    def __init__(self):
+    """Valida a extensão e os cabeçalhos da planilha e retorna um iterador das
+    linhas, com as colunas já traduzidas.
+
+    O arquivo não é carregado inteiro em memória: o CSV é lido em blocos de
+    `chunk_size` linhas e o XLSX com o openpyxl em modo somente leitura. Erros
+    de leitura encontrados depois do primeiro bloco são lançados durante a
+    iteração, também como `ValidationError`."""
+
+    headers_translation = HEADERS_TRANSLATION
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
         self.allowed_extensions = ["csv", "xls", "xlsx", "xlsm", "xlsb", "odf", "ods", "odt"]
+        self.chunk_size = chunk_size
 
     def __call__(self, value):
-        df = self._validate_file_extensions(ContractUtils().check_file_extension(value.name), value)
-        return self._validate_headers(df)
+        columns, rows = self._validate_file_extensions(ContractUtils().check_file_extension(value.name), value)
+        return self._validate_headers(columns, rows)
 
     def _validate_file_extensions(self, file_extension, file):
         if file_extension not in self.allowed_extensions:
@@ -28,46 +64,117 @@ class CsvFileValidator:
                 f"Invalid file type '.{file_extension}'. Only CSV and XLSX files are accepted."
             )
 
-        df = {}
         if file_extension == "csv":
-            decoded_file = TextIOWrapper(file.file, encoding="utf-8")
-            delimiter = self._get_csv_delimiter(decoded_file)
-            if delimiter not in [",", ";"]:
-                logger.error(f"Invalid csv delimiter {delimiter}. Only ; and , are accepted")
-                raise serializers.ValidationError(f"Invalid csv delimiter {delimiter}. Only ; and , are accepted")
-            try:
-                df = pd.read_csv(decoded_file, sep=delimiter, decimal=",", header=1)
-            except Exception as exc:
-                logger.error(f"Invalid csv file: {exc}")
-                raise serializers.ValidationError("Invalid csv file: ", exc)
-        else:
-            try:
-                df = pd.read_excel(file, decimal=",", header=1)
-
-            except Exception as exc:
-                logger.error(f"Invalid excel file: {exc}")
-                raise serializers.ValidationError("Invalid excel file: ", exc)
-        return df
-
-    def _validate_headers(self, df):
-        translation_dict = {
-            "Data": "date",
-            "Valor (R$)": "invoice_in_reais",
-            "Consumo Ponta (kWh)": "peak_consumption_in_kwh",
-            "Consumo Fora Ponta (kWh)": "off_peak_consumption_in_kwh",
-            "Demanda Ponta (kW)": "peak_measured_demand_in_kw",
-            "Demanda Fora Ponta (kW)": "off_peak_measured_demand_in_kw",
-        }
+            return self._read_csv(file)
+        if file_extension in ["xlsx", "xlsm"]:
+            return self._read_xlsx(file)
+        return self._read_excel(file)
+
+    def _read_csv(self, file):
+        decoded_file = TextIOWrapper(file.file, encoding="utf-8")
+        delimiter = self._get_csv_delimiter(decoded_file)
+        if delimiter not in [",", ";"]:
+            logger.error(f"Invalid csv delimiter {delimiter}. Only ; and , are accepted")
+            raise serializers.ValidationError(f"Invalid csv delimiter {delimiter}. Only ; and , are accepted")
 
         try:
-            df.rename(columns=translation_dict, inplace=True, errors="raise")
-        except KeyError as e:
-            logger.error(f"{e}")
-            raise serializers.ValidationError(f"{e}")
-        return df.to_dict(orient="records")
+            reader = pd.read_csv(
+                decoded_file, sep=delimiter, decimal=",", header=HEADER_ROW, chunksize=self.chunk_size
+            )
+            first_chunk = next(reader)
+        except Exception as exc:
+            logger.error(f"Invalid csv file: {exc}")
+            raise serializers.ValidationError("Invalid csv file: ", exc)
+
+        return list(first_chunk.columns), self._iter_csv_rows(reader, first_chunk)
+
+    def _iter_csv_rows(self, reader, first_chunk):
+        try:
+            yield from first_chunk.to_dict(orient="records")
+            for chunk in reader:
+                yield from chunk.to_dict(orient="records")
+        except Exception as exc:
+            logger.error(f"Invalid csv file: {exc}")
+            raise serializers.ValidationError("Invalid csv file: ", exc)
+        finally:
+            reader.close()
+
+    def _read_xlsx(self, file):
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            for _ in range(HEADER_ROW):
+                next(rows)
+            header = next(rows)
+        except Exception as exc:
+            logger.error(f"Invalid excel file: {exc}")
+            raise serializers.ValidationError("Invalid excel file: ", exc)
+
+        columns = [f"Unnamed: {index}" if name is None else name for index, name in enumerate(header)]
+        return columns, self._iter_xlsx_rows(workbook, columns, rows)
+
+    def _iter_xlsx_rows(self, workbook, columns, rows):
+        try:
+            for values in rows:
+                # Linhas em branco são ignoradas, como no `pd.read_excel`
+                if all(value is None for value in values):
+                    continue
+                yield dict(zip(columns, map(self._convert_cell, chain(values, repeat(None)))))
+        except Exception as exc:
+            logger.error(f"Invalid excel file: {exc}")
+            raise serializers.ValidationError("Invalid excel file: ", exc)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _convert_cell(value):
+        """Converte as células como o `pd.read_excel(decimal=",")`: vazias em
+        `nan` e textos numéricos, como "3245,77", em números"""
+        if value is None:
+            return math.nan
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str):
+            text = value.strip()
+            if not text:
+                return math.nan
+            if NUMBER_PATTERN.fullmatch(text):
+                return float(text.replace(",", ".")) if "," in text else int(text)
+        return value
+
+    def _read_excel(self, file):
+        try:
+            df = pd.read_excel(file, decimal=",", header=HEADER_ROW)
+        except Exception as exc:
+            logger.error(f"Invalid excel file: {exc}")
+            raise serializers.ValidationError("Invalid excel file: ", exc)
+        return list(df.columns), iter(df.to_dict(orient="records"))
+
+    def _validate_headers(self, columns, rows):
+        missing_headers = [header for header in self.headers_translation if header not in columns]
+        if missing_headers:
+            # Mesma mensagem do `DataFrame.rename(errors="raise")`
+            error = KeyError(f"{missing_headers} not found in axis")
+            logger.error(f"{error}")
+            raise serializers.ValidationError(f"{error}")
+
+        translation = self.headers_translation
+        return ({translation.get(column, column): value for column, value in row.items()} for row in rows)
 
     def _get_csv_delimiter(self, decoded_file):
         decoded_file.seek(0)
-        dialect = csv.Sniffer().sniff(decoded_file.read())
+        sample = decoded_file.read(SNIFF_SIZE)
+        # Descarta a última linha, possivelmente incompleta
+        if len(sample) == SNIFF_SIZE and "\n" in sample:
+            sample = sample[: sample.rindex("\n")]
+        dialect = csv.Sniffer().sniff(sample)
         decoded_file.seek(0)
         return dialect.delimiter
+
+
+@deconstructible
+class EnergyBillImportFileValidator(CsvFileValidator):
+    """Planilha com as faturas de várias unidades consumidoras: a coluna
+    "Código da UC" identifica a unidade de cada fatura"""
+
+    headers_translation = {"Código da UC": "consumer_unit_code", **HEADERS_TRANSLATION}
@@ -3,20 +3,28 @@ import os
 
 from datetime import datetime, timedelta
 from decimal import ROUND_HALF_UP, Decimal
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.http import FileResponse, JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from contracts.models import Contract, EnergyBill
+from contracts.utils import ContractUtils
+from jobs.queue import enqueue
+from jobs.views import job_accepted_response
+from recommendation.invalidation import invalidate_recommendations_for_bills
 from universities.models import ConsumerUnit
 from users.requests_permissions import RequestsPermissions
 from utils.mixins.cache_mixin import CacheModelMixin
@@ -271,7 +279,7 @@ class EnergyBillViewSet(CacheModelMixin, ModelViewSet):
         consumer_unit_id = request.data.get("consumer_unit")
         contract_id = request.data.get("contract")
         energy_bills_data = request.data.get("energy_bills", [])
-        response_data = []
+        energy_bills = []
         errors = []
 
         def round_value(value):
@@ -279,50 +287,48 @@ class EnergyBillViewSet(CacheModelMixin, ModelViewSet):
                 return str(Decimal(value).quantize(Decimal("1.00"), rounding=ROUND_HALF_UP))
             return value
 
-        for bill_data in energy_bills_data:
-            date_str = bill_data.get("date")
+        consumer_unit = ConsumerUnit.objects.filter(id=consumer_unit_id).first()
+        contract = Contract.objects.filter(id=contract_id).first()
+        if consumer_unit is None or contract is None:
+            return Response(
+                {"errors": [{"error": "Consumer unit or contract does not exist"}]}, status=status.HTTP_400_BAD_REQUEST
+            )
 
+        # Validação em memória: meses já lançados e contratos carregados uma única vez
+        energy_bill_services = services.EnergyBillServices(consumer_unit)
+
+        for bill_data in energy_bills_data:
             try:
-                date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError:
+                date = datetime.strptime(bill_data.get("date"), "%Y-%m-%d").date()
+            except (TypeError, ValueError):
                 errors.append({"error": "Invalid date format", "data": bill_data})
                 continue
 
-            if EnergyBill.check_energy_bill_month_year(consumer_unit_id, date):
-                errors.append(
-                    {
-                        "error": "There is already an energy bill this month and year for this consumer unit",
-                        "data": bill_data,
-                    }
-                )
-                continue
-
-            if not EnergyBill.check_energy_bill_covered_by_contract(consumer_unit_id, date):
-                errors.append({"error": "No contract covers the date of this energy bill", "data": bill_data})
+            date_error = energy_bill_services.validate_date(date)
+            if date_error:
+                errors.append({"error": date_error, "data": bill_data})
                 continue
 
-            bill_data["consumer_unit"] = consumer_unit_id
-            bill_data["contract"] = contract_id
-
             bill_data = {key: round_value(value) for key, value in bill_data.items()}
 
-            serializer = self.get_serializer(data=bill_data)
+            serializer = serializers.EnergyBillBulkSerializer(data=bill_data)
             if not serializer.is_valid():
                 errors.append({"error": "Validation error", "data": bill_data, "details": serializer.errors})
+                continue
+
+            energy_bills.append(
+                EnergyBill(consumer_unit=consumer_unit, contract=contract, **serializer.validated_data)
+            )
 
         if errors:
             return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        for bill_data in energy_bills_data:
-            bill_data["consumer_unit"] = consumer_unit_id
-            bill_data["contract"] = contract_id
-
-            bill_data = {key: round_value(value) for key, value in bill_data.items()}
+        # bulk_create não dispara post_save: a recomendação é invalidada uma vez
+        with transaction.atomic():
+            EnergyBill.objects.bulk_create(energy_bills)
+            invalidate_recommendations_for_bills([(consumer_unit.id, bill.date) for bill in energy_bills])
 
-            serializer = self.get_serializer(data=bill_data)
-            if serializer.is_valid():
-                serializer.save()
-                response_data.append(serializer.data)
+        response_data = self.get_serializer(energy_bills, many=True).data
 
         self.delete_related_view_cache(
             additional_viewsets=[
@@ -343,11 +349,47 @@ class EnergyBillViewSet(CacheModelMixin, ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         consumer_unit_id = serializer.validated_data["consumer_unit_id"]
         logger.info(f"Consumer unit with id: {consumer_unit_id} is uploading a file")
-        energy_bill_data = services.ContractServices().get_file_errors(
-            serializer.validated_data["file"], consumer_unit_id
-        )
+        try:
+            # As linhas são lidas do arquivo durante a validação
+            energy_bill_data = services.ContractServices().get_file_errors(
+                serializer.validated_data["file"], consumer_unit_id
+            )
+        except ValidationError as e:
+            return Response({"file": e.detail}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         return Response({"data": energy_bill_data}, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(method="post")
+    @action(detail=False, methods=["post"], url_path="bulk-import")
+    def bulk_import(self, request, *args, **kwargs):
+        serializer = serializers.EnergyBillImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        university_id = serializer.validated_data["university_id"]
+
+        try:
+            RequestsPermissions.check_request_permissions(
+                request.user, RequestsPermissions.default_users_permissions, university_id
+            )
+        except Exception as error:
+            return Response({"detail": f"{error}"}, status=status.HTTP_403_FORBIDDEN)
+
+        logging.getLogger("uc_sheet").info(f"University with id: {university_id} is importing energy bills")
+
+        # Os cabeçalhos já foram validados; a importação é feita por um worker
+        # a partir de uma cópia do arquivo. A cópia é salva antes de fechar o
+        # leitor das linhas: no CSV, fechá-lo fecha também o arquivo enviado
+        file = request.data["file"]
+        file_name = default_storage.save(
+            f"energy_bill_imports/{uuid4().hex}.{ContractUtils().check_file_extension(file.name)}", file
+        )
+        serializer.validated_data["file"].close()
+        job = enqueue(
+            "contracts.import_energy_bills",
+            {"university_id": university_id, "file_name": file_name},
+            user=request.user,
+        )
+        return job_accepted_response(job)
+
     @action(detail=False, methods=["get"], url_path="download-csv-model")
     def download_csv_model(self, request):
         file_path = os.path.join(settings.BASE_DIR, "docs", "modelo_importar_tarifas.csv")
@@ -0,0 +1,93 @@
+"""Cache das respostas da recomendação por busca global.
+
+A busca global não grava a recomendação no banco e o cálculo leva segundos,
+então a resposta de cada unidade consumidora fica no cache compartilhado
+(Redis), junto com a impressão digital dos dados usados: a janela de faturas,
+se a unidade está ativa, o contrato atual e as faturas da unidade na janela (o maior id e a
+quantidade), a versão das tarifas (ver `tariffs.cache`) e o otimizador
+configurado.
+
+Faturas e contratos da unidade salvos removem a entrada, pelos mesmos pontos
+que invalidam as recomendações por percentis (`recommendation.invalidation`).
+Mudanças de tarifa trocam a versão das tarifas e, com ela, a impressão
+digital, assim como alterações no contrato ou nas faturas que não passam
+por esses pontos (como `update` e `bulk_create`). Uma consulta repetida custa
+uma leitura do cache e três consultas simples ao banco."""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from rest_framework.response import Response
+
+from contracts.models import Contract, EnergyBill
+from tariffs import cache as tariff_cache
+from universities.models import ConsumerUnit
+from universities.recommendation import Recommendation as RecommendationBills
+
+CACHE_TIMEOUT = 3600 * 24
+
+
+def _response_key(consumer_unit_id: int) -> str:
+    return f"global_search.response.{consumer_unit_id}"
+
+
+def _fingerprint(consumer_unit_id: int, tariffs_version: str) -> tuple:
+    window_start, window_end = RecommendationBills.get_energy_bills_window()
+    # Unidade desativada volta a responder com o erro de `Domain.mount`
+    is_active = ConsumerUnit.objects.filter(id=consumer_unit_id).values_list("is_active", flat=True).first()
+    current_contract = (
+        Contract.objects.filter(consumer_unit_id=consumer_unit_id)
+        .order_by("-start_date", "-id")
+        .values_list("id", "start_date", "peak_contracted_demand_in_kw", "off_peak_contracted_demand_in_kw")
+        .first()
+    )
+    energy_bills = EnergyBill.objects.filter(
+        consumer_unit_id=consumer_unit_id, date__gte=window_start, date__lt=window_end
+    ).aggregate(last_id=Max("id"), count=Count("id"))
+
+    return (
+        window_start.isoformat(),
+        window_end.isoformat(),
+        is_active,
+        current_contract,
+        energy_bills["last_id"],
+        energy_bills["count"],
+        tariffs_version,
+        settings.GLOBAL_SEARCH_OPTIMIZER,
+    )
+
+
+def get_response(consumer_unit_id: int) -> "tuple[Response | None, tuple]":
+    """Retorna a resposta em cache da unidade consumidora, se ainda vale, e a
+    impressão digital atual, a ser passada para `set_response` caso a
+    resposta precise ser calculada"""
+    key = _response_key(consumer_unit_id)
+    cached = cache.get_many([tariff_cache.VERSION_KEY, key])
+
+    tariffs_version = cached.get(tariff_cache.VERSION_KEY) or tariff_cache.get_version()
+    fingerprint = _fingerprint(consumer_unit_id, tariffs_version)
+
+    entry = cached.get(key)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        return None, fingerprint
+
+    return Response(entry["data"], status=entry["status"]), fingerprint
+
+
+def set_response(consumer_unit_id: int, response: Response, fingerprint: tuple):
+    entry = {"fingerprint": fingerprint, "data": response.data, "status": response.status_code}
+    cache.set(_response_key(consumer_unit_id), entry, timeout=CACHE_TIMEOUT)
+
+
+def _delete_responses(keys: "list[str]"):
+    cache.delete_many(keys)
+
+
+def invalidate_responses(consumer_unit_ids: "set[int]"):
+    # Remove também após o commit: outro processo pode ter calculado a
+    # resposta com os dados antigos enquanto a transação ainda estava aberta
+    keys = [_response_key(consumer_unit_id) for consumer_unit_id in consumer_unit_ids]
+    if keys:
+        _delete_responses(keys)
+        transaction.on_commit(lambda: _delete_responses(keys))
@@ -1,7 +1,10 @@
 from datetime import date
 
+import numpy as np
+
 from django.conf import settings
 from rest_framework import status
+from sko.tools import set_run_mode
 
 from mec_energia.error_response_manage import (
     ErrorMensageParser,
@@ -22,12 +25,6 @@ class Domain:
         self.errors = []
         self.warnings = []
 
-    def _exceeded_demand(self, meassured_demand: 0.0, contracted_demand: 0.0) -> 0.0:
-        if meassured_demand <= contracted_demand:
-            return 0
-        else:
-            return meassured_demand - contracted_demand
-
     def mount(self):
         try:
             self.consumer_unit = ConsumerUnit.objects.get(pk=self.uc_id)
@@ -77,16 +74,8 @@ class Domain:
         ):
             self.warnings.append(ExpiredTariffWarnning)
 
-        self.base_consumption_history = self.consumption_history[
-            [
-                "peak_consumption_in_kwh",
-                "off_peak_consumption_in_kwh",
-                "peak_measured_demand_in_kw",
-                "off_peak_measured_demand_in_kw",
-                "contract_peak_demand_in_kw",
-                "contract_off_peak_demand_in_kw",
-            ]
-        ].values.astype(float)
+        # Consumos, demandas medidas e demandas contratadas (faturas × 6)
+        self.base_consumption_history = self.consumption_history.values[:, :6]
 
         if len(self.errors) == 0:
             self.consumption_cost_on_blue = StaticGetters.get_comsuption_cost(
@@ -103,28 +92,48 @@ class Domain:
 
         return None
 
-    def green_objective_func(self, demands) -> 0.0:
-        demand_value = 0
-        for bill in self.base_consumption_history:
-            demand_value += demands[0] + 3 * (
-                self._exceeded_demand(bill[2], demands[0])
-                + self._exceeded_demand(
-                    bill[3],
-                    demands[0],
-                )
-            )
+    def green_population_objective_func(self, population: np.ndarray) -> np.ndarray:
+        """Avalia a função objetivo verde para uma população (pop × 1) de
+        demandas de uma vez, retornando um vetor (pop,) de custos"""
+        demands = np.asarray(population, dtype=float).reshape(-1, 1)
+        peak_measured = self.base_consumption_history[:, 2]
+        off_peak_measured = self.base_consumption_history[:, 3]
+
+        # Matrizes (pop × faturas)
+        exceeded = np.clip(peak_measured - demands, 0.0, None) + np.clip(off_peak_measured - demands, 0.0, None)
+        demand_value = (demands + 3 * exceeded).sum(axis=1)
 
         return float(self.green.na_tusd_in_reais_per_kw) * demand_value + self.consumption_cost_on_green
 
-    def blue_objective_func(self, demands) -> 0.0:
-        peak_demand_value = 0
-        off_peak_demand_value = 0
-        for bill in self.base_consumption_history:
-            peak_demand_value += demands[0] + 3 * self._exceeded_demand(bill[2], demands[0])
-            off_peak_demand_value += demands[1] + 3 * self._exceeded_demand(bill[3], demands[1])
+    def blue_population_objective_func(self, population: np.ndarray) -> np.ndarray:
+        """Avalia a função objetivo azul para uma população (pop × 2) de
+        demandas (ponta, fora de ponta) de uma vez, retornando um vetor (pop,)
+        de custos"""
+        population = np.asarray(population, dtype=float).reshape(-1, 2)
+        peak_demands = population[:, 0:1]
+        off_peak_demands = population[:, 1:2]
+        peak_measured = self.base_consumption_history[:, 2]
+        off_peak_measured = self.base_consumption_history[:, 3]
+
+        # Matrizes (pop × faturas)
+        peak_demand_value = (peak_demands + 3 * np.clip(peak_measured - peak_demands, 0.0, None)).sum(axis=1)
+        off_peak_demand_value = (off_peak_demands + 3 * np.clip(off_peak_measured - off_peak_demands, 0.0, None)).sum(
+            axis=1
+        )
 
         return (
             (float(self.blue.peak_tusd_in_reais_per_kw) * peak_demand_value)
             + (float(self.blue.off_peak_tusd_in_reais_per_kw) * off_peak_demand_value)
             + self.consumption_cost_on_blue
         )
+
+    def green_objective_func(self, demands) -> 0.0:
+        return float(self.green_population_objective_func(np.asarray(demands)[:1])[0])
+
+    def blue_objective_func(self, demands) -> 0.0:
+        return float(self.blue_population_objective_func(np.asarray(demands)[:2])[0])
+
+
+# Permite que o PSO avalie a população inteira em uma única chamada
+set_run_mode(Domain.green_population_objective_func, "vectorization")
+set_run_mode(Domain.blue_population_objective_func, "vectorization")
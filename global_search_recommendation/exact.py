@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def demand_cost_breakpoints(measured_demands: np.ndarray, lb: float, ub: float) -> np.ndarray:
+    """Pontos candidatos a mínimo da função de custo de demanda: as demandas
+    medidas dentro de [lb, ub] e os próprios limites."""
+    candidates = np.clip(np.asarray(measured_demands, dtype=float).ravel(), lb, ub)
+    return np.unique(np.concatenate((candidates, [lb, ub])))
+
+
+def minimize_demand_cost(measured_demands: np.ndarray, history_length: int, lb: float, ub: float):
+    """Minimiza exatamente, em [lb, ub],
+
+        g(d) = n * d + 3 * Σ max(0, medida_i - d)
+
+    onde a soma percorre todas as demandas medidas fornecidas (na modalidade
+    verde, ponta e fora de ponta concorrem com a mesma demanda contratada).
+
+    `g` é convexa e linear por partes, com quebras exatamente nas demandas
+    medidas. Logo o mínimo está em uma quebra ou em um dos limites, e basta
+    avaliar `g` nesses pontos usando somas de sufixo sobre as demandas
+    ordenadas: O(n log n).
+
+    Em caso de empate retorna a menor demanda. Retorna `(demanda, g(demanda))`.
+    """
+    measured = np.sort(np.asarray(measured_demands, dtype=float).ravel())
+    candidates = demand_cost_breakpoints(measured, lb, ub)
+
+    # suffix_sums[i] = soma das demandas medidas a partir da posição i
+    suffix_sums = np.concatenate((np.cumsum(measured[::-1])[::-1], [0.0]))
+    first_above = np.searchsorted(measured, candidates, side="right")
+    count_above = measured.size - first_above
+    sum_above = suffix_sums[first_above]
+
+    costs = history_length * candidates + 3 * (sum_above - candidates * count_above)
+    best = int(np.argmin(costs))
+    return candidates[best], costs[best]
@@ -54,6 +54,7 @@ class Recommendation:
             fill_history_with_pending_dates(self.domain.consumption_history, self.domain.pending_bills_dates)
         else:
             fill_with_pending_dates(result, self.domain.consumption_history, self.domain.pending_bills_dates)
+            self.current_contract_values = result.current_contract
 
         return build_response(
             result,
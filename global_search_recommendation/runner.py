@@ -1,9 +1,10 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 
 from django.conf import settings
 from sko.PSO import PSO
 
 from global_search_recommendation.domain import Domain
+from global_search_recommendation.exact import minimize_demand_cost
 from global_search_recommendation.recommendation import Recommendation
 from tariffs.models import Tariff
 
@@ -28,58 +29,100 @@ class Runner(ABC):
     def _check_bounds(self, lb: 0.0, up: 0.0):
         return up >= lb
 
-    @classmethod
-    def calculate(cls): ...
+    @abstractmethod
+    def _optimize_blue(self) -> "tuple[tuple[float, float], float]":
+        """Retorna `((demanda_ponta, demanda_fora_ponta), custo)`"""
 
+    @abstractmethod
+    def _optimize_green(self) -> "tuple[float, float]":
+        """Retorna `(demanda, custo)`"""
 
-class PSORunner(Runner):
     def calculate(self):
         skip_green = self.domain.current_contract.subgroup in ["A2", "A3"]
 
         if self._check_bounds(lb=self.p_lbound, up=self.p_ubound) and self._check_bounds(
             lb=self.o_lbound, up=self.o_ubound
         ):
-            blue = PSO(
-                func=self.domain.blue_objective_func,
-                n_dim=2,
-                pop=40,
-                max_iter=100,
-                w=0.8,
-                c1=0.6,
-                c2=0.6,
-                lb=[self.p_lbound, self.o_lbound],
-                ub=[self.p_ubound, self.o_ubound],
-            )
-            blue.run()
+            blue_x, blue_y = self._optimize_blue()
         else:
             raise Exception("limites inválidos para computação da recomendação na modalidade azul")
 
         if self._check_bounds(lb=self.g_lb, up=self.g_ub):
             if not skip_green:
-                green = PSO(
-                    func=self.domain.green_objective_func,
-                    n_dim=1,
-                    pop=40,
-                    max_iter=100,
-                    w=0.8,
-                    c1=0.6,
-                    c2=0.6,
-                    lb=self.g_lb,
-                    ub=self.g_ub,
-                )
-                green.run()
+                green_x, green_y = self._optimize_green()
         else:
             raise Exception("limites inválidos para computação da recomendação na modalidade verde")
 
-        if not skip_green and green.gbest_y < blue.gbest_y:
+        if not skip_green and green_y < blue_y:
             return Recommendation(
                 Tariff.GREEN,
-                (0, round(green.gbest_x[0], 2)),
+                (0, round(green_x, 2)),
                 self.domain,
             )
         else:
             return Recommendation(
                 Tariff.BLUE,
-                (round(blue.gbest_x[0], 2), round(blue.gbest_x[1], 2)),
+                (round(blue_x[0], 2), round(blue_x[1], 2)),
                 self.domain,
             )
+
+
+class PSORunner(Runner):
+    def _optimize_blue(self):
+        blue = PSO(
+            func=self.domain.blue_population_objective_func,
+            n_dim=2,
+            pop=40,
+            max_iter=100,
+            w=0.8,
+            c1=0.6,
+            c2=0.6,
+            lb=[self.p_lbound, self.o_lbound],
+            ub=[self.p_ubound, self.o_ubound],
+        )
+        blue.run()
+        return (blue.gbest_x[0], blue.gbest_x[1]), blue.gbest_y
+
+    def _optimize_green(self):
+        green = PSO(
+            func=self.domain.green_population_objective_func,
+            n_dim=1,
+            pop=40,
+            max_iter=100,
+            w=0.8,
+            c1=0.6,
+            c2=0.6,
+            lb=self.g_lb,
+            ub=self.g_ub,
+        )
+        green.run()
+        return green.gbest_x[0], green.gbest_y
+
+
+class ExactRunner(Runner):
+    """Otimizador exato. A função objetivo é separável por demanda e, em cada
+    uma, convexa e linear por partes com quebras nas demandas medidas; por isso
+    basta avaliá-la nessas quebras (ver `exact.minimize_demand_cost`)."""
+
+    def _optimize_blue(self):
+        bills = self.domain.base_consumption_history
+        peak_demand, _ = minimize_demand_cost(bills[:, 2], len(bills), self.p_lbound, self.p_ubound)
+        off_peak_demand, _ = minimize_demand_cost(bills[:, 3], len(bills), self.o_lbound, self.o_ubound)
+        demands = (peak_demand, off_peak_demand)
+        return demands, self.domain.blue_objective_func(demands)
+
+    def _optimize_green(self):
+        bills = self.domain.base_consumption_history
+        demand, _ = minimize_demand_cost(bills[:, 2:4], len(bills), self.g_lb, self.g_ub)
+        return demand, self.domain.green_objective_func((demand,))
+
+
+RUNNERS = {
+    "exact": ExactRunner,
+    "pso": PSORunner,
+}
+
+
+def get_runner(domain: Domain) -> Runner:
+    """Instancia o otimizador configurado em `settings.GLOBAL_SEARCH_OPTIMIZER`"""
+    return RUNNERS[settings.GLOBAL_SEARCH_OPTIMIZER](domain)
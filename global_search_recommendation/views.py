@@ -3,40 +3,55 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from global_search_recommendation import cache as response_cache
 from global_search_recommendation.domain import Domain
-from global_search_recommendation.runner import PSORunner
+from global_search_recommendation.runner import get_runner
 from recommendation_commons.helpers import fill_history_with_pending_dates
+from recommendation_commons.renderers import RecommendationRenderersMixin
 from recommendation_commons.response import build_response
 
 
-class GlobalSearchRecommendationViewSet(ViewSet):
+class GlobalSearchRecommendationViewSet(RecommendationRenderersMixin, ViewSet):
     http_method_names = ["get"]
 
     def retrieve(self, request: Request, pk=None):
-        """Recomendação via busca global. Deve ser fornecido o ID da Unidade Consumidora."""
+        """Recomendação via busca global. Deve ser fornecido o ID da Unidade Consumidora.
+
+        A resposta fica em cache até mudarem as faturas, o contrato ou as
+        tarifas da unidade (ver `global_search_recommendation.cache`)."""
+
+        response, fingerprint = response_cache.get_response(pk)
+        if response is not None:
+            return response
 
         domain = Domain(pk)
         domain_mount_result = domain.mount()
 
+        # Unidade inexistente ou inativa: a resposta não vai para o cache
+        if domain_mount_result and len(domain.errors) == 0:
+            return Response(domain_mount_result)
+
+        response = self._build_response(domain, domain_mount_result)
+        response_cache.set_response(pk, response, fingerprint)
+        return response
+
+    def _build_response(self, domain: Domain, domain_mount_result):
         if domain_mount_result:
-            if len(domain.errors) > 0:
-                fill_history_with_pending_dates(domain.consumption_history, domain.pending_bills_dates)
-                return build_response(
-                    None,
-                    DataFrame(),
-                    domain.consumption_history,
-                    domain.current_contract,
-                    domain.consumer_unit,
-                    domain.blue,
-                    domain.green,
-                    domain.errors,
-                    domain.warnings,
-                    domain.consumption_history_length,
-                )
-            else:
-                return Response(domain_mount_result)
-
-        runner = PSORunner(domain)
+            fill_history_with_pending_dates(domain.consumption_history, domain.pending_bills_dates)
+            return build_response(
+                None,
+                DataFrame(),
+                domain.consumption_history,
+                domain.current_contract,
+                domain.consumer_unit,
+                domain.blue,
+                domain.green,
+                domain.errors,
+                domain.warnings,
+                domain.consumption_history_length,
+            )
+
+        runner = get_runner(domain)
         recomendation = runner.calculate()
 
         return recomendation.build_response()
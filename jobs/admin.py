@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "attempts",
+        "created_by",
+        "created_at",
+        "finished_at",
+    )
+    search_fields = ("name", "key")
+    list_filter = ("name", "status")
+    ordering = ("-created_at",)
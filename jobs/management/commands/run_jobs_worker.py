@@ -0,0 +1,63 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from jobs.queue import claim_job, requeue_stale_jobs, run_job
+
+logger = logging.getLogger("tasks")
+
+
+class Command(BaseCommand):
+    help = "Executa as tarefas em segundo plano enfileiradas. Vários workers podem ser executados ao mesmo tempo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Encerra quando não houver mais tarefas pendentes",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Segundos de espera quando a fila está vazia",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Worker de tarefas iniciado")
+        last_requeue = 0
+
+        while True:
+            # Como ao fim de cada requisição: descarta conexões quebradas ou
+            # que passaram de `CONN_MAX_AGE`, para o worker não ficar preso a
+            # uma conexão perdida (reinício do banco, failover etc.)
+            close_old_connections()
+
+            try:
+                if time.monotonic() - last_requeue > settings.JOBS_TIMEOUT / 10:
+                    requeue_stale_jobs()
+                    last_requeue = time.monotonic()
+
+                job = claim_job()
+            except DatabaseError as error:
+                logger.error(f"Erro ao consultar a fila de tarefas: {error}")
+                time.sleep(options["poll_interval"])
+                continue
+
+            if job is None:
+                if options["burst"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            try:
+                run_job(job)
+            except DatabaseError as error:
+                # O resultado não foi registrado; a tarefa continua em execução
+                # até ser devolvida para a fila por `requeue_stale_jobs`
+                logger.error(f"Erro ao registrar o resultado da tarefa {job}: {error}")
+                continue
+            self.stdout.write(f"{job}")
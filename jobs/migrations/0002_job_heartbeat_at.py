@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Renovado periodicamente pelo worker enquanto a tarefa está em execução', null=True),
+        ),
+    ]
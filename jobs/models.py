@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tarefa executada em segundo plano pelos workers
+    (`python manage.py run_jobs_worker`)"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pendente"),
+        (RUNNING, "Em execução"),
+        (SUCCEEDED, "Concluída"),
+        (FAILED, "Falhou"),
+    )
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(
+        max_length=200,
+        null=True,
+        blank=True,
+        help_text="Tarefas pendentes ou em execução com a mesma chave não são enfileiradas de novo",
+    )
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Renovado periodicamente pelo worker enquanto a tarefa está em execução",
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+            models.Index(fields=["key", "status"], name="job_key_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in [Job.SUCCEEDED, Job.FAILED]
@@ -0,0 +1,232 @@
+"""Fila de tarefas em segundo plano.
+
+As tarefas ficam na tabela `Job`: os workers
+(`python manage.py run_jobs_worker`) reservam a próxima tarefa pendente com
+`SELECT ... FOR UPDATE SKIP LOCKED`, então vários workers podem consumir a
+fila ao mesmo tempo. Uma tarefa que falha volta para a fila com espera
+crescente até `max_attempts` tentativas.
+
+As tarefas não são executadas dentro de uma transação: cada uma controla as
+suas, para que um lote longo grave o resultado de cada parte ao concluí-la.
+Enquanto a tarefa executa, o worker renova `Job.heartbeat_at`; tarefas sem
+sinal há mais de `JOBS_TIMEOUT` segundos são devolvidas para a fila.
+
+Com `JOBS_ALWAYS_EAGER` (desenvolvimento e testes) as tarefas são executadas
+na própria requisição, ao serem enfileiradas."""
+
+import logging
+import threading
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger("tasks")
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable
+    max_attempts: int
+    can_read: Callable | None = None
+
+
+_tasks: dict[str, Task] = {}
+
+
+def task(name: str, max_attempts: int | None = None, can_read: Callable | None = None):
+    """Registra a função como tarefa. Os argumentos da função são passados
+    por nome a partir do `payload` do job e o retorno, serializável em JSON,
+    fica em `Job.result`.
+
+    `can_read(user, payload)` autoriza a consulta do job por outros usuários
+    além de quem o criou, como nos jobs compartilhados por chave."""
+
+    def register(func):
+        _tasks[name] = Task(name, func, max_attempts or settings.JOBS_MAX_ATTEMPTS, can_read)
+        return func
+
+    return register
+
+
+def get_task(name: str) -> Task:
+    return _tasks[name]
+
+
+def can_read_job(job: Job, user) -> bool:
+    """Quem criou o job, super usuários e quem o `can_read` da tarefa autorizar"""
+    if job.created_by_id == user.id or user.is_admin:
+        return True
+
+    registered_task = _tasks.get(job.name)
+    return (
+        registered_task is not None
+        and registered_task.can_read is not None
+        and registered_task.can_read(user, job.payload)
+    )
+
+
+def enqueue(name: str, payload: dict | None = None, user=None, key: str | None = None) -> Job:
+    """Enfileira a tarefa `name`. Se `key` for informada e já houver uma
+    tarefa pendente ou em execução com a mesma chave, ela é retornada (e,
+    se estava adiada, antecipada para já)"""
+    if key is not None:
+        job = Job.objects.filter(key=key, status__in=[Job.PENDING, Job.RUNNING]).order_by("id").first()
+        if job is not None:
+            now = timezone.now()
+            if job.status == Job.PENDING and job.run_after > now:
+                Job.objects.filter(id=job.id, status=Job.PENDING).update(run_after=now)
+            return job
+
+    job = Job.objects.create(
+        name=name,
+        key=key,
+        payload=payload or {},
+        max_attempts=get_task(name).max_attempts,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+    if settings.JOBS_ALWAYS_EAGER:
+        while not job.is_finished:
+            start_job(job)
+            run_job(job, retry_delay=False)
+
+    return job
+
+
+def enqueue_debounced(name: str, payloads: "dict[str, dict]", delay: int, max_delay: int | None = None):
+    """Enfileira a tarefa `name` uma vez por chave de `payloads`, para daqui a
+    `delay` segundos. Se a chave já tem uma tarefa pendente, ela é adiada em
+    vez de criar outra, sem passar de `max_delay` segundos desde a sua
+    criação: uma sequência de eventos resulta em uma única execução, depois
+    do último."""
+    if settings.JOBS_ALWAYS_EAGER:
+        for key, payload in payloads.items():
+            enqueue(name, payload, key=key)
+        return
+
+    now = timezone.now()
+    run_after = Value(now + timedelta(seconds=delay))
+    if max_delay is not None:
+        run_after = Least(run_after, F("created_at") + timedelta(seconds=max_delay))
+
+    with transaction.atomic():
+        # As tarefas pendentes ficam bloqueadas até o fim da transação, então
+        # nenhum worker as inicia entre a consulta e o adiamento
+        pending = Job.objects.filter(name=name, key__in=payloads, status=Job.PENDING)
+        locked = pending.select_for_update() if connection.features.has_select_for_update else pending
+        pending_keys = set(locked.values_list("key", flat=True))
+
+        # Tarefas antecipadas por `enqueue` não voltam a ser adiadas
+        pending.filter(run_after__gt=now).update(run_after=run_after)
+        Job.objects.bulk_create(
+            [
+                Job(
+                    name=name,
+                    key=key,
+                    payload=payload,
+                    max_attempts=get_task(name).max_attempts,
+                    run_after=now + timedelta(seconds=delay),
+                )
+                for key, payload in payloads.items()
+                if key not in pending_keys
+            ]
+        )
+
+
+def start_job(job: Job):
+    job.status = Job.RUNNING
+    job.attempts += 1
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.save(update_fields=["status", "attempts", "started_at", "heartbeat_at"])
+
+
+def claim_job() -> Job | None:
+    """Reserva a próxima tarefa pendente, marcando-a como em execução"""
+    with transaction.atomic():
+        jobs = Job.objects.filter(status=Job.PENDING, run_after__lte=timezone.now()).order_by("run_after", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+
+        job = jobs.first()
+        if job is not None:
+            start_job(job)
+
+    return job
+
+
+class Heartbeat(threading.Thread):
+    """Renova `heartbeat_at` da tarefa a cada `JOBS_TIMEOUT / 10` segundos,
+    em uma conexão própria, até `stop` ser chamado"""
+
+    def __init__(self, job: Job):
+        super().__init__(name=f"heartbeat-{job.id}", daemon=True)
+        self.job_id = job.id
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOBS_TIMEOUT / 10):
+                try:
+                    Job.objects.filter(id=self.job_id, status=Job.RUNNING).update(heartbeat_at=timezone.now())
+                except DatabaseError as error:
+                    logger.error(f"Erro ao renovar a tarefa #{self.job_id}: {error}")
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job: Job, retry_delay: bool = True):
+    """Executa a tarefa e registra o resultado. Em caso de erro a tarefa volta
+    para a fila, com espera de `JOBS_RETRY_DELAY * 2 ** (tentativa - 1)`
+    segundos, até esgotar as tentativas"""
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        result = get_task(job.name).func(**job.payload)
+    except Exception as error:
+        logger.error(f"Erro na tarefa {job}, tentativa {job.attempts} de {job.max_attempts}: {error}")
+        job.error = str(error)
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1) if retry_delay else 0
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.SUCCEEDED
+        job.result = result
+        job.error = None
+        job.finished_at = timezone.now()
+    finally:
+        heartbeat.stop()
+
+    job.save(update_fields=["status", "result", "error", "run_after", "finished_at"])
+
+
+def requeue_stale_jobs() -> int:
+    """Devolve para a fila as tarefas em execução sem sinal do worker há mais
+    de `JOBS_TIMEOUT` segundos: o worker provavelmente foi interrompido"""
+    seen_before = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    stale_jobs = Job.objects.alias(last_seen_at=Coalesce("heartbeat_at", "started_at")).filter(
+        status=Job.RUNNING, last_seen_at__lt=seen_before
+    )
+
+    failed = stale_jobs.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, error="Tempo de execução esgotado", finished_at=timezone.now()
+    )
+    requeued = stale_jobs.update(status=Job.PENDING, run_after=timezone.now())
+    return failed + requeued
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+
+from jobs.views import JobViewSet
+
+router = DefaultRouter()
+
+router.register(r"jobs", JobViewSet, basename="jobs")
@@ -0,0 +1,31 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from .models import Job
+from .queue import can_read_job
+from .serializers import JobSerializer
+
+
+def job_accepted_response(job: Job) -> Response:
+    """Resposta das requisições cujo processamento foi enfileirado: o
+    andamento é consultado em `/api/jobs/<job_id>/`"""
+    return Response({"job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED)
+
+
+class JobViewSet(ViewSet):
+    http_method_names = ["get"]
+
+    def retrieve(self, request: Request, pk=None):
+        """Situação e resultado de uma tarefa em segundo plano. Disponível
+        para quem a criou, para super usuários e para quem a tarefa autorizar
+        (por exemplo, usuários da universidade da unidade consumidora de um
+        recálculo de recomendação)."""
+        job = get_object_or_404(Job, pk=pk)
+
+        if not can_read_job(job, request.user):
+            return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(JobSerializer(job).data)
@@ -16,6 +16,7 @@ MEDIA_URL = "http://media.testserver"
 
 # MEPA_FRONT_END_URL = "http://localhost:3000"
 RECOMMENDATION_METHOD = "percentile"
+JOBS_ALWAYS_EAGER = True
 
 
 # APPS - Remove unnecessary apps
@@ -30,6 +30,7 @@ EXTERNAL_APPS = [
 LOCAL_APPS = [
     "contracts",
     "global_search_recommendation",
+    "jobs",
     "recommendation",
     "tariffs",
     "users",
@@ -240,6 +241,27 @@ MINIMUM_PERCENTAGE_DIFFERENCE_FOR_CONTRACT_RENOVATION = 0.05
 # Valor de demanda mínimo na nova resolução
 NEW_RESOLUTION_MINIMUM_DEMAND = 30
 
+# Otimizador da recomendação por busca global. Opções: [exact, pso]
+GLOBAL_SEARCH_OPTIMIZER = "exact"
+
+# Recálculo em segundo plano das recomendações invalidadas: espera, em
+# segundos, sem novas invalidações da unidade antes de recalcular, e espera
+# máxima desde a primeira invalidação. None desativa o recálculo antecipado
+RECOMMENDATION_WARMUP_DELAY = 60
+RECOMMENDATION_WARMUP_MAX_DELAY = 600
+
+# Tarefas em segundo plano (app `jobs`)
+# Executa as tarefas na própria requisição, sem workers
+JOBS_ALWAYS_EAGER = False
+JOBS_MAX_ATTEMPTS = 3
+# Espera, em segundos, antes da primeira nova tentativa; dobra a cada falha
+JOBS_RETRY_DELAY = 30
+# Espera, em segundos, dos workers quando a fila está vazia
+JOBS_POLL_INTERVAL = 2
+# Tarefas em execução sem sinal do worker há mais tempo que isso, em segundos,
+# voltam para a fila. O worker renova o sinal a cada `JOBS_TIMEOUT / 10` segundos
+JOBS_TIMEOUT = 3600
+
 MEC_ENERGIA_PASSWORD_ENDPOINT_FIRST_ACCESS = "definir-senha"
 MEC_ENERGIA_PASSWORD_ENDPOINT_ADMIN_RESET = "redefinir-senha"
 MEC_ENERGIA_PASSWORD_ENDPOINT_USER_RESET = "definir-senha"
@@ -49,6 +49,8 @@ CACHES = {
 # -------------------------------------------------------------------------------------
 MEPA_FRONT_END_URL = env("FRONT_END_URL")
 RECOMMENDATION_METHOD = env("RECOMMENDATION_METHOD")
+GLOBAL_SEARCH_OPTIMIZER = env("GLOBAL_SEARCH_OPTIMIZER", default="exact")
+JOBS_ALWAYS_EAGER = env.bool("JOBS_ALWAYS_EAGER", default=True)
 
 # Password reset
 RESET_PASSWORD_TOKEN_TIMEOUT = env.int("RESET_PASSWORD_TOKEN_TIMEOUT")
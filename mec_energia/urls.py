@@ -6,6 +6,7 @@ from django.views.generic.base import RedirectView
 from rest_framework.routers import DefaultRouter
 
 from contracts.urls import router as contracts_router
+from jobs.urls import router as jobs_router
 from recommendation_commons.urls import router as recommendation_router
 from tariffs.urls import router as tariffs_router
 from universities.urls import router as universities_router
@@ -27,6 +28,7 @@ router.registry.extend(contracts_router.registry)
 router.registry.extend(users_router.registry)
 router.registry.extend(tariffs_router.registry)
 router.registry.extend(recommendation_router.registry)
+router.registry.extend(jobs_router.registry)
 
 schema_view = Schema.get_schema_view()
 
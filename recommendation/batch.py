@@ -0,0 +1,142 @@
+import logging
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from contracts.models import Contract, EnergyBill
+from recommendation.recommendation_utils import build_recommendation_fields, compute_recommendation
+from recommendation_commons.consumption_history import BILL_FIELDS
+from recommendation_commons.static_getters import StaticGetters
+from tariffs.models import Tariff
+from universities.models import ConsumerUnit
+from universities.recommendation import Recommendation as RecommendationBills
+
+from .models import Recommendation
+
+logger = logging.getLogger("tasks")
+
+
+class BatchRecommendationEngine:
+    """Gera as recomendações de todas as unidades consumidoras ativas de uma
+    universidade (ou de todas as universidades) de uma vez.
+
+    Unidades, contratos, faturas e tarifas são carregados com uma consulta
+    cada, o cálculo de cada unidade é feito em memória e as recomendações são
+    gravadas com `bulk_create(update_conflicts=True)`."""
+
+    def __init__(self, university_id: int | None = None):
+        self.university_id = university_id
+        self.failed: dict[int, str] = {}
+
+    def run(self) -> dict:
+        units = self._load_consumer_units()
+        contracts_by_unit = self._load_contracts(units)
+        bills_by_unit = self._load_energy_bills(units)
+        tariffs = self._load_tariffs(contracts_by_unit)
+
+        # Recomendações agrupadas pelos campos calculados: quando não há
+        # recomendação apenas parte dos campos é atualizada (ver
+        # `build_recommendation_fields`)
+        recommendations_by_fields: dict[tuple[str, ...], list[Recommendation]] = defaultdict(list)
+
+        for unit in units:
+            contracts = contracts_by_unit.get(unit.id)
+            if not contracts:
+                continue
+
+            try:
+                fields = self._calculate(unit, contracts, bills_by_unit[unit.id], tariffs)
+            except Exception as e:
+                logger.error(f"Erro ao gerar recomendação da unidade consumidora {unit.id}: {str(e)}")
+                self.failed[unit.id] = str(e)
+                continue
+
+            recommendation = Recommendation(consumer_unit_id=unit.id, **fields)
+            # Sem recomendação, os campos não calculados são mantidos no banco
+            # e a resposta gravada é montada no próximo `save` da unidade
+            if "costsComparisonPlot" in fields:
+                recommendation.render_payload()
+                fields = {**fields, "payload": recommendation.payload, "payloadVersion": recommendation.payloadVersion}
+            else:
+                fields = {**fields, "payload": None, "payloadVersion": None}
+
+            recommendations_by_fields[tuple(fields)].append(recommendation)
+
+        with transaction.atomic():
+            for fields, recommendations in recommendations_by_fields.items():
+                self._bulk_upsert(recommendations, fields)
+
+        return {
+            "consumer_units": len(units),
+            "generated": sum(len(recommendations) for recommendations in recommendations_by_fields.values()),
+            "failed": self.failed,
+        }
+
+    def _load_consumer_units(self) -> list[ConsumerUnit]:
+        units = ConsumerUnit.objects.filter(is_active=True)
+        if self.university_id is not None:
+            units = units.filter(university_id=self.university_id)
+        return list(units.order_by("id"))
+
+    def _load_contracts(self, units: list[ConsumerUnit]) -> "dict[int, list[Contract]]":
+        contracts_by_unit = defaultdict(list)
+        contracts = Contract.objects.filter(consumer_unit__in=units).order_by("consumer_unit_id", "start_date", "id")
+
+        for contract in contracts:
+            contracts_by_unit[contract.consumer_unit_id].append(contract)
+
+        return contracts_by_unit
+
+    def _load_energy_bills(self, units: list[ConsumerUnit]) -> "dict[int, dict[tuple[int, int], tuple]]":
+        """Carrega, em uma consulta, as faturas que podem entrar na janela de
+        recomendação de qualquer unidade, indexadas por unidade e `(ano, mês)`.
+        Cada fatura é uma tupla com os `BILL_FIELDS` do histórico de consumo."""
+        window_start, window_end = RecommendationBills.get_energy_bills_window()
+
+        bills_by_unit = defaultdict(dict)
+        energy_bills = (
+            EnergyBill.objects.filter(
+                consumer_unit__in=units,
+                date__gte=window_start,
+                date__lt=window_end,
+            )
+            .order_by("date", "id")
+            .values_list("consumer_unit_id", *BILL_FIELDS)
+        )
+
+        for consumer_unit_id, *bill in energy_bills:
+            bill_date = bill[0]
+            bills_by_unit[consumer_unit_id].setdefault((bill_date.year, bill_date.month), tuple(bill))
+
+        return bills_by_unit
+
+    def _load_tariffs(self, contracts_by_unit: "dict[int, list[Contract]]") -> "dict[tuple[int, str, str], Tariff]":
+        distributor_ids = {contracts[-1].distributor_id for contracts in contracts_by_unit.values()}
+        tariffs = Tariff.objects.filter(distributor_id__in=distributor_ids).order_by("id")
+
+        tariffs_by_key = {}
+        for tariff in tariffs:
+            tariffs_by_key.setdefault((tariff.distributor_id, tariff.subgroup, tariff.flag), tariff)
+
+        return tariffs_by_key
+
+    def _calculate(self, unit: ConsumerUnit, contracts: "list[Contract]", bills_by_month: dict, tariffs: dict):
+        oldest_contract, contract = contracts[0], contracts[-1]
+        blue = tariffs.get((contract.distributor_id, contract.subgroup, Tariff.BLUE))
+        green = tariffs.get((contract.distributor_id, contract.subgroup, Tariff.GREEN))
+
+        consumption_history_data = StaticGetters.build_consumption_history(
+            bills_by_month, oldest_contract.start_date, contract
+        )
+
+        processed_recommendation = compute_recommendation(unit, contract, blue, green, consumption_history_data)
+        return build_recommendation_fields(*processed_recommendation)
+
+    def _bulk_upsert(self, recommendations: "list[Recommendation]", fields: "tuple[str, ...]"):
+        Recommendation.objects.bulk_create(
+            recommendations,
+            update_conflicts=True,
+            unique_fields=["consumer_unit"],
+            update_fields=[Recommendation._meta.get_field(field).name for field in fields],
+        )
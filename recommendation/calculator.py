@@ -4,6 +4,7 @@ from pandas import DataFrame
 
 from recommendation.blue import BluePercentileCalculator, BluePercentileResult
 from recommendation.green import GreenPercentileCalculator, GreenPercentileResult
+from recommendation_commons.consumption_history import ConsumptionHistory
 from recommendation_commons.recommendation_result import RecommendationResult
 from recommendation_commons.static_getters import StaticGetters
 from tariffs.models import Tariff
@@ -39,7 +40,7 @@ class ContractRecommendationCalculator:
 
     def __init__(
         self,
-        consumption_history: DataFrame,
+        consumption_history: ConsumptionHistory,
         blue_summary: BluePercentileResult,
         green_summary: GreenPercentileResult,
         current_tariff_flag: Literal["blue", "green"],
@@ -118,7 +119,7 @@ class RecommendationCalculator:
 
     def __init__(
         self,
-        consumption_history: DataFrame,
+        consumption_history: ConsumptionHistory,
         current_tariff_flag: str,
         blue_tariff: Tariff,
         green_tariff: Tariff,
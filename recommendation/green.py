@@ -1,20 +1,23 @@
-from math import inf
+import numpy as np
 
-from django.conf import settings
 from numpy import ceil as roundup
 from pandas import DataFrame
 
+from recommendation import percentile_kernel as kernel
+from recommendation_commons.consumption_history import ConsumptionHistory
 from tariffs.models import GreenTariff
 
 
 class GreenPercentileResult:
-    def __init__(self, p: "dict[str, DataFrame]", s: DataFrame):
+    def __init__(self, p: "kernel.PercentileTables", s: DataFrame):
         self.percentiles = p
         self.summary = s
 
 
 class GreenPercentileCalculator:
     PERCENTILES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98]
+    # Tolerância usada na escolha do menor total, para dar o mesmo resultado da planilha
+    TOLERANCE = 0.01
     PERCENTILE_HEADERS = [
         "off_peak_demand_in_kw",
         "exceeded_peak_demand_in_kw",
@@ -31,67 +34,60 @@ class GreenPercentileCalculator:
         "exceeded_off_peak_demand_in_kw",
     ]
 
-    def __init__(self, consumption_history: DataFrame, tariff: GreenTariff) -> None:
+    def __init__(self, consumption_history: ConsumptionHistory, tariff: GreenTariff) -> None:
         self.consumption_history = consumption_history
-        self.history_length = len(consumption_history.index)
+        self.history_length = len(consumption_history)
         self.tariff = tariff
 
     def calculate(self) -> GreenPercentileResult:
         percentiles = self.__calculate_percentiles()
         summary = self.__calculate_summary(percentiles)
+        percentiles = kernel.PercentileTables(self.PERCENTILES, percentiles)
         return GreenPercentileResult(percentiles, summary)
 
     def __calculate_percentiles(self):
-        percentiles: dict[str, DataFrame] = {}
-        for p in self.PERCENTILES:
-            p_str = str(p)
-            percentiles[p_str] = DataFrame(columns=self.PERCENTILE_HEADERS)
-
-            # Calcula percentil fora de pico
-            off_peak_demand_in_kw = self.consumption_history.off_peak_measured_demand_in_kw.quantile(p)
-
-            # Valida com a demanda mínima para contratação
-            off_peak_demand_in_kw = (
-                settings.NEW_RESOLUTION_MINIMUM_DEMAND
-                if off_peak_demand_in_kw < settings.NEW_RESOLUTION_MINIMUM_DEMAND
-                else off_peak_demand_in_kw
-            )
-            percentiles[p_str].off_peak_demand_in_kw = [off_peak_demand_in_kw] * self.history_length
-
-            # Ultrapassagem = max(0, demanda_medida - demanda_percentil)
-            percentiles[p_str].exceeded_peak_demand_in_kw = (
-                self.consumption_history.peak_measured_demand_in_kw - percentiles[p_str].off_peak_demand_in_kw
-            )
-            percentiles[p_str].exceeded_peak_demand_in_kw = percentiles[p_str].exceeded_peak_demand_in_kw.clip(0.0)
-
-            # Ultrapassagem = max(0, demanda_medida - demanda_percentil)
-            percentiles[p_str].exceeded_off_peak_demand_in_kw = (
-                self.consumption_history.off_peak_measured_demand_in_kw - percentiles[p_str].off_peak_demand_in_kw
-            )
-            percentiles[p_str].exceeded_off_peak_demand_in_kw = percentiles[p_str].exceeded_off_peak_demand_in_kw.clip(
-                0.0
-            )
-
-            # Tem como colocar green_na_tusd_in_reais_per_kw em evidencia
-            percentiles[p_str].demand_total_cost_in_reais = self.tariff.na_tusd_in_reais_per_kw * percentiles[
-                p_str
-            ].off_peak_demand_in_kw + 3 * self.tariff.na_tusd_in_reais_per_kw * (
-                percentiles[p_str].exceeded_peak_demand_in_kw + percentiles[p_str].exceeded_off_peak_demand_in_kw
-            )
-
-            # Calcular totais de valor
-            percentiles[p_str].total_in_reais = percentiles[p_str].demand_total_cost_in_reais.sum()
-        return percentiles
-
-    def __calculate_summary(self, percentiles: "dict[str, DataFrame]"):
+        """Avalia todos os percentis de uma vez como matrizes
+        (percentis × meses). Retorna as matrizes de cada coluna de
+        `PERCENTILE_HEADERS`; a coluna `total_in_reais` é um vetor (percentis,)"""
+        peak_measured_demand = self.consumption_history.peak_measured_demand_in_kw
+        off_peak_measured_demand = self.consumption_history.off_peak_measured_demand_in_kw
+
+        # Calcula percentis fora de pico, já validados com a demanda mínima
+        # para contratação
+        off_peak_percentiles = kernel.percentile_demands(off_peak_measured_demand, self.PERCENTILES)
+        off_peak_demand = kernel.demand_matrix(off_peak_percentiles, self.history_length)
+
+        # Ultrapassagem = max(0, demanda_medida - demanda_percentil)
+        exceeded_peak_demand = kernel.exceeded_demand_matrix(peak_measured_demand, off_peak_percentiles)
+        exceeded_off_peak_demand = kernel.exceeded_demand_matrix(off_peak_measured_demand, off_peak_percentiles)
+
+        demand_total_cost = kernel.green_demand_cost_matrix(
+            self.tariff.na_tusd_in_reais_per_kw,
+            off_peak_demand,
+            exceeded_peak_demand,
+            exceeded_off_peak_demand,
+        )
+
+        # Calcular totais de valor
+        totals = kernel.totals_by_percentile(demand_total_cost)
+
+        return {
+            "off_peak_demand_in_kw": off_peak_demand,
+            "exceeded_peak_demand_in_kw": exceeded_peak_demand,
+            "exceeded_off_peak_demand_in_kw": exceeded_off_peak_demand,
+            "demand_total_cost_in_reais": demand_total_cost,
+            "total_in_reais": totals,
+        }
+
+    def __calculate_summary(self, percentiles: "dict[str, np.ndarray]"):
         summary = DataFrame(columns=self.SUMMARY_HEADERS)
-        min_p_str, smallest_total_demand_cost_in_reais = self.__find_percentile_with_smallest_total_demand(percentiles)
+        min_p, smallest_total_demand_cost_in_reais = self.__find_percentile_with_smallest_total_demand(percentiles)
 
         SAFETY_MARGIN = 1.05
         # TODO: O ideal é que demand_[off_]peak_in_kw fosse apenas um valor no
         # "resumo" e não uma coluna inteira
         summary.smallest_total_demand_cost_in_reais = smallest_total_demand_cost_in_reais
-        summary.off_peak_demand_in_kw = SAFETY_MARGIN * percentiles[min_p_str].off_peak_demand_in_kw
+        summary.off_peak_demand_in_kw = SAFETY_MARGIN * percentiles["off_peak_demand_in_kw"][min_p]
         summary.off_peak_demand_in_kw = summary.off_peak_demand_in_kw.apply(roundup)
 
         summary.exceeded_peak_demand_in_kw = (
@@ -128,15 +124,7 @@ class GreenPercentileCalculator:
 
         return summary
 
-    def __find_percentile_with_smallest_total_demand(self, percentiles: "dict[str, DataFrame]") -> str:
-        smallest_total_demand_cost_in_reais = inf
-        min_p_str = ""
-        tolerance = 0.01
-        for p_str, percentile_frame in percentiles.items():
-            # Esse "hack" é pra dar o resultado igual ao da planilha. Não tenho certeza do "and"
-            x = percentile_frame.total_in_reais[0]
-            y = smallest_total_demand_cost_in_reais
-            if x < (y + tolerance) and x < (y - tolerance):
-                smallest_total_demand_cost_in_reais = percentile_frame.total_in_reais[0]
-                min_p_str = p_str
-        return min_p_str, smallest_total_demand_cost_in_reais
+    def __find_percentile_with_smallest_total_demand(self, percentiles: "dict[str, np.ndarray]") -> tuple[int, float]:
+        totals = percentiles["total_in_reais"]
+        index, smallest_total_demand_cost_in_reais = kernel.find_smallest_total(totals, tolerance=self.TOLERANCE)
+        return index, smallest_total_demand_cost_in_reais
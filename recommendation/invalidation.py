@@ -0,0 +1,157 @@
+"""Invalidação das recomendações salvas.
+
+Cada evento (tarifa, contrato ou fatura salvos) marca as recomendações
+afetadas como inválidas com um único `UPDATE`. Caminhos que salvam muitas
+linhas de uma vez podem usar `batched_invalidation`: dentro do bloco os
+sinais apenas acumulam as unidades afetadas e um único `UPDATE` é feito na
+saída.
+
+Fora do modo `JOBS_ALWAYS_EAGER`, as unidades invalidadas também têm a
+recomendação recalculada em segundo plano, antes da próxima consulta. O
+recálculo espera `RECOMMENDATION_WARMUP_DELAY` segundos sem novas
+invalidações da unidade (até `RECOMMENDATION_WARMUP_MAX_DELAY`), então uma
+importação de várias faturas resulta em um único recálculo.
+
+Os mesmos eventos removem as respostas em cache da busca global
+(`global_search_recommendation.cache`)."""
+
+import threading
+
+from contextlib import contextmanager
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from global_search_recommendation.cache import invalidate_responses
+from jobs.queue import enqueue_debounced
+
+from .models import Recommendation
+
+_state = threading.local()
+
+
+GENERATE_TASK = "recommendation.generate"
+
+
+def generate_job_key(consumer_unit_id: int) -> str:
+    """Chave dos jobs de recálculo: consultas e invalidações da mesma unidade
+    compartilham um único job pendente"""
+    return f"{GENERATE_TASK}.{consumer_unit_id}"
+
+
+def _pending():
+    return getattr(_state, "pending", None)
+
+
+def _bill_invalidates(recommendation: dict, bill_date: date) -> bool:
+    """Regra dos sinais de fatura: a fatura afeta a recomendação se não é
+    anterior ao período analisado nem ao início da tarifa usada"""
+    dates = recommendation["dates"]
+    if not dates:
+        return False
+
+    tariff_dates = [d for d in (recommendation["tariffStartDate"], recommendation["tariffEndDate"]) if d is not None]
+    return bill_date >= min(dates) or any(bill_date >= d for d in tariff_dates)
+
+
+def _consumer_units_of_bills(bills: "list[tuple[int, date]]") -> "set[int]":
+    recommendations = (
+        Recommendation.objects.filter(consumer_unit__in={consumer_unit_id for consumer_unit_id, _ in bills})
+        .exclude(isValid=False)
+        .values("consumer_unit_id", "dates", "tariffStartDate", "tariffEndDate")
+    )
+    recommendations = {recommendation["consumer_unit_id"]: recommendation for recommendation in recommendations}
+
+    return {
+        consumer_unit_id
+        for consumer_unit_id, bill_date in bills
+        if consumer_unit_id in recommendations and _bill_invalidates(recommendations[consumer_unit_id], bill_date)
+    }
+
+
+def _update(consumer_units: "list[QuerySet | set[int]]"):
+    condition = Q()
+    for units in consumer_units:
+        condition |= Q(consumer_unit__in=units)
+
+    if not condition:
+        return
+
+    recommendations = Recommendation.objects.filter(condition).exclude(isValid=False)
+    if not _warmup_enabled():
+        recommendations.update(isValid=False)
+        return
+
+    consumer_unit_ids = list(recommendations.values_list("consumer_unit_id", flat=True))
+    if consumer_unit_ids:
+        Recommendation.objects.filter(consumer_unit_id__in=consumer_unit_ids).update(isValid=False)
+        _schedule_warmup(consumer_unit_ids)
+
+
+def _warmup_enabled() -> bool:
+    # No modo eager não há workers: a recomendação é calculada na consulta
+    return not settings.JOBS_ALWAYS_EAGER and settings.RECOMMENDATION_WARMUP_DELAY is not None
+
+
+def _schedule_warmup(consumer_unit_ids: "list[int]"):
+    enqueue_debounced(
+        GENERATE_TASK,
+        {
+            generate_job_key(consumer_unit_id): {"consumer_unit_id": consumer_unit_id}
+            for consumer_unit_id in consumer_unit_ids
+        },
+        delay=settings.RECOMMENDATION_WARMUP_DELAY,
+        max_delay=settings.RECOMMENDATION_WARMUP_MAX_DELAY,
+    )
+
+
+def invalidate_recommendations(consumer_units: "QuerySet | set[int]"):
+    """Invalida as recomendações das unidades consumidoras informadas (ids ou
+    um queryset de ids, usado como subconsulta)"""
+    # Os querysets vêm das mudanças de tarifa, que já trocam a versão das
+    # tarifas usada no cache da busca global
+    if not isinstance(consumer_units, QuerySet):
+        invalidate_responses(consumer_units)
+
+    pending = _pending()
+    if pending is not None:
+        pending["consumer_units"].append(consumer_units)
+        return
+
+    _update([consumer_units])
+
+
+def invalidate_recommendations_for_bills(bills: "list[tuple[int, date]]"):
+    """Invalida as recomendações afetadas por faturas `(unidade, data)`"""
+    invalidate_responses({consumer_unit_id for consumer_unit_id, _ in bills})
+
+    pending = _pending()
+    if pending is not None:
+        pending["bills"].extend(bills)
+        return
+
+    consumer_units = _consumer_units_of_bills(bills)
+    if consumer_units:
+        _update([consumer_units])
+
+
+@contextmanager
+def batched_invalidation():
+    """Acumula as invalidações feitas no bloco e as aplica de uma vez na saída"""
+    if _pending() is not None:
+        yield
+        return
+
+    _state.pending = {"consumer_units": [], "bills": []}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+
+    consumer_units = pending["consumer_units"]
+    if pending["bills"]:
+        consumer_units.append(_consumer_units_of_bills(pending["bills"]))
+    if consumer_units:
+        _update(consumer_units)
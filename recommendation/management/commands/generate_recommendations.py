@@ -0,0 +1,24 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from recommendation.batch import BatchRecommendationEngine
+
+
+class Command(BaseCommand):
+    help = "Gera as recomendações de todas as unidades consumidoras ativas de uma universidade ou de todas elas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--university", type=int, default=None, help="ID da universidade (padrão: todas)")
+
+    def handle(self, *args, **options) -> None:
+        start = perf_counter()
+        report = BatchRecommendationEngine(options["university"]).run()
+        elapsed = perf_counter() - start
+
+        self.stdout.write(
+            f"{report['generated']} recomendações geradas para {report['consumer_units']} "
+            f"unidades consumidoras em {elapsed:.2f}s"
+        )
+        for consumer_unit_id, error in report["failed"].items():
+            self.stderr.write(f"  Unidade consumidora {consumer_unit_id}: {error}")
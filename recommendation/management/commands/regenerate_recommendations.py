@@ -0,0 +1,60 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recommendation.regeneration import get_stale_recommendations, init_worker, regenerate_chunk, split_in_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula em paralelo as recomendações inválidas ou desatualizadas. "
+        "Pode ser interrompido e executado de novo: apenas as pendentes são processadas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--university", type=int, default=None, help="ID da universidade (padrão: todas)")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(), help="Número de processos (padrão: número de CPUs)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=20, help="Unidades consumidoras por tarefa")
+
+    def handle(self, *args, **options) -> None:
+        consumer_unit_ids = list(
+            get_stale_recommendations(options["university"]).values_list("consumer_unit_id", flat=True)
+        )
+        total = len(consumer_unit_ids)
+        if total == 0:
+            self.stdout.write("Nenhuma recomendação a regenerar")
+            return
+
+        chunks = split_in_chunks(consumer_unit_ids, options["chunk_size"])
+        workers = max(1, min(options["workers"], len(chunks)))
+        self.stdout.write(f"Regenerando {total} recomendações em {len(chunks)} blocos com {workers} processos")
+
+        start = perf_counter()
+        done = 0
+        failed = {}
+
+        # Os processos filhos não podem herdar conexões abertas
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            futures = {executor.submit(regenerate_chunk, chunk): chunk for chunk in chunks}
+
+            for future in as_completed(futures):
+                try:
+                    regenerated, chunk_failed = future.result()
+                except Exception as e:
+                    regenerated, chunk_failed = [], {consumer_unit_id: str(e) for consumer_unit_id in futures[future]}
+
+                failed.update(chunk_failed)
+                done += len(regenerated) + len(chunk_failed)
+                self.stdout.write(f"[{done}/{total}] {len(regenerated)} regeneradas, {len(chunk_failed)} com erro")
+
+        elapsed = perf_counter() - start
+        self.stdout.write(f"{total - len(failed)} recomendações regeneradas em {elapsed:.2f}s")
+        for consumer_unit_id, error in failed.items():
+            self.stderr.write(f"  Unidade consumidora {consumer_unit_id}: {error}")
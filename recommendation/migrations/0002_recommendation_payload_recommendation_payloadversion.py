@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendation',
+            name='payload',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='payloadVersion',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+    ]
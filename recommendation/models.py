@@ -2,6 +2,12 @@ from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.utils import timezone
 
+from recommendation_commons.renderers import dumps
+
+# Versão do formato de `Recommendation.payload`. Respostas gravadas com outra
+# versão (ou antes dela existir) são montadas de novo a partir dos campos.
+PAYLOAD_VERSION = 1
+
 
 class Recommendation(models.Model):
     consumer_unit = models.OneToOneField(
@@ -26,14 +32,18 @@ class Recommendation(models.Model):
     currentContractCostsPlot = models.JSONField(null=True)
     contractsComparisonTotals = models.JSONField(null=True)
     detailedContractsCostsComparisonPlot = models.JSONField(null=True)
+    # Resposta de `to_dict` já codificada em JSON, devolvida pela API sem
+    # decodificar os campos acima
+    payload = models.BinaryField(null=True, editable=False)
+    payloadVersion = models.PositiveSmallIntegerField(null=True, editable=False)
 
     def __str__(self):
         return f"Recommendation for Consumer Unit {self.consumer_unit_id}"
 
     def to_dict(self):
         return {
-            "consumer_unit": self.consumer_unit.id if self.consumer_unit else None,
-            "currentContract": self.currentContract.id if self.currentContract else None,
+            "consumer_unit": self.consumer_unit_id,
+            "currentContract": self.currentContract_id,
             "generatedOn": self.generatedOn.isoformat() if self.generatedOn else None,
             "energyBillsCount": self.energyBillsCount,
             "currentTotalCost": self.currentTotalCost,
@@ -50,3 +60,25 @@ class Recommendation(models.Model):
             "contractsComparisonTotals": self.contractsComparisonTotals,
             "detailedContractsCostsComparisonPlot": self.detailedContractsCostsComparisonPlot,
         }
+
+    def render_payload(self):
+        self.payload = dumps(self.to_dict())
+        self.payloadVersion = PAYLOAD_VERSION
+
+    def get_payload(self) -> bytes:
+        """Resposta de `to_dict` codificada, lida do `payload` quando atual"""
+        if self.payload is not None and self.payloadVersion == PAYLOAD_VERSION:
+            return bytes(self.payload)
+
+        deferred_fields = self.get_deferred_fields()
+        if deferred_fields:
+            self.refresh_from_db(fields=deferred_fields)
+        return dumps(self.to_dict())
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # O `payload` acompanha os demais campos, inclusive os mantidos de
+        # gravações anteriores (ver `build_recommendation_fields`)
+        self.render_payload()
+        if update_fields is not None:
+            update_fields = {*update_fields, "payload", "payloadVersion"}
+        super().save(*args, update_fields=update_fields, **kwargs)
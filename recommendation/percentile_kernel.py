@@ -0,0 +1,122 @@
+"""Kernel matricial compartilhado pelos calculadores de percentis.
+
+Todas as funções trabalham com matrizes (percentis × meses): cada linha
+corresponde a um percentil candidato e cada coluna a uma fatura do histórico.
+Dessa forma todos os percentis são avaliados em uma única passada, em vez de
+montar um `DataFrame` por percentil."""
+
+from collections.abc import Mapping
+from math import inf
+
+import numpy as np
+
+from django.conf import settings
+from pandas import DataFrame
+
+
+def percentile_demands(measured_demand: np.ndarray, percentiles: "list[float]") -> np.ndarray:
+    """Retorna um vetor (percentis,) com a demanda de cada percentil, já
+    validada com a demanda mínima para contratação.
+
+    Usa a mesma interpolação linear de `Series.quantile`, ignorando `NaN`."""
+    measured_demand = np.asarray(measured_demand, dtype=float)
+    if measured_demand.size == 0:
+        demands = np.full(len(percentiles), np.nan)
+    else:
+        demands = np.nanpercentile(measured_demand, np.asarray(percentiles) * 100)
+
+    return np.where(
+        demands < settings.NEW_RESOLUTION_MINIMUM_DEMAND,
+        settings.NEW_RESOLUTION_MINIMUM_DEMAND,
+        demands,
+    )
+
+
+def demand_matrix(demands: np.ndarray, history_length: int) -> np.ndarray:
+    """Replica o vetor (percentis,) em uma matriz (percentis × meses)"""
+    return np.repeat(np.asarray(demands, dtype=float)[:, None], history_length, axis=1)
+
+
+def exceeded_demand_matrix(measured_demand: np.ndarray, demands: np.ndarray) -> np.ndarray:
+    """Ultrapassagem = max(0, demanda_medida - demanda_percentil) para todos
+    os percentis de uma vez. Retorna uma matriz (percentis × meses)."""
+    measured_demand = np.asarray(measured_demand, dtype=float)
+    return np.clip(measured_demand[None, :] - np.asarray(demands, dtype=float)[:, None], 0.0, None)
+
+
+def blue_demand_cost_matrix(
+    peak_tusd_in_reais_per_kw: float,
+    off_peak_tusd_in_reais_per_kw: float,
+    peak_demand: np.ndarray,
+    off_peak_demand: np.ndarray,
+    exceeded_peak_demand: np.ndarray,
+    exceeded_off_peak_demand: np.ndarray,
+) -> np.ndarray:
+    # Template de relatório:
+    # Seção 4: Metodologia de cálculo: fórmulas (2) e (3)
+    # Vdemanda + Vultrapassagem
+    return (
+        peak_tusd_in_reais_per_kw * peak_demand
+        + 3 * peak_tusd_in_reais_per_kw * exceeded_peak_demand
+        + off_peak_tusd_in_reais_per_kw * off_peak_demand
+        + 3 * off_peak_tusd_in_reais_per_kw * exceeded_off_peak_demand
+    )
+
+
+def green_demand_cost_matrix(
+    na_tusd_in_reais_per_kw: float,
+    demand: np.ndarray,
+    exceeded_peak_demand: np.ndarray,
+    exceeded_off_peak_demand: np.ndarray,
+) -> np.ndarray:
+    # Tem como colocar green_na_tusd_in_reais_per_kw em evidencia
+    return na_tusd_in_reais_per_kw * demand + 3 * na_tusd_in_reais_per_kw * (
+        exceeded_peak_demand + exceeded_off_peak_demand
+    )
+
+
+def totals_by_percentile(demand_cost: np.ndarray) -> np.ndarray:
+    """Soma os custos de cada percentil ao longo dos meses"""
+    return demand_cost.sum(axis=1)
+
+
+def find_smallest_total(totals: np.ndarray, tolerance: float = 0.0) -> "tuple[int, float]":
+    """Retorna o índice e o valor do menor total.
+
+    Um total só substitui o menor encontrado até então se for menor que ele
+    por mais de `tolerance`. Com `tolerance` igual a zero equivale ao primeiro
+    mínimo estrito (`argmin`). Se nenhum total for finito (todos `nan` ou
+    `inf`), não há percentil a recomendar e um `ValueError` é lançado."""
+    if tolerance == 0.0:
+        index = int(np.nanargmin(totals)) if (totals < inf).any() else -1
+    else:
+        index, smallest = -1, inf
+        for i, total in enumerate(totals):
+            # Esse "hack" é pra dar o resultado igual ao da planilha. Não tenho certeza do "and"
+            if total < (smallest + tolerance) and total < (smallest - tolerance):
+                index, smallest = i, total
+
+    if index == -1:
+        raise ValueError("Nenhum percentil tem custo total de demanda válido")
+    return index, totals[index]
+
+
+class PercentileTables(Mapping):
+    """Tabelas `{percentil: DataFrame}` com as colunas de cada percentil.
+
+    O cálculo usa apenas as matrizes; cada `DataFrame` só é montado quando
+    acessado (relatórios e testes)."""
+
+    def __init__(self, percentiles: "list[float]", columns: "dict[str, np.ndarray]"):
+        self._index = {str(p): index for index, p in enumerate(percentiles)}
+        self._columns = columns
+
+    def __getitem__(self, key: str) -> DataFrame:
+        index = self._index[key]
+        return DataFrame({column: values[index] for column, values in self._columns.items()})
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
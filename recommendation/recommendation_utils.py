@@ -18,6 +18,7 @@ from mec_energia.error_response_manage import (
     TariffsNotFoundError,
 )
 from recommendation.calculator import RecommendationCalculator
+from recommendation_commons.consumption_history import ConsumptionHistory
 from recommendation_commons.helpers import fill_history_with_pending_dates, fill_with_pending_dates
 from recommendation_commons.recommendation_result import RecommendationResult
 from recommendation_commons.response import (
@@ -53,6 +54,21 @@ def process_recommendation(consumer_unit_id):
     contract = consumer_unit.current_contract
     distributor_id = contract.distributor.id
     blue, green = StaticGetters.get_tariffs(contract.subgroup, distributor_id)
+    consumption_history_data = StaticGetters.get_consumption_history(consumer_unit, contract)
+
+    return compute_recommendation(consumer_unit, contract, blue, green, consumption_history_data)
+
+
+def compute_recommendation(
+    consumer_unit: ConsumerUnit,
+    contract: Contract,
+    blue: Tariff,
+    green: Tariff,
+    consumption_history_data: tuple,
+):
+    """Calcula a recomendação a partir dos dados já carregados, sem acessar o
+    banco. `consumption_history_data` é o retorno de
+    `StaticGetters.get_consumption_history`/`build_consumption_history`."""
     errors = []
     warnings = []
 
@@ -60,9 +76,7 @@ def process_recommendation(consumer_unit_id):
     if is_missing_tariff:
         errors.append(TariffsNotFoundError)
 
-    consumption_history, pending_bills_dates, atypical_bills_count = StaticGetters.get_consumption_history(
-        consumer_unit, contract
-    )
+    consumption_history, pending_bills_dates, atypical_bills_count = consumption_history_data
 
     consumption_history_length = len(consumption_history)
     pending_num = len(pending_bills_dates) - atypical_bills_count
@@ -104,6 +118,7 @@ def process_recommendation(consumer_unit_id):
         recommendation = calculator.calculate(consumer_unit.total_installed_power)
         if recommendation:
             fill_with_pending_dates(recommendation, consumption_history, pending_bills_dates)
+            current_contract = recommendation.current_contract
     else:
         # FIXME: temporário
         fill_history_with_pending_dates(consumption_history, pending_bills_dates)
@@ -124,45 +139,16 @@ def process_recommendation(consumer_unit_id):
     return rc
 
 
-def serializeSeries(serie, a):
-    def convert_item(item):
-        # Handle "None" string
-        if item == "None":
-            return None
-
-        if isinstance(item, str):
-            # Remove leading/trailing whitespace and quotes
-            item = item.strip().strip('"')
-
-            # Try to parse as a date or datetime
-            try:
-                # Attempt to parse as ISO format datetime
-                return datetime.fromisoformat(item)
-            except ValueError:
-                # If not a datetime, try to parse as a number
-                try:
-                    # Check if the string is a valid number
-                    if item.isdigit() or (item.replace(".", "", 1).isdigit() and item.count(".") < 2):
-                        num = float(item)
-                        return int(num) if num.is_integer() else num
-                except ValueError:
-                    # If not a number, return as string
-                    return item
-
-        # Handle non-string types
-        try:
-            return float(item)
-        except (ValueError, TypeError):
-            return str(item)
-
-    return [convert_item(item) for item in serie]
-
-
-def save_recommendation(
-    consumer_unit_id,
+def _float_list(values: list) -> list:
+    """Valores de uma coluna dos gráficos como `float`, com `None` nos meses
+    pendentes"""
+    return [None if value is None else float(value) for value in values]
+
+
+def build_recommendation_fields(
     recommendation: RecommendationResult,
     current_contract: DataFrame,
-    consumption_history: DataFrame,
+    consumption_history: ConsumptionHistory,
     contract: Contract,
     consumer_unit: ConsumerUnit,
     blue: Tariff,
@@ -170,7 +156,10 @@ def save_recommendation(
     errors: list[str],
     warnings: list[str],
     energy_bills_count: int,
-):
+) -> dict:
+    """Monta os campos persistidos em `Recommendation` a partir do retorno de
+    `process_recommendation`. Quando não há recomendação, apenas os campos do
+    contrato atual são retornados, de modo que os demais não sejam alterados."""
     dates = consumption_history.date
     dates_list = [date_obj for date_obj in dates]
 
@@ -179,106 +168,103 @@ def save_recommendation(
     )
 
     if recommendation is None:
-        recommendation_instance, created = Recommendation.objects.update_or_create(
-            consumer_unit_id=consumer_unit_id.id,
-            defaults={
-                "consumer_unit_id": consumer_unit_id,
-                "isValid": True,
-                "generatedOn": datetime.now(),
-                "errors": errors,
-                "warnings": warnings,
-                "dates": dates_list,
-                "shouldRenewContract": False,
-                "currentContractCostsPlot": {
-                    "consumptionCostInReais": serializeSeries(
-                        current_contract_costs["consumption_cost_in_reais"], "consumption_cost_in_reais"
-                    ),
-                    "demandCostInReais": serializeSeries(
-                        current_contract_costs["demand_cost_in_reais"], "demand_cost_in_reais"
-                    ),
-                },
-                "currentTotalCost": current_total_cost,
-            },
-        )
-        return recommendation_instance, created
-    else:
-        costs_comparison = _generate_plot_costs_comparison(recommendation)
-        contracts_comparison, totals = _generate_table_contracts_comparison(recommendation)
-        costs_ratio = totals["absolute_difference"] / totals["total_cost_in_reais_in_current"]
-        nominal_savings_percentage = max(0, round(costs_ratio, 3) * 100)
-        detailed_contracts_costs_comparison = _generate_plot_detailed_contracts_costs_comparison(recommendation)
-
-        contracts_comparison_table = []
-        for comparison in contracts_comparison:
-            entry = {
-                "absoluteDifference": comparison["absolute_difference"],
-                "consumptionCostInReaisInRecommended": comparison["consumption_cost_in_reais_in_recommended"],
-                "demandCostInReaisInRecommended": comparison["demand_cost_in_reais_in_recommended"],
-                "totalCostInReaisInRecommended": comparison["total_cost_in_reais_in_recommended"],
-                "consumptionCostInReaisInCurrent": comparison["consumption_cost_in_reais_in_current"],
-                "demandCostInReaisInCurrent": comparison["demand_cost_in_reais_in_current"],
-                "totalCostInReaisInCurrent": comparison["total_cost_in_reais_in_current"],
-                "date": comparison["date"].isoformat(),
-            }
-            contracts_comparison_table.append(entry)
-
-        recommendation_instance, created = Recommendation.objects.update_or_create(
-            consumer_unit_id=consumer_unit_id,
-            defaults={
-                "consumer_unit_id": consumer_unit_id.id,
-                "isValid": True,
-                "generatedOn": datetime.now(),
-                "currentContract_id": contract.id,
-                "errors": errors,
-                "warnings": warnings,
-                "dates": dates_list,
-                "shouldRenewContract": costs_ratio > settings.MINIMUM_PERCENTAGE_DIFFERENCE_FOR_CONTRACT_RENOVATION,
-                "energyBillsCount": energy_bills_count,
-                "nominalSavingsPercentage": nominal_savings_percentage,
-                "tariffStartDate": blue.start_date,
-                "tariffEndDate": blue.end_date,
-                "recommendedContract": {
-                    "subgroup": contract.subgroup,
-                    "tariffFlag": recommendation.tariff_flag,
-                    "offPeakDemandInKw": float(recommendation.off_peak_demand_in_kw),
-                    "peakDemandInKw": float(recommendation.peak_demand_in_kw),
-                },
-                "costsComparisonPlot": {
-                    "date": serializeSeries(costs_comparison["date"], "date"),
-                    "totalCostInReaisInRecommended": serializeSeries(
-                        costs_comparison["total_cost_in_reais_in_recommended"], "total_cost_in_reais_in_recommended"
-                    ),
-                    "totalCostInReaisInCurrent": serializeSeries(
-                        costs_comparison["total_cost_in_reais_in_current"], "total_cost_in_reais_in_current"
-                    ),
-                    "totalTotalCostInReaisInCurrent": costs_comparison["total_total_cost_in_reais_in_current"],
-                    "totalTotalCostInReaisInRecommended": (
-                        costs_comparison["total_total_cost_in_reais_in_recommended"]
-                    ),
-                },
-                "contractsComparisonTotals": {
-                    "absoluteDifference": totals["absolute_difference"],
-                    "consumptionCostInReaisInRecommended": totals["consumption_cost_in_reais_in_recommended"],
-                    "demandCostInReaisInRecommended": totals["demand_cost_in_reais_in_recommended"],
-                    "totalCostInReaisInRecommended": totals["total_cost_in_reais_in_recommended"],
-                    "consumptionCostInReaisInCurrent": totals["consumption_cost_in_reais_in_current"],
-                    "demandCostInReaisInCurrent": totals["demand_cost_in_reais_in_current"],
-                    "totalCostInReaisInCurrent": totals["total_cost_in_reais_in_current"],
-                },
-                "currentContractCostsPlot": {
-                    "consumptionCostInReais": serializeSeries(
-                        current_contract_costs["consumption_cost_in_reais"], "consumption_cost_in_reais"
-                    ),
-                    "demandCostInReais": serializeSeries(
-                        current_contract_costs["demand_cost_in_reais"], "demand_cost_in_reais"
-                    ),
-                },
-                "detailedContractsCostsComparisonPlot": detailed_contracts_costs_comparison,
-                "currentTotalCost": current_total_cost,
-            },
-        )
-
-        return recommendation_instance, created
+        return {
+            "isValid": True,
+            "generatedOn": datetime.now(),
+            "errors": errors,
+            "warnings": warnings,
+            "dates": dates_list,
+            "shouldRenewContract": False,
+            # Sem tarifas não há custos do contrato atual
+            "currentContractCostsPlot": (
+                {
+                    "consumptionCostInReais": _float_list(current_contract_costs["consumption_cost_in_reais"]),
+                    "demandCostInReais": _float_list(current_contract_costs["demand_cost_in_reais"]),
+                }
+                if current_contract_costs is not None
+                else None
+            ),
+            "currentTotalCost": current_total_cost,
+        }
+
+    costs_comparison = _generate_plot_costs_comparison(recommendation)
+    contracts_comparison, totals = _generate_table_contracts_comparison(recommendation)
+    costs_ratio = totals["absolute_difference"] / totals["total_cost_in_reais_in_current"]
+    nominal_savings_percentage = max(0, round(costs_ratio, 3) * 100)
+    detailed_contracts_costs_comparison = _generate_plot_detailed_contracts_costs_comparison(recommendation)
+
+    contracts_comparison_table = []
+    for comparison in contracts_comparison:
+        entry = {
+            "absoluteDifference": comparison["absolute_difference"],
+            "consumptionCostInReaisInRecommended": comparison["consumption_cost_in_reais_in_recommended"],
+            "demandCostInReaisInRecommended": comparison["demand_cost_in_reais_in_recommended"],
+            "totalCostInReaisInRecommended": comparison["total_cost_in_reais_in_recommended"],
+            "consumptionCostInReaisInCurrent": comparison["consumption_cost_in_reais_in_current"],
+            "demandCostInReaisInCurrent": comparison["demand_cost_in_reais_in_current"],
+            "totalCostInReaisInCurrent": comparison["total_cost_in_reais_in_current"],
+            "date": comparison["date"].isoformat(),
+        }
+        contracts_comparison_table.append(entry)
+
+    return {
+        "isValid": True,
+        "generatedOn": datetime.now(),
+        "currentContract_id": contract.id,
+        "errors": errors,
+        "warnings": warnings,
+        "dates": dates_list,
+        "shouldRenewContract": costs_ratio > settings.MINIMUM_PERCENTAGE_DIFFERENCE_FOR_CONTRACT_RENOVATION,
+        "energyBillsCount": energy_bills_count,
+        "nominalSavingsPercentage": nominal_savings_percentage,
+        "tariffStartDate": blue.start_date,
+        "tariffEndDate": blue.end_date,
+        "recommendedContract": {
+            "subgroup": contract.subgroup,
+            "tariffFlag": recommendation.tariff_flag,
+            "offPeakDemandInKw": float(recommendation.off_peak_demand_in_kw),
+            "peakDemandInKw": float(recommendation.peak_demand_in_kw),
+        },
+        "costsComparisonPlot": {
+            "date": [date_obj.isoformat() for date_obj in costs_comparison["date"]],
+            "totalCostInReaisInRecommended": _float_list(costs_comparison["total_cost_in_reais_in_recommended"]),
+            "totalCostInReaisInCurrent": _float_list(costs_comparison["total_cost_in_reais_in_current"]),
+            "totalTotalCostInReaisInCurrent": costs_comparison["total_total_cost_in_reais_in_current"],
+            "totalTotalCostInReaisInRecommended": (costs_comparison["total_total_cost_in_reais_in_recommended"]),
+        },
+        "contractsComparisonTotals": {
+            "absoluteDifference": totals["absolute_difference"],
+            "consumptionCostInReaisInRecommended": totals["consumption_cost_in_reais_in_recommended"],
+            "demandCostInReaisInRecommended": totals["demand_cost_in_reais_in_recommended"],
+            "totalCostInReaisInRecommended": totals["total_cost_in_reais_in_recommended"],
+            "consumptionCostInReaisInCurrent": totals["consumption_cost_in_reais_in_current"],
+            "demandCostInReaisInCurrent": totals["demand_cost_in_reais_in_current"],
+            "totalCostInReaisInCurrent": totals["total_cost_in_reais_in_current"],
+        },
+        "currentContractCostsPlot": {
+            "consumptionCostInReais": _float_list(current_contract_costs["consumption_cost_in_reais"]),
+            "demandCostInReais": _float_list(current_contract_costs["demand_cost_in_reais"]),
+        },
+        "detailedContractsCostsComparisonPlot": detailed_contracts_costs_comparison,
+        "currentTotalCost": current_total_cost,
+    }
+
+
+def lock_recommendation(consumer_unit_id: int):
+    """Bloqueia o recálculo da recomendação da unidade consumidora até o fim
+    da transação atual, com `SELECT ... FOR UPDATE` na unidade. Quem chega
+    depois espera o cálculo em andamento terminar e, a seguir, encontra a
+    recomendação já gravada."""
+    list(ConsumerUnit.objects.select_for_update().filter(id=consumer_unit_id).values_list("id", flat=True))
+
+
+def save_recommendation(consumer_unit: ConsumerUnit, *processed_recommendation):
+    fields = build_recommendation_fields(*processed_recommendation)
+    recommendation_instance, created = Recommendation.objects.update_or_create(
+        consumer_unit_id=consumer_unit.id,
+        defaults=fields,
+    )
+    return recommendation_instance, created
 
 
 def get_recommendation(consumer_unit_id):
@@ -0,0 +1,72 @@
+import logging
+
+from datetime import datetime
+
+import django
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import Q, QuerySet
+from rest_framework.response import Response
+
+from recommendation.recommendation_utils import lock_recommendation, process_recommendation, save_recommendation
+
+from .models import Recommendation
+
+logger = logging.getLogger("tasks")
+
+
+def get_stale_recommendations(university_id: int | None = None) -> QuerySet:
+    """Recomendações que precisam ser recalculadas: as invalidadas (por
+    mudança de tarifa, contrato ou fatura) e as geradas antes do mês atual,
+    cuja janela de faturas já mudou.
+
+    Cada recomendação recalculada volta a ser válida e do mês atual, então
+    uma execução interrompida é retomada simplesmente executando de novo."""
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    recommendations = Recommendation.objects.filter(
+        Q(isValid=False) | Q(isValid__isnull=True) | Q(generatedOn__lt=month_start),
+        consumer_unit__is_active=True,
+    )
+    if university_id is not None:
+        recommendations = recommendations.filter(consumer_unit__university_id=university_id)
+    return recommendations.order_by("consumer_unit_id")
+
+
+def split_in_chunks(consumer_unit_ids: "list[int]", chunk_size: int) -> "list[list[int]]":
+    return [consumer_unit_ids[i : i + chunk_size] for i in range(0, len(consumer_unit_ids), chunk_size)]
+
+
+def init_worker():
+    """Executado uma vez em cada processo do pool. O processo pai fecha as
+    suas conexões antes de criar o pool, então cada worker abre a sua própria
+    conexão na primeira consulta e a reutiliza em todos os blocos."""
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def regenerate_chunk(consumer_unit_ids: "list[int]") -> "tuple[list[int], dict[int, str]]":
+    """Recalcula e grava as recomendações de um bloco de unidades consumidoras
+    com `process_recommendation`/`save_recommendation`. Retorna as unidades
+    atualizadas e as que falharam, com o erro."""
+    regenerated = []
+    failed = {}
+
+    for consumer_unit_id in consumer_unit_ids:
+        try:
+            with transaction.atomic():
+                lock_recommendation(consumer_unit_id)
+                processed_recommendation = process_recommendation(consumer_unit_id)
+                if isinstance(processed_recommendation, Response):
+                    failed[consumer_unit_id] = str(processed_recommendation.data["errors"][0])
+                    continue
+
+                consumer_unit = processed_recommendation[4]
+                save_recommendation(consumer_unit, *processed_recommendation)
+            regenerated.append(consumer_unit_id)
+        except Exception as e:
+            logger.error(f"Erro ao regenerar recomendação da unidade consumidora {consumer_unit_id}: {str(e)}")
+            failed[consumer_unit_id] = str(e)
+
+    return regenerated, failed
@@ -0,0 +1,40 @@
+from django.db import transaction
+from rest_framework.response import Response
+
+from jobs.queue import task
+from recommendation.batch import BatchRecommendationEngine
+from recommendation.invalidation import GENERATE_TASK
+from recommendation.models import Recommendation
+from recommendation.recommendation_utils import lock_recommendation, process_recommendation, save_recommendation
+from universities.models import ConsumerUnit
+
+
+def can_read_generate_job(user, payload: dict) -> bool:
+    """O recálculo é compartilhado por todos que consultam a unidade (ver
+    `generate_job_key`): usuários da universidade da unidade podem acompanhá-lo"""
+    return ConsumerUnit.objects.filter(id=payload["consumer_unit_id"], university__universityuser=user.id).exists()
+
+
+@task(GENERATE_TASK, can_read=can_read_generate_job)
+def generate_recommendation(consumer_unit_id: int) -> dict:
+    """Calcula e grava a recomendação da unidade consumidora, caso ela não
+    exista ou tenha sido invalidada. Jobs simultâneos da mesma unidade são
+    serializados pelo bloqueio: apenas o primeiro calcula, os demais
+    encontram a recomendação já válida."""
+    with transaction.atomic():
+        lock_recommendation(consumer_unit_id)
+        if Recommendation.objects.filter(consumer_unit_id=consumer_unit_id, isValid=True).exists():
+            return {"generated": False, "up_to_date": True}
+
+        processed_recommendation = process_recommendation(consumer_unit_id)
+        if isinstance(processed_recommendation, Response):
+            return {"generated": False, "errors": processed_recommendation.data["errors"]}
+
+        consumer_unit = processed_recommendation[4]
+        save_recommendation(consumer_unit, *processed_recommendation)
+        return {"generated": True}
+
+
+@task("recommendation.batch", max_attempts=1)
+def generate_batch_recommendations(university_id: int | None = None) -> dict:
+    return BatchRecommendationEngine(university_id).run()
@@ -1,11 +1,18 @@
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import JsonResponse
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
 from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
-from recommendation.recommendation_utils import process_recommendation, save_recommendation
+from jobs.queue import enqueue
+from jobs.views import job_accepted_response
+from recommendation_commons.renderers import RecommendationJSONResponse, extend_object
+from recommendation_commons.serializers import RecommendationBatchBodySerializer
 from universities.models import ConsumerUnit
 
+from .invalidation import GENERATE_TASK, generate_job_key
 from .models import Recommendation
 
 
@@ -22,6 +29,9 @@ class RecommendationViewSet(ViewSet):
         desses campos como demanda única.
 
         `table_current_vs_recommended_contract.absolute_difference = current - recommended`
+
+        `recomputing`: a recomendação foi invalidada e está sendo recalculada
+        pelo job `jobId`; os dados retornados são os anteriores.
         """
 
         consumer_unit_id = pk
@@ -29,17 +39,31 @@ class RecommendationViewSet(ViewSet):
         consumer_unit_instance = ConsumerUnit.objects.get(id=consumer_unit_id)
         try:
             # Tenta obter a recomendação existente
-            recommendation = Recommendation.objects.filter(consumer_unit_id=consumer_unit_id).first()
+            recommendation = self._get_recommendation(consumer_unit_id)
 
+            job = None
             if recommendation is None or not recommendation.isValid:
-                # Processa a nova recomendação
-                pr = process_recommendation(consumer_unit_id)
-                recommendation_instance, created = save_recommendation(consumer_unit_instance, *pr)
-                recommendation = Recommendation.objects.get(consumer_unit_id=consumer_unit_id)
+                # A nova recomendação é calculada em segundo plano, em um job
+                # único por unidade (possivelmente já agendado pela
+                # invalidação). Com JOBS_ALWAYS_EAGER o job já foi executado;
+                # se ele não gerou a recomendação, os erros ficam no seu
+                # resultado.
+                job = enqueue(
+                    GENERATE_TASK,
+                    {"consumer_unit_id": consumer_unit_instance.id},
+                    user=request.user,
+                    key=generate_job_key(consumer_unit_instance.id),
+                )
+                recommendation = self._get_recommendation(consumer_unit_id)
+                if recommendation is None:
+                    return job_accepted_response(job)
 
-            # Se a recomendação é válida, retorna os dados
-            data = recommendation.to_dict()
-            return JsonResponse(data, safe=False)
+            # Enquanto o recálculo não termina, a recomendação anterior é
+            # retornada com `recomputing` e o job a ser acompanhado
+            data = {"recomputing": job is not None and not job.is_finished}
+            if data["recomputing"]:
+                data["jobId"] = job.id
+            return RecommendationJSONResponse(extend_object(recommendation.get_payload(), data))
 
         except ObjectDoesNotExist:
             print("Unidade de consumo não encontrada.", flush=True)
@@ -47,3 +71,40 @@ class RecommendationViewSet(ViewSet):
         except Exception as e:
             print(f"Ocorreu um erro: {e}", flush=True)
             return JsonResponse({"error": "Ocorreu um erro inesperado."}, status=500)
+
+    def _get_recommendation(self, consumer_unit_id) -> Recommendation | None:
+        # Os campos da resposta só são lidos se o `payload` estiver desatualizado
+        return (
+            Recommendation.objects.filter(consumer_unit_id=consumer_unit_id)
+            .only("consumer_unit_id", "isValid", "payload", "payloadVersion")
+            .first()
+        )
+
+
+class RecommendationBatchViewSet(ViewSet):
+    http_method_names = ["post"]
+
+    @swagger_auto_schema(request_body=RecommendationBatchBodySerializer)
+    def create(self, request: Request):
+        """Gera de uma vez as recomendações de todas as unidades consumidoras
+        ativas de uma universidade (`university_id`) ou de todas as
+        universidades, caso `university_id` não seja informado. Apenas para
+        super usuários.
+
+        A geração é feita em segundo plano: o relatório fica no resultado do
+        job retornado."""
+
+        if not request.user.is_admin:
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = RecommendationBatchBodySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        university = serializer.validated_data["university_id"]
+        job = enqueue(
+            "recommendation.batch",
+            {"university_id": university.id if university is not None else None},
+            user=request.user,
+        )
+        return job_accepted_response(job)
@@ -0,0 +1,114 @@
+"""Histórico de consumo usado nos cálculos de recomendação.
+
+O histórico tem no máximo `IDEAL_ENERGY_BILLS_FOR_RECOMMENDATION` faturas, então
+montar um `DataFrame` a cada requisição custava mais que os próprios cálculos.
+Os valores ficam em uma única matriz float64 (faturas × colunas) e cada coluna
+é acessada pelo nome, como nos `DataFrame`s, por uma visão dessa matriz."""
+
+import math
+
+import numpy as np
+
+from recommendation_commons.headers import CONSUMPTION_HISTORY_HEADERS
+
+# Colunas numéricas, na ordem da matriz. As datas ficam em uma lista à parte
+COLUMNS = CONSUMPTION_HISTORY_HEADERS[1:]
+COLUMN_INDEX = {column: index for index, column in enumerate(COLUMNS)}
+
+# Campos das faturas consultados com `values_list` para montar o histórico
+BILL_FIELDS = (
+    "date",
+    "is_atypical",
+    "peak_consumption_in_kwh",
+    "off_peak_consumption_in_kwh",
+    "peak_measured_demand_in_kw",
+    "off_peak_measured_demand_in_kw",
+)
+
+
+def _column(name: str):
+    index = COLUMN_INDEX[name]
+
+    def get(self) -> np.ndarray:
+        return self.values[:, index]
+
+    def set(self, value):
+        self.values[:, index] = value
+
+    return property(get, set)
+
+
+class ConsumptionHistory:
+    __slots__ = ("date", "values")
+
+    peak_consumption_in_kwh = _column("peak_consumption_in_kwh")
+    off_peak_consumption_in_kwh = _column("off_peak_consumption_in_kwh")
+    peak_measured_demand_in_kw = _column("peak_measured_demand_in_kw")
+    off_peak_measured_demand_in_kw = _column("off_peak_measured_demand_in_kw")
+    contract_peak_demand_in_kw = _column("contract_peak_demand_in_kw")
+    contract_off_peak_demand_in_kw = _column("contract_off_peak_demand_in_kw")
+    peak_exceeded_in_kw = _column("peak_exceeded_in_kw")
+    off_peak_exceeded_in_kw = _column("off_peak_exceeded_in_kw")
+
+    def __init__(self, dates: list, values: np.ndarray):
+        self.date = list(dates)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.date), len(COLUMNS))
+
+    @classmethod
+    def from_bills(cls, bills: list[tuple], contract_demands: "tuple[float, float]", is_blue: bool):
+        """Monta o histórico a partir das faturas em ordem cronológica, como
+        tuplas com os `BILL_FIELDS`, e das demandas contratadas `(ponta,
+        fora_ponta)`"""
+        history = cls([bill[0] for bill in bills], np.zeros((len(bills), len(COLUMNS))))
+        if bills:
+            history.values[:, :4] = [
+                (
+                    float(peak_consumption),
+                    float(off_peak_consumption),
+                    float(peak_demand if peak_demand is not None else off_peak_demand),
+                    float(off_peak_demand),
+                )
+                for _, _, peak_consumption, off_peak_consumption, peak_demand, off_peak_demand in bills
+            ]
+            history.contract_peak_demand_in_kw = float(contract_demands[0])
+            history.contract_off_peak_demand_in_kw = float(contract_demands[1])
+
+        if (history.peak_measured_demand_in_kw == 0).all():
+            history.peak_measured_demand_in_kw = history.off_peak_measured_demand_in_kw
+
+        base_to_exceed_peak = history.contract_peak_demand_in_kw if is_blue else history.contract_off_peak_demand_in_kw
+        history.peak_exceeded_in_kw = np.clip(history.peak_measured_demand_in_kw - base_to_exceed_peak, 0.0, None)
+        history.off_peak_exceeded_in_kw = np.clip(
+            history.off_peak_measured_demand_in_kw - history.contract_off_peak_demand_in_kw, 0.0, None
+        )
+        return history
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[:, COLUMN_INDEX[column]]
+
+    def add_pending_dates(self, dates: list):
+        """Acrescenta os meses sem fatura, com valores `nan`, e ordena o
+        histórico por data"""
+        dates = self.date + list(dates)
+        values = np.vstack((self.values, np.full((len(dates) - len(self.date), len(COLUMNS)), np.nan)))
+
+        order = sorted(range(len(dates)), key=dates.__getitem__)
+        self.date = [dates[i] for i in order]
+        self.values = values[order]
+
+    def to_dict(self, columns: "list[str]", orient: str = "list"):
+        """Como `DataFrame[columns].to_dict(orient)`, com `None` no lugar de
+        `nan`. `orient` pode ser "list" ou "records"."""
+        data = {}
+        for column in columns:
+            if column == "date":
+                data[column] = self.date
+            else:
+                data[column] = [None if math.isnan(value) else value for value in self[column].tolist()]
+
+        if orient == "records":
+            return [dict(zip(data, row)) for row in zip(*data.values())]
+        return data
@@ -1,8 +1,8 @@
 from datetime import datetime
 
-from numpy import nan
-from pandas import DataFrame
+from pandas import DataFrame, Index
 
+from recommendation_commons.consumption_history import ConsumptionHistory
 from recommendation_commons.recommendation_result import RecommendationResult
 
 
@@ -10,80 +10,50 @@ def __formatted_date(date: str):
     return datetime.strptime(date, "%Y-%m-%d").date()
 
 
-def fill_history_with_pending_dates(consumption_history: DataFrame, pending_bills_dates: list[str]):
+def fill_history_with_pending_dates(consumption_history: ConsumptionHistory, pending_bills_dates: list[str]):
     """FIXME: função temporária"""
-    history_len = len(consumption_history)
-    for i, date in enumerate(pending_bills_dates):
-        consumption_history.loc[history_len + i] = [
-            __formatted_date(date),
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-        ]
-    consumption_history.replace({nan: None}, inplace=True)
-    consumption_history.sort_values(by="date", inplace=True)
+    consumption_history.add_pending_dates([__formatted_date(date) for date in pending_bills_dates])
 
 
 def fill_with_pending_dates(
     recommendation: RecommendationResult,
-    consumption_history: DataFrame,
+    consumption_history: ConsumptionHistory,
     pending_bills_dates: list[str],
 ) -> None:
     """Essa função deve ser executada DEPOIS de
     `RecommendationCalculator.calculate()` porque `RecommendationCalculator`
     não foi feito pra lidar com buracos em `consumption_history`.
 
-    NOTE: Pra entender a quantidade de itens em frame.loc[history_len+i] = [...]
-    e o que eles são você deve consultar os HEADERS do respectivo dataframe
-    em `calculator.py`."""
-
-    history_len = len(consumption_history)
-    for i, date in enumerate(pending_bills_dates):
-        consumption_history.loc[history_len + i] = [
-            __formatted_date(date),
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-        ]
-    consumption_history.replace({nan: None}, inplace=True)
-    consumption_history.sort_values(by="date", inplace=True)
-
-    peak_demand_in_kw = recommendation.frame.peak_demand_in_kw[0]
-    off_peak_demand_in_kw = recommendation.frame.off_peak_demand_in_kw[0]
-    for i, date in enumerate(pending_bills_dates):
-        recommendation.frame.loc[history_len + i] = [
-            __formatted_date(date),
-            peak_demand_in_kw,
-            off_peak_demand_in_kw,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-            None,
-        ]
-    recommendation.frame.replace({nan: None}, inplace=True)
-    recommendation.frame.sort_values(by="date", inplace=True)
-
-    for i, date in enumerate(pending_bills_dates):
-        recommendation.current_contract.loc[history_len + i] = [
-            __formatted_date(date),
-            None,
-            None,
-            None,
-            None,
-            None,
-        ]
-    recommendation.current_contract.replace({nan: None}, inplace=True)
-    recommendation.current_contract.sort_values(by="date", inplace=True)
+    Os meses pendentes são acrescentados ao histórico e os quadros da
+    recomendação são reindexados, de uma vez, pelos meses do histórico. Os
+    quadros são substituídos em `recommendation`, então quem guardou uma
+    referência a eles deve lê-los de novo."""
+
+    pending_dates = [__formatted_date(date) for date in pending_bills_dates]
+    consumption_history.add_pending_dates(pending_dates)
+
+    months = Index(consumption_history.date, name="date")
+    recommendation.frame = _reindex_by_months(
+        recommendation.frame,
+        months,
+        {
+            "peak_demand_in_kw": recommendation.frame.peak_demand_in_kw[0],
+            "off_peak_demand_in_kw": recommendation.frame.off_peak_demand_in_kw[0],
+        },
+    )
+    recommendation.current_contract = _reindex_by_months(recommendation.current_contract, months)
+
+
+def _reindex_by_months(frame: DataFrame, months: Index, fill_values: dict | None = None):
+    """Uma linha por mês de `months`. Os meses pendentes recebem
+    `fill_values` e `None` nas demais colunas, como esperado pela API"""
+    frame = frame.set_index("date")
+    filled = frame.reindex(months)
+    # Com `fill_value` a coluna mantém o tipo (demandas inteiras continuam inteiras)
+    for column, value in (fill_values or {}).items():
+        filled[column] = frame[column].reindex(months, fill_value=value)
+
+    filled = filled.reset_index()
+    for column in filled.columns[filled.isna().any()]:
+        filled[column] = filled[column].astype(object).where(filled[column].notna(), None)
+    return filled
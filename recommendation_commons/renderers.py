@@ -0,0 +1,114 @@
+"""Renderização JSON das respostas de recomendação.
+
+As respostas de recomendação carregam os gráficos e tabelas do histórico:
+listas de números que o `CamelCaseJSONRenderer` percorre item a item, à
+procura de chaves, antes de codificá-las com o `json` da biblioteca padrão.
+Aqui as chaves são convertidas para camelCase com cache, listas sem
+dicionários não são percorridas e a codificação é feita pelo `orjson`, que
+trata datas e escalares do NumPy nativamente. Os demais tipos (como
+`Decimal`) seguem o `JSONEncoder` do DRF.
+
+As views usam `RecommendationRenderersMixin`, que mantém a configuração de
+`REST_FRAMEWORK` (com ou sem camelCase) trocando apenas a implementação."""
+
+from functools import lru_cache
+
+import orjson
+
+from django.http import HttpResponse
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def dumps(data, indent: bool = False) -> bytes:
+    ret = orjson.dumps(data, default=_default, option=OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    # Como no `JSONRenderer` do DRF: separadores de linha não são válidos em JavaScript
+    return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+@lru_cache(maxsize=1024)
+def _camelize_str(key: str) -> str:
+    return camelize_re.sub(underscore_to_camel, key) if "_" in key else key
+
+
+def _camelize_key(key):
+    if isinstance(key, Promise):
+        key = force_str(key)
+    return _camelize_str(key) if isinstance(key, str) else key
+
+
+def camelize(data):
+    """Como o `camelize` do `djangorestframework_camel_case`, sem percorrer
+    listas que não contêm dicionários nem listas"""
+    if isinstance(data, dict):
+        return {_camelize_key(key): camelize(value) for key, value in data.items()}
+    if isinstance(data, list | tuple) and any(isinstance(item, dict | list | tuple) for item in data):
+        return [camelize(item) for item in data]
+    return data
+
+
+class RecommendationJSONRenderer(JSONRenderer):
+    """`JSONRenderer` do DRF com a codificação feita pelo `orjson`"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(self.prepare(data), indent=bool(indent))
+
+    def prepare(self, data):
+        return data
+
+
+class CamelCaseRecommendationJSONRenderer(RecommendationJSONRenderer, CamelCaseJSONRenderer):
+    """Mesma saída do `CamelCaseJSONRenderer`"""
+
+    def prepare(self, data):
+        return camelize(data)
+
+
+FAST_RENDERERS = {
+    JSONRenderer: RecommendationJSONRenderer,
+    CamelCaseJSONRenderer: CamelCaseRecommendationJSONRenderer,
+}
+
+
+class RecommendationRenderersMixin:
+    """Troca os renderers JSON configurados em `REST_FRAMEWORK` pelos
+    equivalentes acima; os demais (como o da API navegável) são mantidos"""
+
+    def get_renderers(self):
+        return [
+            FAST_RENDERERS[type(renderer)]() if type(renderer) in FAST_RENDERERS else renderer
+            for renderer in super().get_renderers()
+        ]
+
+
+def extend_object(content: bytes, data: dict) -> bytes:
+    """Acrescenta os campos de `data` ao objeto JSON já codificado em
+    `content`, sem decodificá-lo"""
+    if not data:
+        return content
+    return content[:-1] + b"," + dumps(data)[1:]
+
+
+class RecommendationJSONResponse(HttpResponse):
+    """Como o `JsonResponse` do Django, para dados com as chaves já em
+    camelCase ou já codificados (`bytes`)"""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=data if isinstance(data, bytes) else dumps(data), **kwargs)
@@ -1,11 +1,12 @@
 from datetime import datetime
+from math import isnan
 
 from django.conf import settings
-from numpy import nan
-from pandas import DataFrame
+from pandas import DataFrame, Series
 from rest_framework.response import Response
 
 from contracts.models import Contract
+from recommendation_commons.consumption_history import ConsumptionHistory
 from recommendation_commons.recommendation_result import RecommendationResult
 from tariffs.models import Tariff
 from tariffs.serializers import BlueTariffSerializer, GreenTariffSerializer
@@ -20,6 +21,12 @@ HEADERS_FOR_CONSUMPTION_HISTORY = [
 ]
 
 
+# Campos dos serializers de tarifa, na ordem da tabela de tarifas
+BLUE_TARIFF_FIELDS = BlueTariffSerializer.Meta.fields
+GREEN_TARIFF_FIELDS = GreenTariffSerializer.Meta.fields
+TARIFF_TABLE_LABELS = list(dict.fromkeys(BLUE_TARIFF_FIELDS + GREEN_TARIFF_FIELDS))
+
+
 def _get_tariff_billing_time(tariff_label: str):
     if "off_peak" in tariff_label:
         return "Fora ponta"
@@ -28,86 +35,99 @@ def _get_tariff_billing_time(tariff_label: str):
     return "NA"
 
 
-def _generate_tariffs_as_table(blue_tariff: Tariff, green_tariff: Tariff):
-    serialized_blue = BlueTariffSerializer(blue_tariff).data
-    serialized_green = GreenTariffSerializer(green_tariff).data
-    # ????? serialized_green['missing_field_in_green'] = None
+def _column(series: Series) -> list:
+    """Valores da coluna como lista, com `None` no lugar de `nan`"""
+    return [None if isinstance(value, float) and isnan(value) else value for value in series.tolist()]
+
 
-    tariff_labels = {*serialized_blue, *serialized_green}
+def _serialize_tariff(tariff: Tariff | None, fields: list[str]) -> dict:
+    # Mesmo resultado dos `FloatField` dos serializers de tarifa, sem
+    # instanciá-los a cada resposta
+    values = {}
+    for field in fields:
+        value = getattr(tariff, field) if tariff is not None else None
+        values[field] = None if value is None else float(value)
+    return values
 
-    tariffs_table: list[dict] = []
-    for label in tariff_labels:
-        row = {"label": label, "billingTime": _get_tariff_billing_time(label)}
-        row["blue"] = serialized_blue[label] if label in serialized_blue else None
-        row["green"] = serialized_green[label] if label in serialized_green else None
-        tariffs_table.append(row)
 
-    return tariffs_table
+def _generate_tariffs_as_table(blue_tariff: Tariff, green_tariff: Tariff):
+    serialized_blue = _serialize_tariff(blue_tariff, BLUE_TARIFF_FIELDS)
+    serialized_green = _serialize_tariff(green_tariff, GREEN_TARIFF_FIELDS)
+
+    return [
+        {
+            "label": label,
+            "billingTime": _get_tariff_billing_time(label),
+            "blue": serialized_blue.get(label),
+            "green": serialized_green.get(label),
+        }
+        for label in TARIFF_TABLE_LABELS
+    ]
 
 
 def _generate_plot_demand_and_consumption_costs_in_current_contract(current_contract_costs: DataFrame):
     if current_contract_costs.empty:
         return None, None
 
-    current_demand_and_consumption_costs: DataFrame = current_contract_costs[
-        ["consumption_cost_in_reais", "demand_cost_in_reais"]
-    ]
-
-    return current_demand_and_consumption_costs.to_dict(
-        "list"
-    ), current_contract_costs.consumption_cost_in_reais.sum() + current_contract_costs.demand_cost_in_reais.sum()
+    return {
+        "consumption_cost_in_reais": _column(current_contract_costs.consumption_cost_in_reais),
+        "demand_cost_in_reais": _column(current_contract_costs.demand_cost_in_reais),
+    }, current_contract_costs.consumption_cost_in_reais.sum() + current_contract_costs.demand_cost_in_reais.sum()
 
 
 def _generate_plot_costs_comparison(recommendation: RecommendationResult):
-    result = DataFrame()
-    result.insert(0, "total_cost_in_reais_in_current", recommendation.current_contract.cost_in_reais)
-    result.insert(0, "total_cost_in_reais_in_recommended", recommendation.frame.contract_cost_in_reais)
-    result.insert(0, "date", recommendation.frame.date)
-
-    result.replace({nan: None}, inplace=True)
-    result_dict = result.to_dict("list")
-    result_dict["total_total_cost_in_reais_in_current"] = recommendation.current_contract.cost_in_reais.sum()
-    result_dict["total_total_cost_in_reais_in_recommended"] = recommendation.frame.contract_cost_in_reais.sum()
-    return result_dict
+    return {
+        "date": _column(recommendation.frame.date),
+        "total_cost_in_reais_in_recommended": _column(recommendation.frame.contract_cost_in_reais),
+        "total_cost_in_reais_in_current": _column(recommendation.current_contract.cost_in_reais),
+        "total_total_cost_in_reais_in_current": recommendation.current_contract.cost_in_reais.sum(),
+        "total_total_cost_in_reais_in_recommended": recommendation.frame.contract_cost_in_reais.sum(),
+    }
 
 
 def _generate_plot_detailed_contracts_costs_comparison(recommendation: RecommendationResult):
-    result = DataFrame()
-    result.insert(0, "consumptionCostInReaisInRecommended", recommendation.frame.consumption_cost_in_reais)
-    result.insert(0, "demandCostInReaisInRecommended", recommendation.frame.demand_cost_in_reais)
-    result.insert(0, "totalCostInReaisInCurrent", recommendation.current_contract.cost_in_reais)
-    return result.to_dict("list")
+    return {
+        "totalCostInReaisInCurrent": _column(recommendation.current_contract.cost_in_reais),
+        "demandCostInReaisInRecommended": _column(recommendation.frame.demand_cost_in_reais),
+        "consumptionCostInReaisInRecommended": _column(recommendation.frame.consumption_cost_in_reais),
+    }
 
 
 def _generate_table_contracts_comparison(recommendation: RecommendationResult):
-    result = DataFrame()
-    result.insert(0, "absolute_difference", recommendation.frame.absolute_difference)
-    result.insert(0, "consumption_cost_in_reais_in_recommended", recommendation.frame.consumption_cost_in_reais)
-    result.insert(0, "demand_cost_in_reais_in_recommended", recommendation.frame.demand_cost_in_reais)
-    result.insert(0, "total_cost_in_reais_in_recommended", recommendation.frame.contract_cost_in_reais)
-    result.insert(0, "consumption_cost_in_reais_in_current", recommendation.current_contract.consumption_cost_in_reais)
-    result.insert(0, "demand_cost_in_reais_in_current", recommendation.current_contract.demand_cost_in_reais)
-    result.insert(0, "total_cost_in_reais_in_current", recommendation.current_contract.cost_in_reais)
-    result.insert(0, "date", recommendation.frame.date)
+    frame, current_contract = recommendation.frame, recommendation.current_contract
+    # Colunas da tabela, na ordem dos campos de cada linha
+    columns = {
+        "total_cost_in_reais_in_current": current_contract.cost_in_reais,
+        "demand_cost_in_reais_in_current": current_contract.demand_cost_in_reais,
+        "consumption_cost_in_reais_in_current": current_contract.consumption_cost_in_reais,
+        "total_cost_in_reais_in_recommended": frame.contract_cost_in_reais,
+        "demand_cost_in_reais_in_recommended": frame.demand_cost_in_reais,
+        "consumption_cost_in_reais_in_recommended": frame.consumption_cost_in_reais,
+        "absolute_difference": frame.absolute_difference,
+    }
 
     contracts_comparison_totals: dict[str, float] = {
-        "absolute_difference": result.absolute_difference.sum(),
-        "consumption_cost_in_reais_in_recommended": result.consumption_cost_in_reais_in_recommended.sum(),
-        "demand_cost_in_reais_in_recommended": result.demand_cost_in_reais_in_recommended.sum(),
-        "total_cost_in_reais_in_recommended": result.total_cost_in_reais_in_recommended.sum(),
-        "consumption_cost_in_reais_in_current": result.consumption_cost_in_reais_in_current.sum(),
-        "demand_cost_in_reais_in_current": result.demand_cost_in_reais_in_current.sum(),
-        "total_cost_in_reais_in_current": result.total_cost_in_reais_in_current.sum(),
+        name: columns[name].sum()
+        for name in [
+            "absolute_difference",
+            "consumption_cost_in_reais_in_recommended",
+            "demand_cost_in_reais_in_recommended",
+            "total_cost_in_reais_in_recommended",
+            "consumption_cost_in_reais_in_current",
+            "demand_cost_in_reais_in_current",
+            "total_cost_in_reais_in_current",
+        ]
     }
 
-    result.replace({nan: None}, inplace=True)
-    return (result.to_dict("records"), contracts_comparison_totals)
+    names = ["date", *columns]
+    rows = zip(_column(frame.date), *map(_column, columns.values()))
+    return [dict(zip(names, row)) for row in rows], contracts_comparison_totals
 
 
 def build_response(
     recommendation: RecommendationResult,
     current_contract: DataFrame,
-    consumption_history: DataFrame,
+    consumption_history: ConsumptionHistory,
     contract: Contract,
     consumer_unit: ConsumerUnit,
     blue: Tariff,
@@ -116,7 +136,10 @@ def build_response(
     warnings: list[str],
     energy_bills_count: int,
 ):
-    """Reponsável por APENAS construir o objeto `Response` de endpoint"""
+    """Reponsável por APENAS construir o objeto `Response` de endpoint.
+
+    As seções de gráficos e tabelas são montadas direto das colunas dos
+    quadros da recomendação, sem quadros intermediários."""
     dates = consumption_history.date
     current_contract_costs, current_total_cost = _generate_plot_demand_and_consumption_costs_in_current_contract(
         current_contract
@@ -141,9 +164,9 @@ def build_response(
                     "off_peak_demand_in_kw": contract.off_peak_contracted_demand_in_kw,
                 },
                 "should_renew_contract": False,
-                "consumption_history_plot": consumption_history[
+                "consumption_history_plot": consumption_history.to_dict(
                     HEADERS_FOR_CONSUMPTION_HISTORY + ["contract_peak_demand_in_kw", "contract_off_peak_demand_in_kw"]
-                ].to_dict("list"),
+                ),
                 "current_contract_costs_plot": current_contract_costs,
                 "current_total_cost": current_total_cost,
             }
@@ -175,10 +198,10 @@ def build_response(
                 "peak_demand_in_kw": contract.peak_contracted_demand_in_kw,
                 "off_peak_demand_in_kw": contract.off_peak_contracted_demand_in_kw,
             },
-            "consumption_history_table": consumption_history[HEADERS_FOR_CONSUMPTION_HISTORY].to_dict("records"),
-            "consumption_history_plot": consumption_history[
+            "consumption_history_table": consumption_history.to_dict(HEADERS_FOR_CONSUMPTION_HISTORY, "records"),
+            "consumption_history_plot": consumption_history.to_dict(
                 HEADERS_FOR_CONSUMPTION_HISTORY + ["contract_peak_demand_in_kw", "contract_off_peak_demand_in_kw"]
-            ].to_dict("list"),
+            ),
             "detailed_contracts_costs_comparison_plot": detailed_contracts_costs_comparison,
             "current_contract_costs_plot": current_contract_costs,
             "tariff_dates": {
@@ -1,7 +1,15 @@
 from rest_framework import serializers
 from rest_framework.serializers import Serializer
 
+from universities.models import University
+
 
 class RecommendationSettingsSerializerForDocs(Serializer):
     MINIMUM_ENERGY_BILLS_FOR_RECOMMENDATION = serializers.IntegerField()
     IDEAL_ENERGY_BILLS_FOR_RECOMMENDATION = serializers.IntegerField()
+
+
+class RecommendationBatchBodySerializer(Serializer):
+    university_id = serializers.PrimaryKeyRelatedField(
+        queryset=University.objects.all(), required=False, allow_null=True, default=None
+    )
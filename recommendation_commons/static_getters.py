@@ -1,85 +1,91 @@
 import decimal
 
+from datetime import date
+
 from pandas import DataFrame
 
-from contracts.models import Contract
+from contracts.models import Contract, EnergyBill
+from recommendation_commons.consumption_history import BILL_FIELDS, ConsumptionHistory
 from recommendation_commons.headers import (
-    CONSUMPTION_HISTORY_HEADERS,
     CURRENT_CONTRACT_HEADERS,
     RECOMMENDATION_FRAME_HEADERS,
 )
 from recommendation_commons.recommendation_result import RecommendationResult
+from tariffs import cache as tariff_cache
 from tariffs.models import Tariff
 from universities.models import ConsumerUnit
+from universities.recommendation import Recommendation as RecommendationBills
+from utils.energy_bill_util import EnergyBillUtils
 
 
 class StaticGetters:
     @staticmethod
     def get_tariffs(subgroup: str, distributor_id: int):
-        tariffs = Tariff.objects.filter(subgroup=subgroup, distributor_id=distributor_id)
-        blue_tariff = tariffs.filter(flag=Tariff.BLUE).first()
-        green_tariff = tariffs.filter(flag=Tariff.GREEN).first()
-        return (blue_tariff, green_tariff)
+        return tariff_cache.get_tariffs(distributor_id, subgroup)
+
+    @classmethod
+    def get_consumption_history(cls, consumer_unit: ConsumerUnit, contract: Contract):
+        """Carrega as faturas da janela de recomendação com uma consulta
+        `values_list` e monta o histórico de consumo"""
+        window_start, window_end = RecommendationBills.get_energy_bills_window()
+        bills = (
+            EnergyBill.objects.filter(consumer_unit=consumer_unit.id, date__gte=window_start, date__lt=window_end)
+            .order_by("date", "id")
+            .values_list(*BILL_FIELDS)
+        )
+
+        bills_by_month = {}
+        for bill in bills:
+            bills_by_month.setdefault((bill[0].year, bill[0].month), bill)
+
+        return cls.build_consumption_history(bills_by_month, consumer_unit.oldest_contract.start_date, contract)
 
     @staticmethod
-    def get_consumption_history(consumer_unit: ConsumerUnit, contract: Contract):
-        bills = consumer_unit.get_energy_bills_for_recommendation()
-        pending_bills = consumer_unit.get_energy_bills_pending()
-        bills_list: list[dict] = []
+    def build_consumption_history(bills_by_month: dict, oldest_contract_start_date: date, contract: Contract):
+        """Monta o histórico de consumo a partir das faturas já carregadas,
+        tuplas com os `BILL_FIELDS` indexadas por `(ano, mês)`.
+
+        Retorna `(histórico, datas pendentes, quantidade de faturas atípicas)`.
+        Os meses sem fatura a partir do início do contrato mais antigo e os
+        meses com fatura atípica ficam nas datas pendentes."""
+        date_for_recommendation = RecommendationBills.get_date_for_recommendation(bills_by_month)
+        months = [
+            (month["year"], month["month"])
+            for month in EnergyBillUtils.generate_dates_for_recommendation(date_for_recommendation)
+        ]
+
+        pending_months = [
+            month
+            for month in months
+            if month not in bills_by_month and date(month[0], month[1], 1) >= oldest_contract_start_date
+        ]
+
+        bills = []
         atypical_bills_count = 0
-        for bill in bills:
-            if bill["energy_bill"] is None:
+        for month in months:
+            bill = bills_by_month.get(month)
+            if bill is None:
                 continue
 
-            if bool(bill["energy_bill"]["is_atypical"]):
+            if bool(bill[1]):
                 atypical_bills_count += 1
-                bill["energy_bill"] = None
-                pending_bills.append(bill)
+                pending_months.append(month)
                 continue
 
-            b = bill["energy_bill"]
-            bills_list.append(
-                {
-                    "date": b["date"],
-                    "peak_consumption_in_kwh": float(b["peak_consumption_in_kwh"]),
-                    "off_peak_consumption_in_kwh": float(b["off_peak_consumption_in_kwh"]),
-                    "peak_measured_demand_in_kw": float(
-                        b["peak_measured_demand_in_kw"]
-                        if b["peak_measured_demand_in_kw"] is not None
-                        else float(b["off_peak_measured_demand_in_kw"])
-                    ),
-                    "off_peak_measured_demand_in_kw": float(b["off_peak_measured_demand_in_kw"]),
-                    "contract_peak_demand_in_kw": float(contract.peak_contracted_demand_in_kw),
-                    "contract_off_peak_demand_in_kw": float(contract.off_peak_contracted_demand_in_kw),
-                    "peak_exceeded_in_kw": 0.0,
-                    "off_peak_exceeded_in_kw": 0.0,
-                }
-            )
-
-        bills_list.reverse()
-        consumption_history = DataFrame(bills_list, columns=CONSUMPTION_HISTORY_HEADERS)
-
-        if (consumption_history.peak_measured_demand_in_kw == 0).all():
-            consumption_history.peak_measured_demand_in_kw = consumption_history.off_peak_measured_demand_in_kw
+            bills.append(bill)
 
-        base_to_exceed_peak = (
-            consumption_history.contract_peak_demand_in_kw
-            if contract.tariff_flag == Tariff.BLUE
-            else consumption_history.contract_off_peak_demand_in_kw
+        bills.reverse()
+        consumption_history = ConsumptionHistory.from_bills(
+            bills,
+            (contract.peak_contracted_demand_in_kw, contract.off_peak_contracted_demand_in_kw),
+            is_blue=contract.tariff_flag == Tariff.BLUE,
         )
 
-        consumption_history.peak_exceeded_in_kw = (
-            consumption_history.peak_measured_demand_in_kw - base_to_exceed_peak
-        ).clip(0.0)
-        consumption_history.off_peak_exceeded_in_kw = (
-            consumption_history.off_peak_measured_demand_in_kw - consumption_history.contract_off_peak_demand_in_kw
-        ).clip(0.0)
-
-        pending_bills_dates = [f"{b['year']}-{b['month']}-01" for b in pending_bills]
+        pending_bills_dates = [f"{year}-{month}-01" for year, month in pending_months]
         return (consumption_history, pending_bills_dates, atypical_bills_count)
 
     @staticmethod
-    def get_comsuption_cost(history: DataFrame, tariff: Tariff):
+    def get_comsuption_cost(history: ConsumptionHistory, tariff: Tariff):
         return (
             history.peak_consumption_in_kwh
             * float(tariff.peak_tusd_in_reais_per_mwh + tariff.peak_te_in_reais_per_mwh)
@@ -94,7 +100,7 @@ class StaticGetters:
         return (measured_demand - contracted_demand).clip(0)
 
     @classmethod
-    def get_demand_cost(cls, tariff: Tariff, history: DataFrame, demand_values):
+    def get_demand_cost(cls, tariff: Tariff, history: ConsumptionHistory, demand_values):
         if tariff.is_green():
             tariff = tariff.as_green_tariff()
             demand = demand_values[1]
@@ -120,7 +126,7 @@ class StaticGetters:
 
     ## REFACTOR: tanto current quanto recommended possuem algumas colunas em comun, dá pra reutilizar melhor o código
     @classmethod
-    def calculate_current_contract(cls, history: DataFrame, tariff: Tariff):
+    def calculate_current_contract(cls, history: ConsumptionHistory, tariff: Tariff):
         current_contract = DataFrame(columns=CURRENT_CONTRACT_HEADERS)
         current_contract.date = history.date
         current_contract.consumption_cost_in_reais = cls.get_comsuption_cost(history, tariff)
@@ -130,7 +136,7 @@ class StaticGetters:
         return cls.atualize_frames_percentages(current_contract)
 
     @classmethod
-    def get_recommendation_frame(cls, history: DataFrame, values: tuple, tariff: Tariff):
+    def get_recommendation_frame(cls, history: ConsumptionHistory, values: tuple, tariff: Tariff):
         recommendation_frame = DataFrame(columns=RECOMMENDATION_FRAME_HEADERS)
         recommendation_frame.date = history.date
         recommendation_frame.peak_demand_in_kw = values[0]
@@ -2,7 +2,7 @@ from django.conf import settings
 from rest_framework.routers import DefaultRouter
 
 from global_search_recommendation.views import GlobalSearchRecommendationViewSet
-from recommendation.views import RecommendationViewSet
+from recommendation.views import RecommendationBatchViewSet, RecommendationViewSet
 from recommendation_commons.recommendation_settings import RecommendationSettings
 
 router = DefaultRouter()
@@ -13,6 +13,7 @@ router.register(
     basename="recommendation",
 )
 router.register(r"recommendation-settings", RecommendationSettings, basename="recommendation-settings")
+router.register(r"recommendation-batch", RecommendationBatchViewSet, basename="recommendation-batch")
 
 if settings.ENVIRONMENT != "production":
     router.register(
@@ -27,8 +27,25 @@ echo "${B}______________________________________________________________________
 echo "${G}====> COLLECT STATIC FILES (collectstatic) ${E}"
 python manage.py collectstatic --no-input
 
+num_cpus=$(grep -c ^processor /proc/cpuinfo)
+
+echo "${B}_________________________________________________________________________________________________________${E}"
+echo "${G}====> STARTING JOB WORKERS (run_jobs_worker) ${E}"
+num_job_workers=${JOB_WORKERS:-$num_cpus}
+# Cada worker roda em um laço que o reinicia caso ele termine; os workers são
+# encerrados junto com o gunicorn
+for i in $(seq 1 $num_job_workers); do
+    (
+        while true; do
+            python manage.py run_jobs_worker >> logs/jobs_worker_$i.log 2>&1
+            echo "Worker $i encerrado (código $?), reiniciando" >> logs/jobs_worker_$i.log
+            sleep 5
+        done
+    ) &
+done
+trap 'kill 0' EXIT
+
 echo "${B}_________________________________________________________________________________________________________${E}"
 echo "${G}====> RUNNING SERVER (gunicorn) ${E}"
-num_cpus=$(grep -c ^processor /proc/cpuinfo)
 num_workers=$((2 * num_cpus + 1))
 gunicorn mec_energia.wsgi:application  --workers $num_workers --bind ${API_HOST}:${API_PORT}
@@ -0,0 +1,80 @@
+"""Cache das tarifas por `(distribuidora, subgrupo)`.
+
+As tarifas mudam poucas vezes por ano, mas são consultadas em toda
+recomendação e na listagem de distribuidoras. Cada par (azul, verde) fica em
+um dicionário do processo e no cache compartilhado (Redis), já com os
+`BlueTariff`/`GreenTariff` usados pelos calculadores materializados.
+
+As entradas são versionadas por uma chave global no cache compartilhado:
+`invalidate_tariffs` troca a versão, o que descarta de uma vez as entradas de
+todos os processos."""
+
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from tariffs.models import Tariff
+
+VERSION_KEY = "tariffs.version"
+CACHE_TIMEOUT = 3600 * 24 * 7
+
+_local_tariffs: dict[tuple, tuple[Tariff | None, Tariff | None]] = {}
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load_tariffs(distributor_id: int, subgroup: str) -> "tuple[Tariff | None, Tariff | None]":
+    blue_tariff, green_tariff = None, None
+
+    for tariff in Tariff.objects.filter(distributor_id=distributor_id, subgroup=subgroup).order_by("id"):
+        if tariff.is_blue() and blue_tariff is None:
+            tariff.materialize_data_tariff()
+            blue_tariff = tariff
+        elif tariff.is_green() and green_tariff is None:
+            tariff.materialize_data_tariff()
+            green_tariff = tariff
+
+    return blue_tariff, green_tariff
+
+
+def get_tariffs(distributor_id: int, subgroup: str) -> "tuple[Tariff | None, Tariff | None]":
+    """Retorna `(azul, verde)` da distribuidora e subgrupo. As instâncias são
+    compartilhadas entre requisições e não devem ser alteradas."""
+    version = get_version()
+    local_key = (version, distributor_id, subgroup)
+
+    tariffs = _local_tariffs.get(local_key)
+    if tariffs is not None:
+        return tariffs
+
+    shared_key = f"tariffs.{version}.{distributor_id}.{subgroup}"
+    tariffs = cache.get(shared_key)
+    if tariffs is None:
+        tariffs = _load_tariffs(distributor_id, subgroup)
+        cache.set(shared_key, tariffs, timeout=CACHE_TIMEOUT)
+
+    # Entradas de versões anteriores não serão mais usadas
+    if any(key[0] != version for key in _local_tariffs):
+        _local_tariffs.clear()
+
+    _local_tariffs[local_key] = tariffs
+    return tariffs
+
+
+def _bump_version():
+    cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+    _local_tariffs.clear()
+
+
+def invalidate_tariffs():
+    # Invalida também após o commit: outro processo pode ter recarregado as
+    # tarifas antigas enquanto a transação ainda estava aberta
+    _bump_version()
+    transaction.on_commit(_bump_version)
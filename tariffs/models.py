@@ -1,7 +1,6 @@
 from dataclasses import dataclass
 from datetime import date
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -122,29 +121,19 @@ class Distributor(models.Model):
         return subgroup_list
 
     def check_subgroups_pending(self, subgroup):
-        is_pending = False
-        tariffs = Tariff.objects.filter(distributor=self, flag=Tariff.BLUE, subgroup=subgroup)
+        from tariffs.cache import get_tariffs
 
-        for tariff in tariffs:
-            if tariff.pending is True:
-                is_pending = True
-                break
-
-        if not tariffs:
-            is_pending = True
-
-        return is_pending
+        blue_tariff, _ = get_tariffs(self.id, subgroup)
+        return blue_tariff is None or blue_tariff.pending
 
     def get_tariffs_by_subgroups(self, request_subgroup):
-        try:
-            blue = Tariff.objects.get(distributor=self.id, subgroup=request_subgroup, flag=Tariff.BLUE)
-            green = Tariff.objects.get(distributor=self.id, subgroup=request_subgroup, flag=Tariff.GREEN)
+        from tariffs.cache import get_tariffs
 
-            return blue, green
-        except ObjectDoesNotExist:
+        blue, green = get_tariffs(self.id, request_subgroup)
+        if blue is None or green is None:
             return None, None
-        except Exception as error:
-            raise Exception({"error": str(error)}) from error
+
+        return blue, green
 
 
 class DataTariff:
@@ -242,9 +231,16 @@ class Tariff(models.Model):
     def is_green(self) -> bool:
         return self.flag == Tariff.GREEN
 
+    def materialize_data_tariff(self):
+        """Guarda na instância o `BlueTariff`/`GreenTariff` correspondente,
+        usado pelas instâncias mantidas em `tariffs.cache`"""
+        self._data_tariff = self.as_blue_tariff() if self.is_blue() else self.as_green_tariff()
+
     def as_blue_tariff(self) -> BlueTariff:
         if not self.is_blue():
             raise Exception("Tariff is green type. Cannot convert to blue")
+        if "_data_tariff" in self.__dict__:
+            return self._data_tariff
         return BlueTariff(
             peak_tusd_in_reais_per_kw=float(self.peak_tusd_in_reais_per_kw),
             peak_tusd_in_reais_per_mwh=float(self.peak_tusd_in_reais_per_mwh),
@@ -258,6 +254,8 @@ class Tariff(models.Model):
     def as_green_tariff(self) -> GreenTariff:
         if self.is_blue():
             raise Exception("Tariff is blue type. Cannot convert to green")
+        if "_data_tariff" in self.__dict__:
+            return self._data_tariff
         return GreenTariff(
             peak_tusd_in_reais_per_mwh=float(self.peak_tusd_in_reais_per_mwh),
             peak_te_in_reais_per_mwh=float(self.peak_te_in_reais_per_mwh),
@@ -1,25 +1,23 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from contracts.models import Contract
-from recommendation.models import Recommendation
+from recommendation.invalidation import invalidate_recommendations
+from tariffs.cache import invalidate_tariffs
 from tariffs.models import Tariff
 
 
+def invalidate_recommendations_for_tariffs(distributor_id: int, subgroup: str):
+    contracts = Contract.objects.filter(distributor_id=distributor_id, subgroup=subgroup)
+    invalidate_recommendations(contracts.values("consumer_unit"))
+
+
 @receiver(post_save, sender=Tariff)
-def trigger_tariffs(sender, instance, created, **kwargs):
-    distributor = instance.distributor
-    subgroup = instance.subgroup
-    contracts = Contract.objects.filter(distributor=distributor, subgroup=subgroup)
+@receiver(post_delete, sender=Tariff)
+def invalidate_tariffs_cache(sender, instance, **kwargs):
+    invalidate_tariffs()
 
-    impacted_consumer_units = contracts.values_list("consumer_unit", flat=True)
 
-    for unit in impacted_consumer_units:
-        try:
-            recommendation_instance = Recommendation.objects.get(consumer_unit=unit)
-            recommendation_instance.isValid = False
-            recommendation_instance.save()
-            # print(f"Recomendação inválida para o consumidor: {unit}", flush=True)
-        except Recommendation.DoesNotExist:
-            # print(f"Nenhuma recomendação encontrada para o consumidor: {unit}", flush=True)
-            pass
+@receiver(post_save, sender=Tariff)
+def trigger_tariffs(sender, instance, created, **kwargs):
+    invalidate_recommendations_for_tariffs(instance.distributor_id, instance.subgroup)
@@ -13,12 +13,14 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ViewSet
 
+from recommendation.invalidation import batched_invalidation
 from universities.models import ConsumerUnit
 from users.requests_permissions import RequestsPermissions
 from utils.endpoints_util import EndpointsUtils
 from utils.mixins.cache_mixin import CacheModelMixin
 from utils.tariff_util import response_tariffs_of_distributor
 
+from .cache import get_tariffs, invalidate_tariffs
 from .models import Distributor, Tariff
 from .serializers import (
     BlueAndGreenTariffsSerializer,
@@ -29,6 +31,7 @@ from .serializers import (
     GetTariffsOfDistributorParamsSerializer,
     TariffSerializer,
 )
+from .signals import invalidate_recommendations_for_tariffs
 
 
 class DistributorViewSet(CacheModelMixin, ModelViewSet):
@@ -48,14 +51,14 @@ class DistributorViewSet(CacheModelMixin, ModelViewSet):
         except Exception as error:
             return Response({"detail": f"{error}"}, status.HTTP_401_UNAUTHORIZED)
 
-        units = ConsumerUnit.objects.filter(university=distributor.university)
+        units = ConsumerUnit.objects.filter(university=distributor.university).with_contracts()
 
         blocking_units_ids = []
         for unit in units:
             current_contract = unit.current_contract
 
             if current_contract is not None:
-                if current_contract.distributor.id == distributor.id:
+                if current_contract.distributor_id == distributor.id:
                     blocking_units_ids.append(unit.id)
 
         if len(blocking_units_ids) != 0:
@@ -213,6 +216,9 @@ class TariffViewSet(CacheModelMixin, ModelViewSet):
         except Exception as e:
             raise e
 
+        # bulk_create não dispara post_save
+        invalidate_tariffs()
+        invalidate_recommendations_for_tariffs(distributor.id, subgroup)
         self.delete_view_cache()
         return Response(ser.data, status=status.HTTP_201_CREATED)
 
@@ -257,31 +263,23 @@ class TariffViewSet(CacheModelMixin, ModelViewSet):
         start_date = data["start_date"]
         end_date = data["end_date"]
 
-        for tariff in tariffs.filter(flag=Tariff.BLUE):
-            for key, value in data["blue"].items():
-                setattr(tariff, key, value)
-            tariff.start_date = start_date
-            tariff.end_date = end_date
-            tariff.save()
-
-        for tariff in tariffs.filter(flag=Tariff.GREEN):
-            for key, value in data["green"].items():
-                setattr(tariff, key, value)
-            tariff.start_date = start_date
-            tariff.end_date = end_date
-            tariff.save()
-
-        blue_tariff = Tariff.objects.filter(
-            subgroup=data["subgroup"],
-            distributor=data["distributor"],
-            flag=Tariff.BLUE,
-        ).first()
-
-        green_tariff = Tariff.objects.filter(
-            subgroup=data["subgroup"],
-            distributor=data["distributor"],
-            flag=Tariff.GREEN,
-        ).first()
+        with batched_invalidation():
+            for tariff in tariffs.filter(flag=Tariff.BLUE):
+                for key, value in data["blue"].items():
+                    setattr(tariff, key, value)
+                tariff.start_date = start_date
+                tariff.end_date = end_date
+                tariff.save()
+
+            for tariff in tariffs.filter(flag=Tariff.GREEN):
+                for key, value in data["green"].items():
+                    setattr(tariff, key, value)
+                tariff.start_date = start_date
+                tariff.end_date = end_date
+                tariff.save()
+
+        invalidate_tariffs()
+        blue_tariff, green_tariff = get_tariffs(data["distributor"].id, data["subgroup"])
 
         ser = BlueAndGreenTariffsSerializer(
             {
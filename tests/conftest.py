@@ -6,3 +6,11 @@ from rest_framework.test import APIClient
 @pytest.fixture
 def client():
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def clear_tariffs_cache():
+    # O banco é revertido a cada teste, mas o cache de tarifas do processo não
+    from tariffs import cache
+
+    cache._local_tariffs.clear()
@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from dateutil.relativedelta import relativedelta
+from rest_framework import status
+
+from contracts.models import EnergyBill
+from tests.fixtures import admin_a, consumer_unit_a, contract_a, distributor_a, energy_bill_a, university_a
+
+ENDPOINT = "/api/energy-bills/multiple_create/"
+MONTH_START = date.today().replace(day=1)
+
+
+def bill_data(months_ago, **kwargs):
+    return {
+        "date": (MONTH_START - relativedelta(months=months_ago)).strftime("%Y-%m-%d"),
+        "peak_consumption_in_kwh": 100.456,
+        "off_peak_consumption_in_kwh": 200,
+        "peak_measured_demand_in_kw": 50,
+        "off_peak_measured_demand_in_kw": 60,
+        **kwargs,
+    }
+
+
+@pytest.mark.django_db
+class TestEnergyBillMultipleCreate:
+    def test_creates_all_bills_with_constant_queries(
+        self, admin_a, client, consumer_unit_a, contract_a, django_assert_max_num_queries
+    ):
+        client.force_authenticate(user=admin_a)
+        payload = {
+            "consumer_unit": consumer_unit_a.id,
+            "contract": contract_a.id,
+            "energy_bills": [bill_data(months_ago) for months_ago in range(1, 31)],
+        }
+
+        with django_assert_max_num_queries(10):
+            response = client.post(ENDPOINT, payload, format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.json()["created"]) == 30
+        assert EnergyBill.objects.filter(consumer_unit=consumer_unit_a).count() == 30
+        assert EnergyBill.objects.filter(peak_consumption_in_kwh="100.46").count() == 30
+
+    def test_rejects_whole_batch_when_a_bill_is_invalid(
+        self, admin_a, client, consumer_unit_a, contract_a, energy_bill_a
+    ):
+        client.force_authenticate(user=admin_a)
+        payload = {
+            "consumer_unit": consumer_unit_a.id,
+            "contract": contract_a.id,
+            "energy_bills": [
+                bill_data(1),
+                bill_data(1),
+                {"date": energy_bill_a.date.strftime("%Y-%m-%d")},
+                {"date": "2022-12-01"},
+                {"date": "01/2024"},
+                bill_data(2, invoice_in_reais="abc"),
+            ],
+        }
+
+        response = client.post(ENDPOINT, payload, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [error["error"] for error in response.json()["errors"]] == [
+            "There is already an energy bill this month and year for this consumer unit",
+            "There is already an energy bill this month and year for this consumer unit",
+            "No contract covers the date of this energy bill",
+            "Invalid date format",
+            "Validation error",
+        ]
+        assert EnergyBill.objects.filter(consumer_unit=consumer_unit_a).count() == 1
+
+    def test_rejects_unknown_contract(self, admin_a, client, consumer_unit_a):
+        client.force_authenticate(user=admin_a)
+        payload = {"consumer_unit": consumer_unit_a.id, "contract": 0, "energy_bills": [bill_data(1)]}
+
+        response = client.post(ENDPOINT, payload, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
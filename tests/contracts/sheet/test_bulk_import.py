@@ -0,0 +1,164 @@
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+import openpyxl
+import pytest
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+
+from contracts.models import Contract, EnergyBill
+from mec_energia.error_response_manage import AlreadyHasEnergyBill
+from tariffs.models import Tariff
+from tests.fixtures import (
+    admin_a,
+    admin_b,
+    consumer_unit_a,
+    contract_a,
+    distributor_a,
+    energy_bill_a,
+    university_a,
+    university_b,
+)
+from universities.models import ConsumerUnit
+
+ENDPOINT = "/api/energy-bills/bulk-import/"
+JOBS_ENDPOINT = "/api/jobs/"
+HEADER = [
+    "Código da UC",
+    "Data",
+    "Consumo Ponta (kWh)",
+    "Consumo Fora Ponta (kWh)",
+    "Demanda Ponta (kW)",
+    "Demanda Fora Ponta (kW)",
+    "Valor (R$)",
+]
+
+
+def build_workbook(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Orientações"])
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+
+    content = BytesIO()
+    workbook.save(content)
+    return SimpleUploadedFile("faturas.xlsx", content.getvalue())
+
+
+def build_csv(rows):
+    lines = ["Orientações" + ";" * (len(HEADER) - 1), ";".join(HEADER)] + [
+        ";".join(str(value) for value in row) for row in rows
+    ]
+    return SimpleUploadedFile("faturas.csv", "\n".join(lines).encode("utf-8"))
+
+
+@pytest.fixture
+def consumer_unit_numeric_code(university_a, distributor_a):
+    consumer_unit = ConsumerUnit.objects.create(
+        name="Consumer Unit C", code="123456", is_active=True, university=university_a
+    )
+    for start_date in [date(2023, 1, 1), date(2024, 1, 1)]:
+        Contract.objects.create(
+            consumer_unit=consumer_unit,
+            distributor=distributor_a,
+            tariff_flag=Tariff.GREEN,
+            start_date=start_date,
+            subgroup="A4",
+            peak_contracted_demand_in_kw=100,
+            off_peak_contracted_demand_in_kw=100,
+        )
+    return consumer_unit
+
+
+@pytest.mark.django_db
+class TestEnergyBillBulkImport:
+    def test_imports_bills_of_all_consumer_units(
+        self,
+        admin_a,
+        client,
+        university_a,
+        consumer_unit_a,
+        contract_a,
+        consumer_unit_numeric_code,
+        django_assert_max_num_queries,
+    ):
+        client.force_authenticate(user=admin_a)
+        rows = [["CUA-001", f"{month:02d}/2023", 100, 200, 50, 60, "1234,56"] for month in range(1, 13)]
+        rows += [[123456, f"{month:02d}/2023", "", 200, "", 60, 999.999] for month in range(6, 13)]
+        rows += [[123456, "01/2024", "", 200, "", 60, 1000]]
+
+        with django_assert_max_num_queries(20):
+            response = client.post(
+                ENDPOINT, {"university_id": university_a.id, "file": build_workbook(rows)}, format="multipart"
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = client.get(f"{JOBS_ENDPOINT}{response.json()['job_id']}/").json()
+        assert job["status"] == "succeeded"
+        assert job["result"]["created"] is True
+        report = {unit["code"]: unit for unit in job["result"]["consumer_units"]}
+        assert report["CUA-001"]["created"] == 12
+        assert report["123456"]["created"] == 8
+
+        energy_bills = EnergyBill.objects.filter(consumer_unit=consumer_unit_numeric_code).order_by("date")
+        assert [bill.contract.start_date for bill in energy_bills] == [date(2023, 1, 1)] * 7 + [date(2024, 1, 1)]
+        assert energy_bills[0].invoice_in_reais == 1000
+        assert energy_bills[0].peak_consumption_in_kwh is None
+        assert EnergyBill.objects.get(consumer_unit=consumer_unit_a, date=date(2023, 3, 1)).invoice_in_reais == (
+            Decimal("1234.56")
+        )
+
+    def test_imports_csv_file(self, admin_a, client, university_a, consumer_unit_a, contract_a):
+        client.force_authenticate(user=admin_a)
+        rows = [["CUA-001", f"{month:02d}/2023", 100, 200, 50, 60, "1234,56"] for month in range(1, 4)]
+
+        response = client.post(
+            ENDPOINT, {"university_id": university_a.id, "file": build_csv(rows)}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = client.get(f"{JOBS_ENDPOINT}{response.json()['job_id']}/").json()
+        assert job["status"] == "succeeded"
+        assert job["result"]["created"] is True
+        assert EnergyBill.objects.get(consumer_unit=consumer_unit_a, date=date(2023, 2, 1)).invoice_in_reais == (
+            Decimal("1234.56")
+        )
+
+    def test_rejects_whole_import_when_a_row_is_invalid(
+        self, admin_a, client, university_a, consumer_unit_a, energy_bill_a
+    ):
+        client.force_authenticate(user=admin_a)
+        rows = [
+            ["CUA-001", "01/2023", 100, 200, 50, 60, 1000],
+            ["CUA-001", "02/2023", 100, 200, 50, 60, 1000],
+            ["CUX-999", "02/2023", 100, 200, 50, 60, 1000],
+        ]
+
+        response = client.post(
+            ENDPOINT, {"university_id": university_a.id, "file": build_workbook(rows)}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = client.get(f"{JOBS_ENDPOINT}{response.json()['job_id']}/").json()
+        assert job["result"]["created"] is False
+        report = {unit["code"]: unit for unit in job["result"]["consumer_units"]}
+        assert report["CUA-001"]["created"] == 0
+        assert report["CUA-001"]["rows"] == [
+            {"row": 1, "date": "2023-01-01", "errors": {"date": [list(AlreadyHasEnergyBill)]}}
+        ]
+        assert report["CUX-999"]["consumer_unit"] is None
+        assert report["CUX-999"]["errors"]
+        assert EnergyBill.objects.count() == 1
+
+    def test_user_of_another_university_cannot_import(self, admin_b, client, university_a):
+        client.force_authenticate(user=admin_b)
+
+        response = client.post(
+            ENDPOINT, {"university_id": university_a.id, "file": build_workbook([])}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,62 @@
+from datetime import date, datetime
+
+import pytest
+
+from contracts.services import ContractServices, UploadValidationContext
+from contracts.utils import ContractUtils, EnergyBillDateParser
+from mec_energia.error_response_manage import AlreadyHasEnergyBill, FormatDateError
+from tests.fixtures import consumer_unit_a, contract_a, distributor_a, energy_bill_a, university_a
+
+DATES = [
+    "abr/2024",
+    "ABR/2024",
+    "Abr/24",
+    "dez/99",
+    "04/2024",
+    "01/04/2024",
+    "2024-04-01",
+    "2024-04",
+    " 04/2024",
+    "4/2024",
+    "04-2024",
+    "13/2024",
+    "31/02/2024",
+    "abril/2024",
+    "xyz/2024",
+    "",
+]
+
+
+class TestEnergyBillDateParser:
+    @pytest.mark.parametrize("value", DATES)
+    def test_same_result_as_contract_utils(self, value):
+        assert EnergyBillDateParser().parse(value) == ContractUtils().validate_date(value)
+
+    def test_accepts_datetimes_and_mixed_formats(self):
+        parser = EnergyBillDateParser()
+
+        assert parser.parse(datetime(2024, 4, 1, 10, 30)) == date(2024, 4, 1)
+        assert [parser.parse(value) for value in ["04/2024", "2024-05", "04/2024", "jun/2024"]] == [
+            date(2024, 4, 1),
+            date(2024, 5, 1),
+            date(2024, 4, 1),
+            date(2024, 6, 1),
+        ]
+
+
+@pytest.mark.django_db
+class TestUploadValidationContext:
+    def test_rows_are_validated_without_queries(
+        self, consumer_unit_a, contract_a, energy_bill_a, django_assert_num_queries
+    ):
+        context = UploadValidationContext(consumer_unit_a.id)
+        services = ContractServices()
+        row = {"date": "01/2023", "invoice_in_reais": 10.0}
+
+        with django_assert_num_queries(0):
+            errors, parsed_date = services.validate_csv_row(dict(row), consumer_unit_a.id, context)
+            format_errors, _ = services.validate_csv_row(dict(row, date="2023.01"), consumer_unit_a.id, context)
+
+        assert parsed_date == date(2023, 1, 1)
+        assert errors["date"] == [AlreadyHasEnergyBill]
+        assert format_errors["date"] == [FormatDateError]
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from dateutil.relativedelta import relativedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+
+from contracts.validators import CsvFileValidator
+from mec_energia.error_response_manage import AlreadyHasEnergyBill, DuplicatedDateError
+from tests.fixtures import admin_a, consumer_unit_a, contract_a, distributor_a, energy_bill_a, university_a
+
+ENDPOINT = "/api/energy-bills/upload/"
+HEADER = "Data;Valor (R$);Consumo Ponta (kWh);Consumo Fora Ponta (kWh);Demanda Ponta (kW);Demanda Fora Ponta (kW)"
+
+
+def build_csv(months):
+    lines = ["Orientações;;;;;", HEADER]
+    lines += [f"{month.strftime('%m/%Y')};1234,56;100;200;50;60" for month in months]
+    return SimpleUploadedFile("faturas.csv", "\n".join(lines).encode("utf-8"))
+
+
+class TestCsvFileValidatorChunks:
+    def test_reads_rows_across_chunks(self):
+        months = [date(2023, 1, 1) + relativedelta(months=i) for i in range(10)]
+
+        rows = list(CsvFileValidator(chunk_size=4)(build_csv(months)))
+
+        assert [row["date"] for row in rows] == [month.strftime("%m/%Y") for month in months]
+        assert all(row["invoice_in_reais"] == 1234.56 for row in rows)
+        assert all(row["off_peak_measured_demand_in_kw"] == 60 for row in rows)
+
+
+@pytest.mark.django_db
+class TestUploadQueries:
+    def test_validates_all_rows_with_constant_queries(
+        self, admin_a, client, consumer_unit_a, contract_a, energy_bill_a, django_assert_max_num_queries
+    ):
+        client.force_authenticate(user=admin_a)
+        months = [contract_a.start_date + relativedelta(months=i) for i in range(30)]
+        months.append(months[-1])
+
+        with django_assert_max_num_queries(6):
+            response = client.post(ENDPOINT, {"consumer_unit_id": consumer_unit_a.id, "file": build_csv(months)})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert len(data) == 31
+        assert data[0]["date"]["errors"] == [list(AlreadyHasEnergyBill)]
+        assert all(not row["date"]["errors"] for row in data[1:30])
+        assert data[30]["date"]["errors"] == [list(DuplicatedDateError)]
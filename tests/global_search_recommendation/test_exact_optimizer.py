@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from global_search_recommendation.exact import minimize_demand_cost
+
+
+def brute_force_demand_cost(measured: np.ndarray, history_length: int, lb: float, ub: float):
+    grid = np.round(np.arange(lb, ub + 0.005, 0.01), 2)
+    costs = [history_length * d + 3 * np.clip(measured.ravel() - d, 0, None).sum() for d in grid]
+    best = int(np.argmin(costs))
+    return grid[best], costs[best]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_minimize_demand_cost_matches_brute_force(seed: int):
+    rng = np.random.default_rng(seed)
+    measured = np.round(rng.uniform(30, 200, 12), 2)
+    lb, ub = max(measured.min(), 30), measured.max()
+
+    demand, cost = minimize_demand_cost(measured, len(measured), lb, ub)
+    _, expected_cost = brute_force_demand_cost(measured, len(measured), lb, ub)
+
+    assert cost == pytest.approx(expected_cost)
+    assert demand in measured or demand in (lb, ub)
+
+
+def test_minimize_demand_cost_with_two_measured_columns():
+    measured = np.array([[50.0, 80.0], [60.0, 90.0], [55.0, 100.0]])
+    lb, ub = 30.0, 100.0
+
+    _, cost = minimize_demand_cost(measured, len(measured), lb, ub)
+    _, expected_cost = brute_force_demand_cost(measured, len(measured), lb, ub)
+
+    assert cost == pytest.approx(expected_cost)
+
+
+def test_minimize_demand_cost_respects_bounds():
+    measured = np.array([10.0, 12.0, 15.0])
+
+    demand, _ = minimize_demand_cost(measured, len(measured), 30.0, 31.0)
+
+    assert demand == 30.0
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from global_search_recommendation.domain import Domain
+
+
+@pytest.fixture
+def domain():
+    rng = np.random.default_rng(0)
+    domain = Domain(None)
+    domain.base_consumption_history = np.column_stack(
+        (
+            rng.uniform(1000, 9000, 12),
+            rng.uniform(9000, 60000, 12),
+            rng.uniform(20, 200, 12),
+            rng.uniform(50, 350, 12),
+            np.full(12, 100.0),
+            np.full(12, 200.0),
+        )
+    )
+    domain.blue = SimpleNamespace(peak_tusd_in_reais_per_kw=45.12, off_peak_tusd_in_reais_per_kw=15.7)
+    domain.green = SimpleNamespace(na_tusd_in_reais_per_kw=15.7)
+    domain.consumption_cost_on_blue = 1000.0
+    domain.consumption_cost_on_green = 2000.0
+    return domain
+
+
+def exceeded(measured, contracted):
+    return max(0.0, measured - contracted)
+
+
+def test_blue_population_objective_matches_per_bill_sum(domain: Domain):
+    population = np.random.default_rng(1).uniform(30, 350, (40, 2))
+
+    result = domain.blue_population_objective_func(population)
+
+    assert result.shape == (40,)
+    for costs, (peak, off_peak) in zip(result, population):
+        expected = domain.consumption_cost_on_blue
+        for bill in domain.base_consumption_history:
+            expected += 45.12 * (peak + 3 * exceeded(bill[2], peak))
+            expected += 15.7 * (off_peak + 3 * exceeded(bill[3], off_peak))
+        assert costs == pytest.approx(expected)
+
+
+def test_green_population_objective_matches_per_bill_sum(domain: Domain):
+    population = np.random.default_rng(2).uniform(30, 350, (40, 1))
+
+    result = domain.green_population_objective_func(population)
+
+    assert result.shape == (40,)
+    for costs, (demand,) in zip(result, population):
+        expected = domain.consumption_cost_on_green
+        for bill in domain.base_consumption_history:
+            expected += 15.7 * (demand + 3 * (exceeded(bill[2], demand) + exceeded(bill[3], demand)))
+        assert costs == pytest.approx(expected)
+
+
+def test_scalar_objectives_use_population_objectives(domain: Domain):
+    assert domain.blue_objective_func([80.0, 150.0]) == pytest.approx(
+        domain.blue_population_objective_func(np.array([[80.0, 150.0]]))[0]
+    )
+    assert domain.green_objective_func([80.0]) == pytest.approx(
+        domain.green_population_objective_func(np.array([[80.0]]))[0]
+    )
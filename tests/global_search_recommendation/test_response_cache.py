@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from contracts.models import Contract, EnergyBill
+from global_search_recommendation.cache import get_response, set_response
+from tariffs.cache import invalidate_tariffs
+from tests.fixtures import consumer_unit_a, contract_a, distributor_a, university_a
+from universities.models import ConsumerUnit
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+
+
+def cache_response(consumer_unit_id):
+    _, fingerprint = get_response(consumer_unit_id)
+    set_response(consumer_unit_id, Response({"recommendation": 1}), fingerprint)
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_repeated_lookup_is_served_from_cache(self, consumer_unit_a):
+        cache_response(consumer_unit_a.id)
+
+        response, _ = get_response(consumer_unit_a.id)
+        assert response.data == {"recommendation": 1}
+        assert response.status_code == 200
+
+    def test_saved_bill_removes_response(self, consumer_unit_a, contract_a):
+        cache_response(consumer_unit_a.id)
+
+        EnergyBill.objects.create(consumer_unit=consumer_unit_a, contract=contract_a, date=date(2023, 1, 1))
+
+        assert get_response(consumer_unit_a.id)[0] is None
+
+    def test_saved_contract_removes_response(self, consumer_unit_a, contract_a):
+        cache_response(consumer_unit_a.id)
+
+        contract_a.save()
+
+        assert get_response(consumer_unit_a.id)[0] is None
+
+    def test_tariff_change_changes_fingerprint(self, consumer_unit_a):
+        cache_response(consumer_unit_a.id)
+
+        invalidate_tariffs()
+
+        assert get_response(consumer_unit_a.id)[0] is None
+
+    def test_bulk_created_bill_changes_fingerprint(self, consumer_unit_a, contract_a):
+        cache_response(consumer_unit_a.id)
+
+        EnergyBill.objects.bulk_create(
+            [EnergyBill(consumer_unit=consumer_unit_a, contract=contract_a, date=date.today().replace(day=1))]
+        )
+
+        assert get_response(consumer_unit_a.id)[0] is None
+
+    def test_updated_contract_changes_fingerprint(self, consumer_unit_a, contract_a):
+        cache_response(consumer_unit_a.id)
+
+        Contract.objects.filter(id=contract_a.id).update(
+            peak_contracted_demand_in_kw=contract_a.peak_contracted_demand_in_kw + 1
+        )
+
+        assert get_response(consumer_unit_a.id)[0] is None
+
+    def test_deactivated_consumer_unit_changes_fingerprint(self, consumer_unit_a):
+        cache_response(consumer_unit_a.id)
+
+        ConsumerUnit.objects.filter(id=consumer_unit_a.id).update(is_active=False)
+
+        assert get_response(consumer_unit_a.id)[0] is None
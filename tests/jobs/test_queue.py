@@ -0,0 +1,204 @@
+import time
+
+from datetime import timedelta
+
+import pytest
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+from rest_framework import status
+
+from jobs.management.commands import run_jobs_worker
+from jobs.models import Job
+from jobs.queue import claim_job, enqueue, enqueue_debounced, requeue_stale_jobs, run_job, task
+from tests.fixtures import admin_a, admin_b, university_a, university_b
+
+calls = []
+
+
+@task("tests.add")
+def add(a, b):
+    calls.append((a, b))
+    return {"sum": a + b}
+
+
+@task("tests.fail", max_attempts=2)
+def fail():
+    calls.append("fail")
+    raise ValueError("falhou")
+
+
+@task("tests.slow")
+def slow():
+    time.sleep(0.3)
+    calls.append(Job.objects.get(name="tests.slow").heartbeat_at)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def queued(settings):
+    settings.JOBS_ALWAYS_EAGER = False
+    settings.JOBS_RETRY_DELAY = 10
+
+
+@pytest.mark.django_db
+class TestEagerJobs:
+    def test_runs_when_enqueued(self):
+        job = enqueue("tests.add", {"a": 1, "b": 2})
+
+        job.refresh_from_db()
+        assert job.status == Job.SUCCEEDED
+        assert job.result == {"sum": 3}
+        assert job.attempts == 1
+
+    def test_retries_until_max_attempts(self):
+        job = enqueue("tests.fail")
+
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert job.attempts == 2
+        assert job.error == "falhou"
+        assert calls == ["fail", "fail"]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("queued")
+class TestQueuedJobs:
+    # O worker descarta as conexões antigas a cada tarefa, o que não pode
+    # acontecer dentro da transação de cada teste
+    @pytest.mark.django_db(transaction=True)
+    def test_workers_run_pending_jobs(self):
+        job = enqueue("tests.add", {"a": 2, "b": 3})
+        assert job.status == Job.PENDING
+        assert calls == []
+
+        call_command("run_jobs_worker", "--burst")
+
+        job.refresh_from_db()
+        assert job.status == Job.SUCCEEDED
+        assert job.result == {"sum": 5}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_worker_survives_database_errors(self, monkeypatch):
+        job = enqueue("tests.add", {"a": 2, "b": 3})
+        errors = [OperationalError("conexão perdida")]
+
+        def claim_job_once_failing():
+            if errors:
+                raise errors.pop()
+            return claim_job()
+
+        monkeypatch.setattr(run_jobs_worker, "claim_job", claim_job_once_failing)
+        call_command("run_jobs_worker", "--burst", "--poll-interval", "0")
+
+        job.refresh_from_db()
+        assert job.status == Job.SUCCEEDED
+
+    def test_failed_job_is_retried_later(self):
+        job = enqueue("tests.fail")
+
+        run_job(claim_job())
+        job.refresh_from_db()
+        assert job.status == Job.PENDING
+        assert job.run_after > timezone.now() + timedelta(seconds=5)
+        assert claim_job() is None
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        run_job(claim_job())
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert job.attempts == 2
+
+    def test_same_key_returns_unfinished_job(self):
+        job = enqueue("tests.add", {"a": 1, "b": 1}, key="soma")
+
+        assert enqueue("tests.add", {"a": 1, "b": 1}, key="soma") == job
+
+        run_job(claim_job())
+        assert enqueue("tests.add", {"a": 1, "b": 1}, key="soma") != job
+
+    def test_stale_running_jobs_are_requeued(self, settings):
+        job = enqueue("tests.add", {"a": 1, "b": 1})
+        claim_job()
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT + 1)
+        )
+
+        assert requeue_stale_jobs() == 1
+        job.refresh_from_db()
+        assert job.status == Job.PENDING
+
+    def test_long_running_jobs_with_heartbeat_are_not_requeued(self, settings):
+        job = enqueue("tests.add", {"a": 1, "b": 1})
+        claim_job()
+        Job.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT * 2), heartbeat_at=timezone.now()
+        )
+
+        assert requeue_stale_jobs() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_heartbeat_is_renewed_while_running(self, settings):
+        settings.JOBS_TIMEOUT = 0.5
+        job = enqueue("tests.slow")
+        claim_job()
+        Job.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        run_job(job)
+
+        assert calls[0] > timezone.now() - timedelta(seconds=1)
+
+
+@pytest.mark.django_db
+class TestJobEndpoint:
+    def test_only_creator_can_see_job(self, client, admin_a, admin_b):
+        job = enqueue("tests.add", {"a": 1, "b": 2}, user=admin_a)
+
+        client.force_authenticate(admin_b)
+        assert client.get(f"/api/jobs/{job.id}/").status_code == status.HTTP_403_FORBIDDEN
+
+        client.force_authenticate(admin_a)
+        response = client.get(f"/api/jobs/{job.id}/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["result"] == {"sum": 3}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("queued")
+class TestDebouncedJobs:
+    def test_events_are_coalesced_into_one_job(self):
+        enqueue_debounced("tests.add", {"soma.1": {"a": 1, "b": 1}}, delay=60)
+        job = Job.objects.get(key="soma.1")
+        assert job.run_after > timezone.now() + timedelta(seconds=50)
+        assert claim_job() is None
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now() + timedelta(seconds=10))
+        enqueue_debounced("tests.add", {"soma.1": {"a": 1, "b": 1}, "soma.2": {"a": 2, "b": 2}}, delay=60)
+
+        assert Job.objects.filter(key="soma.1").count() == 1
+        assert Job.objects.filter(key="soma.2").count() == 1
+        job.refresh_from_db()
+        assert job.run_after > timezone.now() + timedelta(seconds=50)
+
+    def test_postponement_is_limited_by_max_delay(self):
+        enqueue_debounced("tests.add", {"soma": {"a": 1, "b": 1}}, delay=60, max_delay=600)
+        job = Job.objects.get(key="soma")
+        Job.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(seconds=590))
+
+        enqueue_debounced("tests.add", {"soma": {"a": 1, "b": 1}}, delay=60, max_delay=600)
+
+        job.refresh_from_db()
+        assert job.run_after < timezone.now() + timedelta(seconds=15)
+
+    def test_enqueue_with_same_key_runs_debounced_job_now(self):
+        enqueue_debounced("tests.add", {"soma": {"a": 1, "b": 1}}, delay=60)
+        job = enqueue("tests.add", {"a": 1, "b": 1}, key="soma")
+
+        assert claim_job() == job
+        enqueue_debounced("tests.add", {"soma": {"a": 1, "b": 1}}, delay=60)
+        assert Job.objects.filter(key="soma", status=Job.PENDING).count() == 1
@@ -14,6 +14,7 @@ from recommendation.calculator import (
     RecommendationCalculator,
 )
 from recommendation.green import GreenPercentileCalculator, GreenTariff
+from recommendation_commons.consumption_history import COLUMNS, ConsumptionHistory
 
 B_PERCENTILES = BluePercentileCalculator.PERCENTILES
 B_PERCENTILE_HEADERS = BluePercentileCalculator.PERCENTILE_HEADERS
@@ -28,7 +29,7 @@ SEP = "\t"
 
 class CsvData:
     current_tariff_flag: str
-    consumption_history: DataFrame
+    consumption_history: ConsumptionHistory
     blue_tariff: BlueTariff
     green_tariff: GreenTariff
     expected_recommended_tariff_flag: str
@@ -79,13 +80,12 @@ class CsvReader:
         f.close()
         return {"blue": {**total_in_reais["blue"]}, "green": {**total_in_reais["green"]}}
 
-    def _read_consumption_history(self, headers: list[str]) -> DataFrame:
+    def _read_consumption_history(self, headers: list[str]) -> ConsumptionHistory:
         # FIXME: corrigir essa gambiarra com a coluna date
         _headers = headers.copy()
         _headers.remove("date")
         history = pd.read_csv(join(self.path, "consumption.csv"), sep=SEP, names=_headers)
-        history.insert(0, "date", [date.today()] * len(history))
-        return history
+        return ConsumptionHistory([date.today()] * len(history), history[COLUMNS].to_numpy(dtype=float))
 
     def _read_expected_percentiles(
         self, filename_template: str, percentiles: list[float], percentile_headers: list[str]
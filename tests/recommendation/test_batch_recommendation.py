@@ -0,0 +1,138 @@
+import json
+
+from datetime import date
+
+import pytest
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from rest_framework import status
+
+from contracts.models import EnergyBill
+from jobs.models import Job
+from recommendation.batch import BatchRecommendationEngine
+from recommendation.models import PAYLOAD_VERSION, Recommendation
+from recommendation.recommendation_utils import (
+    build_recommendation_fields,
+    process_recommendation,
+    save_recommendation,
+)
+from tests.fixtures import (
+    consumer_unit_a,
+    consumer_unit_b,
+    contract_a,
+    distributor_a,
+    sysadmin,
+    university_a,
+    university_b,
+    user_a,
+)
+from tests.test_utils import dicts_test_utils
+from tests.test_utils.create_objects_test_utils import create_test_blue_tariff, create_test_green_tariff
+
+ENDPOINT = "/api/recommendation-batch/"
+
+
+@pytest.fixture
+def energy_bills_a(consumer_unit_a, contract_a, distributor_a):
+    create_test_blue_tariff(dicts_test_utils.tariff_dict_1, distributor_a)
+    create_test_green_tariff(dicts_test_utils.tariff_dict_1, distributor_a)
+
+    first_month = date.today().replace(day=1) - relativedelta(months=12)
+    for month in range(12):
+        EnergyBill.objects.create(
+            consumer_unit=consumer_unit_a,
+            contract=contract_a,
+            date=first_month + relativedelta(months=month),
+            invoice_in_reais=10000 + 100 * month,
+            peak_consumption_in_kwh=5000 + 250 * month,
+            off_peak_consumption_in_kwh=40000 + 1000 * month,
+            peak_measured_demand_in_kw=60 + 5 * month,
+            off_peak_measured_demand_in_kw=90 + 3 * (month % 4),
+        )
+
+
+def stored_recommendation(consumer_unit_id: int) -> dict:
+    recommendation = Recommendation.objects.get(consumer_unit_id=consumer_unit_id)
+    fields, payload = recommendation.to_dict(), json.loads(bytes(recommendation.payload))
+    fields.pop("generatedOn")
+    payload.pop("generatedOn")
+    return {"fields": fields, "payload": payload, "payload_version": recommendation.payloadVersion}
+
+
+@pytest.mark.django_db
+def test_batch_calculation_matches_single_consumer_unit_flow(consumer_unit_a, energy_bills_a):
+    engine = BatchRecommendationEngine(consumer_unit_a.university_id)
+    units = engine._load_consumer_units()
+    contracts_by_unit = engine._load_contracts(units)
+    bills_by_unit = engine._load_energy_bills(units)
+    tariffs = engine._load_tariffs(contracts_by_unit)
+
+    fields = engine._calculate(units[0], contracts_by_unit[units[0].id], bills_by_unit[units[0].id], tariffs)
+    expected = build_recommendation_fields(*process_recommendation(consumer_unit_a.id))
+
+    assert "costsComparisonPlot" in fields
+    generated_on = fields.pop("generatedOn")
+    expected.pop("generatedOn")
+    assert fields == expected
+
+    recommendation = Recommendation(consumer_unit_id=consumer_unit_a.id, generatedOn=generated_on, **fields)
+    expected_recommendation = Recommendation(consumer_unit_id=consumer_unit_a.id, generatedOn=generated_on, **expected)
+    recommendation.render_payload()
+    expected_recommendation.render_payload()
+    assert recommendation.payload == expected_recommendation.payload
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Recomendações são gravadas apenas no PostgreSQL")
+@pytest.mark.django_db
+def test_batch_stores_same_recommendation_as_single_consumer_unit_flow(consumer_unit_a, energy_bills_a):
+    save_recommendation(consumer_unit_a, *process_recommendation(consumer_unit_a.id))
+    expected = stored_recommendation(consumer_unit_a.id)
+    Recommendation.objects.all().delete()
+
+    # A segunda execução atualiza a recomendação gravada pela primeira
+    for _ in range(2):
+        report = BatchRecommendationEngine(consumer_unit_a.university_id).run()
+        assert report == {"consumer_units": 1, "generated": 1, "failed": {}}
+        assert stored_recommendation(consumer_unit_a.id) == expected
+
+    assert expected["payload_version"] == PAYLOAD_VERSION
+    assert expected["payload"] == json.loads(json.dumps(expected["fields"]))
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_requires_super_user(client, user_a):
+    client.force_authenticate(user_a)
+    response = client.post(ENDPOINT, {}, format="json")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_skips_consumer_units_without_contract(client, sysadmin, consumer_unit_b):
+    client.force_authenticate(sysadmin)
+    response = client.post(ENDPOINT, {"university_id": consumer_unit_b.university_id}, format="json")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = client.get(f"/api/jobs/{response.json()['job_id']}/").json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"consumer_units": 1, "generated": 0, "failed": {}}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("university_id", [0, "abc"])
+def test_batch_endpoint_rejects_invalid_university(client, sysadmin, university_id):
+    client.force_authenticate(sysadmin)
+    response = client.post(ENDPOINT, {"university_id": university_id}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "university_id" in response.json()
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_runs_for_all_universities_without_university_id(client, sysadmin, consumer_unit_b):
+    client.force_authenticate(sysadmin)
+    response = client.post(ENDPOINT, {}, format="json")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert Job.objects.get(id=response.json()["job_id"]).payload == {"university_id": None}
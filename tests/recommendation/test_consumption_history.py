@@ -0,0 +1,42 @@
+from datetime import date
+
+import numpy as np
+
+from recommendation_commons.consumption_history import ConsumptionHistory
+
+BILLS = [
+    (date(2024, 1, 1), False, 100, 1000, None, 50),
+    (date(2024, 3, 1), False, 200, 2000, None, 70),
+]
+
+
+def test_from_bills_uses_off_peak_demand_when_peak_is_missing():
+    history = ConsumptionHistory.from_bills(BILLS, (40, 60), is_blue=True)
+
+    assert history.date == [date(2024, 1, 1), date(2024, 3, 1)]
+    assert history.peak_measured_demand_in_kw.tolist() == [50.0, 70.0]
+    assert history.peak_exceeded_in_kw.tolist() == [10.0, 30.0]
+    assert history.off_peak_exceeded_in_kw.tolist() == [0.0, 10.0]
+
+
+def test_green_exceeded_peak_demand_uses_off_peak_contract():
+    history = ConsumptionHistory.from_bills(BILLS, (40, 60), is_blue=False)
+
+    assert history.peak_exceeded_in_kw.tolist() == [0.0, 10.0]
+
+
+def test_pending_dates_are_sorted_and_serialized_as_none():
+    history = ConsumptionHistory.from_bills(BILLS, (40, 60), is_blue=True)
+    history.add_pending_dates([date(2024, 2, 1)])
+
+    assert len(history) == 3
+    assert np.isnan(history.values[1]).all()
+    assert history.to_dict(["date", "peak_consumption_in_kwh"]) == {
+        "date": [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)],
+        "peak_consumption_in_kwh": [100.0, None, 200.0],
+    }
+    assert history.to_dict(["peak_consumption_in_kwh"], "records") == [
+        {"peak_consumption_in_kwh": 100.0},
+        {"peak_consumption_in_kwh": None},
+        {"peak_consumption_in_kwh": 200.0},
+    ]
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from jobs.models import Job
+from jobs.queue import enqueue_debounced
+from recommendation.invalidation import (
+    GENERATE_TASK,
+    _bill_invalidates,
+    batched_invalidation,
+    generate_job_key,
+    invalidate_recommendations,
+)
+from tests.fixtures import consumer_unit_a, consumer_unit_b, university_a, university_b, user_a, user_b
+
+RECOMMENDATION = {
+    "dates": [date(2024, 1, 1), date(2024, 12, 1)],
+    "tariffStartDate": date(2023, 6, 1),
+    "tariffEndDate": date(2024, 6, 1),
+}
+
+
+def recommendation_updates(queries):
+    return [query["sql"] for query in queries if query["sql"].startswith('UPDATE "recommendation_recommendation"')]
+
+
+@pytest.mark.parametrize(
+    "bill_date,expected",
+    [
+        (date(2023, 1, 1), False),
+        (date(2023, 7, 1), True),
+        (date(2024, 3, 1), True),
+        (date(2025, 1, 1), True),
+    ],
+)
+def test_bill_invalidates_recommendation(bill_date, expected):
+    assert _bill_invalidates(RECOMMENDATION, bill_date) is expected
+
+
+def test_bill_invalidates_recommendation_without_tariff():
+    recommendation = {**RECOMMENDATION, "tariffStartDate": None, "tariffEndDate": None}
+
+    assert _bill_invalidates(recommendation, date(2024, 2, 1)) is True
+    assert _bill_invalidates(recommendation, date(2023, 7, 1)) is False
+    assert _bill_invalidates({**recommendation, "dates": None}, date(2024, 2, 1)) is False
+
+
+@pytest.mark.django_db
+def test_invalidation_is_a_single_update(consumer_unit_a, consumer_unit_b):
+    with CaptureQueriesContext(connection) as context:
+        invalidate_recommendations({consumer_unit_a.id, consumer_unit_b.id})
+
+    assert len(context.captured_queries) == 1
+    assert len(recommendation_updates(context.captured_queries)) == 1
+
+
+@pytest.mark.django_db
+def test_batched_invalidation_defers_to_one_update(consumer_unit_a, consumer_unit_b):
+    with CaptureQueriesContext(connection) as context:
+        with batched_invalidation():
+            invalidate_recommendations({consumer_unit_a.id})
+            invalidate_recommendations({consumer_unit_b.id})
+            assert len(context.captured_queries) == 0
+
+    assert len(recommendation_updates(context.captured_queries)) == 1
+
+
+@pytest.mark.django_db
+def test_university_users_can_poll_warmup_job(settings, client, consumer_unit_a, user_a, user_b):
+    settings.JOBS_ALWAYS_EAGER = False
+    key = generate_job_key(consumer_unit_a.id)
+    enqueue_debounced(GENERATE_TASK, {key: {"consumer_unit_id": consumer_unit_a.id}}, delay=60)
+    warmup_job = Job.objects.get(key=key)
+
+    client.force_authenticate(user_a)
+    response = client.get(f"/api/percentile-recommendation/{consumer_unit_a.id}/")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["job_id"] == warmup_job.id
+    assert client.get(f"/api/jobs/{warmup_job.id}/").status_code == status.HTTP_200_OK
+
+    client.force_authenticate(user_b)
+    assert client.get(f"/api/jobs/{warmup_job.id}/").status_code == status.HTTP_403_FORBIDDEN
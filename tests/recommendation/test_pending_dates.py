@@ -0,0 +1,37 @@
+from datetime import date
+
+import numpy as np
+
+from pandas import DataFrame
+
+from recommendation.calculator import ContractRecommendationCalculator, RecommendationCalculator
+from recommendation_commons.consumption_history import COLUMNS, ConsumptionHistory
+from recommendation_commons.helpers import fill_with_pending_dates
+from recommendation_commons.recommendation_result import RecommendationResult
+
+DATES = [date(2024, 1, 1), date(2024, 4, 1)]
+
+
+def test_pending_months_are_filled_in_date_order():
+    recommendation = RecommendationResult()
+    recommendation.frame = DataFrame(
+        {
+            "date": DATES,
+            "peak_demand_in_kw": [50, 50],
+            "off_peak_demand_in_kw": [70, 70],
+            **{column: [1.0, 2.0] for column in ContractRecommendationCalculator.HEADERS[3:]},
+        }
+    )
+    recommendation.current_contract = DataFrame(
+        {"date": DATES, **{column: [3.0, 4.0] for column in RecommendationCalculator.CURRENT_CONTRACT_HEADERS[1:]}}
+    )
+    history = ConsumptionHistory(DATES, np.ones((2, len(COLUMNS))))
+
+    fill_with_pending_dates(recommendation, history, ["2024-3-01", "2024-2-01"])
+
+    months = [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)]
+    assert history.date == months
+    assert recommendation.frame.to_dict("list")["date"] == months
+    assert recommendation.frame.to_dict("list")["peak_demand_in_kw"] == [50, 50, 50, 50]
+    assert recommendation.frame.to_dict("list")["contract_cost_in_reais"] == [1.0, None, None, 2.0]
+    assert recommendation.current_contract.to_dict("list")["cost_in_reais"] == [3.0, None, None, 4.0]
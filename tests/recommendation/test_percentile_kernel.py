@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from django.conf import settings
+
+from recommendation import percentile_kernel as kernel
+from recommendation.blue import BluePercentileCalculator
+from tests.recommendation.test_cases import test_cases
+
+PERCENTILES = BluePercentileCalculator.PERCENTILES
+test_data = list(test_cases.keys())
+
+
+@pytest.mark.parametrize("code", test_data)
+def test_percentile_demands_matches_pandas_quantile(code: str):
+    history = test_cases[code].consumption_history
+    result = kernel.percentile_demands(history.off_peak_measured_demand_in_kw, PERCENTILES)
+
+    for i, p in enumerate(PERCENTILES):
+        expected = max(
+            pd.Series(history.off_peak_measured_demand_in_kw).quantile(p), settings.NEW_RESOLUTION_MINIMUM_DEMAND
+        )
+        assert result[i] == expected
+
+
+def test_percentile_demands_uses_minimum_demand():
+    result = kernel.percentile_demands(np.array([1.0, 2.0, 3.0]), PERCENTILES)
+    assert (result == settings.NEW_RESOLUTION_MINIMUM_DEMAND).all()
+
+
+def test_exceeded_demand_matrix_shape_and_values():
+    measured = np.array([10.0, 50.0, 100.0])
+    demands = np.array([40.0, 80.0])
+
+    result = kernel.exceeded_demand_matrix(measured, demands)
+
+    assert result.shape == (2, 3)
+    assert result.tolist() == [[0.0, 10.0, 60.0], [0.0, 0.0, 20.0]]
+
+
+def test_find_smallest_total_without_tolerance_picks_first_minimum():
+    assert kernel.find_smallest_total(np.array([3.0, 1.0, 1.0, 2.0])) == (1, 1.0)
+
+
+def test_find_smallest_total_with_tolerance_ignores_small_improvements():
+    totals = np.array([10.0, 9.995, 9.0, 8.999])
+
+    assert kernel.find_smallest_total(totals, tolerance=0.01) == (2, 9.0)
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 0.01])
+@pytest.mark.parametrize("totals", [[], [np.nan, np.nan], [np.inf, np.nan]])
+def test_find_smallest_total_raises_without_valid_totals(totals, tolerance):
+    with pytest.raises(ValueError):
+        kernel.find_smallest_total(np.array(totals, dtype=float), tolerance=tolerance)
@@ -0,0 +1,42 @@
+import json
+
+from datetime import date, datetime
+
+from recommendation.models import PAYLOAD_VERSION, Recommendation
+from recommendation_commons.renderers import extend_object
+
+
+def make_recommendation():
+    return Recommendation(
+        consumer_unit_id=1,
+        generatedOn=datetime(2024, 6, 1, 12, 0),
+        dates=[date(2024, 1, 1), date(2024, 2, 1)],
+        errors=[],
+        warnings=[],
+        costsComparisonPlot={"date": ["2024-01-01", "2024-02-01"], "totalCostInReaisInCurrent": [10.5, None]},
+    )
+
+
+def test_payload_is_the_encoded_response():
+    recommendation = make_recommendation()
+    recommendation.render_payload()
+
+    assert recommendation.payloadVersion == PAYLOAD_VERSION
+    assert json.loads(recommendation.get_payload()) == json.loads(json.dumps(recommendation.to_dict()))
+
+
+def test_outdated_payload_is_rebuilt_from_fields():
+    recommendation = make_recommendation()
+    recommendation.payload = b'{"stale":true}'
+    recommendation.payloadVersion = PAYLOAD_VERSION - 1
+
+    assert json.loads(recommendation.get_payload())["costsComparisonPlot"]["totalCostInReaisInCurrent"] == [10.5, None]
+
+
+def test_extend_object_appends_fields():
+    assert json.loads(extend_object(b'{"a":1}', {"recomputing": True, "jobId": 3})) == {
+        "a": 1,
+        "recomputing": True,
+        "jobId": 3,
+    }
+    assert extend_object(b'{"a":1}', {}) == b'{"a":1}'
@@ -0,0 +1,16 @@
+import pytest
+
+from recommendation.regeneration import regenerate_chunk, split_in_chunks
+from tests.fixtures import consumer_unit_b, university_b
+
+
+def test_split_in_chunks():
+    assert split_in_chunks([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.django_db
+def test_regenerate_chunk_reports_failures_without_stopping(consumer_unit_b):
+    regenerated, failed = regenerate_chunk([consumer_unit_b.id, 0])
+
+    assert regenerated == []
+    assert set(failed) == {consumer_unit_b.id, 0}
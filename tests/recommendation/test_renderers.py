@@ -0,0 +1,52 @@
+import json
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from rest_framework.renderers import JSONRenderer
+
+from global_search_recommendation.views import GlobalSearchRecommendationViewSet
+from recommendation_commons.renderers import (
+    CamelCaseRecommendationJSONRenderer,
+    RecommendationJSONRenderer,
+    RecommendationJSONResponse,
+)
+
+DATA = {
+    "consumption_history_plot": {"peak_consumption_in_kwh": [1.5, None, 2.0], "date": [date(2024, 1, 1)]},
+    "contracts_comparison_table": [{"total_cost_in_reais_in_current": np.float64(10.25), "date": date(2024, 1, 1)}],
+    "current_total_cost": Decimal("12.50"),
+    "energy_bills_count": np.int64(12),
+    "generated_on": datetime(2024, 1, 1, 10, 30, 0, 123456),
+    "nested_lists": [[1, {"inner_key": 2}]],
+}
+
+
+@pytest.mark.parametrize(
+    "renderer,fast_renderer",
+    [(JSONRenderer, RecommendationJSONRenderer), (CamelCaseJSONRenderer, CamelCaseRecommendationJSONRenderer)],
+)
+def test_renders_like_configured_renderer(renderer, fast_renderer):
+    expected = renderer().render(DATA)
+    rendered = fast_renderer().render(DATA)
+
+    assert json.loads(rendered) == json.loads(expected)
+    assert list(json.loads(rendered)) == list(json.loads(expected))
+
+
+def test_response_keeps_keys():
+    response = RecommendationJSONResponse({"consumer_unit": 1, "costsComparisonPlot": {"date": ["2024-01-01"]}})
+
+    assert response["Content-Type"] == "application/json"
+    assert json.loads(response.content) == {"consumer_unit": 1, "costsComparisonPlot": {"date": ["2024-01-01"]}}
+
+
+def test_views_use_fast_renderers():
+    renderers = GlobalSearchRecommendationViewSet().get_renderers()
+
+    assert any(isinstance(renderer, RecommendationJSONRenderer) for renderer in renderers)
+    assert not any(type(renderer) in (JSONRenderer, CamelCaseJSONRenderer) for renderer in renderers)
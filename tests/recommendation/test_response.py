@@ -0,0 +1,59 @@
+from datetime import date
+
+from pandas import DataFrame
+
+from recommendation_commons.recommendation_result import RecommendationResult
+from recommendation_commons.response import _generate_table_contracts_comparison, _generate_tariffs_as_table
+from tariffs.models import Tariff
+from tariffs.serializers import BlueTariffSerializer, GreenTariffSerializer
+
+
+def test_tariffs_table_matches_serializers():
+    blue = Tariff(flag=Tariff.BLUE, peak_tusd_in_reais_per_kw="10.50", peak_te_in_reais_per_mwh="300.00")
+    green = Tariff(flag=Tariff.GREEN, na_tusd_in_reais_per_kw="7.25")
+
+    table = {row["label"]: row for row in _generate_tariffs_as_table(blue, green)}
+
+    serialized_blue, serialized_green = BlueTariffSerializer(blue).data, GreenTariffSerializer(green).data
+    assert set(table) == {*serialized_blue, *serialized_green}
+    for label, row in table.items():
+        assert row["blue"] == serialized_blue.get(label)
+        assert row["green"] == serialized_green.get(label)
+    assert table["peak_tusd_in_reais_per_kw"]["billingTime"] == "Ponta"
+    assert table["na_tusd_in_reais_per_kw"] == {
+        "label": "na_tusd_in_reais_per_kw",
+        "billingTime": "NA",
+        "blue": None,
+        "green": 7.25,
+    }
+
+
+def test_contracts_comparison_table_uses_none_for_missing_costs():
+    recommendation = RecommendationResult()
+    recommendation.frame = DataFrame(
+        {
+            "date": [date(2024, 1, 1), date(2024, 2, 1)],
+            "consumption_cost_in_reais": [1.0, float("nan")],
+            "demand_cost_in_reais": [2.0, float("nan")],
+            "contract_cost_in_reais": [3.0, float("nan")],
+            "absolute_difference": [1.0, float("nan")],
+        }
+    )
+    recommendation.current_contract = DataFrame(
+        {"consumption_cost_in_reais": [1.5, None], "demand_cost_in_reais": [2.5, None], "cost_in_reais": [4.0, None]}
+    )
+
+    table, totals = _generate_table_contracts_comparison(recommendation)
+
+    assert table[1] == {
+        "date": date(2024, 2, 1),
+        "total_cost_in_reais_in_current": None,
+        "demand_cost_in_reais_in_current": None,
+        "consumption_cost_in_reais_in_current": None,
+        "total_cost_in_reais_in_recommended": None,
+        "demand_cost_in_reais_in_recommended": None,
+        "consumption_cost_in_reais_in_recommended": None,
+        "absolute_difference": None,
+    }
+    assert totals["absolute_difference"] == 1.0
+    assert totals["total_cost_in_reais_in_current"] == 4.0
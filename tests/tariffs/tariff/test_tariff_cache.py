@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import pytest
+
+from tariffs.cache import get_tariffs
+from tariffs.models import BlueTariff, GreenTariff, Tariff
+from tests.fixtures import distributor_a, university_a, user_a
+
+ENDPOINT = "/api/tariffs/"
+TODAY = date.today()
+TARIFF_DICT = {
+    "subgroup": "A4",
+    "start_date": TODAY.strftime("%Y-%m-%d"),
+    "end_date": (TODAY + timedelta(days=30)).strftime("%Y-%m-%d"),
+    "blue": {
+        "peak_tusd_in_reais_per_kw": 1,
+        "peak_tusd_in_reais_per_mwh": 2,
+        "peak_te_in_reais_per_mwh": 3,
+        "off_peak_tusd_in_reais_per_kw": 4,
+        "off_peak_tusd_in_reais_per_mwh": 5,
+        "off_peak_te_in_reais_per_mwh": 6,
+    },
+    "green": {
+        "peak_tusd_in_reais_per_mwh": 10,
+        "peak_te_in_reais_per_mwh": 20,
+        "off_peak_tusd_in_reais_per_mwh": 30,
+        "off_peak_te_in_reais_per_mwh": 40,
+        "na_tusd_in_reais_per_kw": 50,
+    },
+}
+
+
+@pytest.mark.django_db
+def test_tariffs_are_loaded_once_and_materialized(client, user_a, distributor_a, django_assert_num_queries):
+    client.force_authenticate(user_a)
+    client.post(ENDPOINT, {**TARIFF_DICT, "distributor": distributor_a.id}, format="json")
+
+    blue, green = get_tariffs(distributor_a.id, "A4")
+    with django_assert_num_queries(0):
+        assert get_tariffs(distributor_a.id, "A4") == (blue, green)
+
+    assert blue.as_blue_tariff() == BlueTariff(1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 0.0)
+    assert isinstance(green.as_green_tariff(), GreenTariff)
+
+
+@pytest.mark.django_db
+def test_tariffs_endpoints_invalidate_the_cache(client, user_a, distributor_a):
+    client.force_authenticate(user_a)
+    assert get_tariffs(distributor_a.id, "A4") == (None, None)
+
+    client.post(ENDPOINT, {**TARIFF_DICT, "distributor": distributor_a.id}, format="json")
+    blue, green = get_tariffs(distributor_a.id, "A4")
+    assert blue.flag == Tariff.BLUE and green.flag == Tariff.GREEN
+
+    updated = {
+        **TARIFF_DICT,
+        "distributor": distributor_a.id,
+        "green": {**TARIFF_DICT["green"], "na_tusd_in_reais_per_kw": 70},
+    }
+    client.put(f"{ENDPOINT}{green.id}/", updated, format="json")
+
+    assert get_tariffs(distributor_a.id, "A4")[1].as_green_tariff().na_tusd_in_reais_per_kw == 70.0
+
+
+@pytest.mark.django_db
+def test_saving_a_tariff_invalidates_the_cache(client, user_a, distributor_a):
+    client.force_authenticate(user_a)
+    client.post(ENDPOINT, {**TARIFF_DICT, "distributor": distributor_a.id}, format="json")
+
+    blue = Tariff.objects.get(distributor=distributor_a, subgroup="A4", flag=Tariff.BLUE)
+    assert get_tariffs(distributor_a.id, "A4")[0].end_date == blue.end_date
+
+    blue.end_date = TODAY - timedelta(days=1)
+    blue.save()
+
+    assert get_tariffs(distributor_a.id, "A4")[0].pending is True
+    assert distributor_a.check_subgroups_pending("A4") is True
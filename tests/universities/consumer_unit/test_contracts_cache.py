@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from contracts.models import Contract
+from tariffs.models import Tariff
+from tests.fixtures import consumer_unit_a, consumer_unit_b, distributor_a, university_a, university_b
+from universities.models import ConsumerUnit
+
+
+def create_contract(consumer_unit, distributor, start_date):
+    return Contract.objects.create(
+        consumer_unit=consumer_unit,
+        distributor=distributor,
+        tariff_flag=Tariff.BLUE,
+        start_date=start_date,
+        subgroup="A3",
+        peak_contracted_demand_in_kw=100.00,
+        off_peak_contracted_demand_in_kw=50.00,
+    )
+
+
+@pytest.mark.django_db
+def test_contracts_are_loaded_once_per_instance(consumer_unit_a, distributor_a, django_assert_num_queries):
+    create_contract(consumer_unit_a, distributor_a, date(2022, 1, 1))
+    create_contract(consumer_unit_a, distributor_a, date(2023, 1, 1))
+    consumer_unit = ConsumerUnit.objects.get(id=consumer_unit_a.id)
+
+    with django_assert_num_queries(1):
+        assert consumer_unit.current_contract.start_date == date(2023, 1, 1)
+        assert consumer_unit.oldest_contract.start_date == date(2022, 1, 1)
+        assert consumer_unit.previous_contract.start_date == date(2022, 1, 1)
+
+
+@pytest.mark.django_db
+def test_new_contract_updates_cached_contracts(consumer_unit_a, distributor_a):
+    first = create_contract(consumer_unit_a, distributor_a, date(2022, 1, 1))
+    assert consumer_unit_a.current_contract == first
+
+    second = create_contract(consumer_unit_a, distributor_a, date(2023, 1, 1))
+
+    assert consumer_unit_a.current_contract == second
+    assert consumer_unit_a.previous_contract == first
+    assert consumer_unit_a.previous_contract.end_date == date(2022, 12, 31)
+
+    second.delete()
+    assert consumer_unit_a.current_contract == first
+
+
+@pytest.mark.django_db
+def test_with_contracts_prefetches_all_consumer_units(
+    consumer_unit_a, consumer_unit_b, distributor_a, django_assert_num_queries
+):
+    create_contract(consumer_unit_a, distributor_a, date(2022, 1, 1))
+
+    with django_assert_num_queries(2):
+        units = list(ConsumerUnit.objects.filter(id__in=[consumer_unit_a.id, consumer_unit_b.id]).with_contracts())
+        current_contracts = {unit.id: unit.current_contract for unit in units}
+
+    assert current_contracts[consumer_unit_a.id].start_date == date(2022, 1, 1)
+    assert current_contracts[consumer_unit_b.id] is None
@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+
+from dateutil.relativedelta import relativedelta
+
+from contracts.models import EnergyBill
+from tests.fixtures import consumer_unit_a, contract_a, distributor_a, university_a
+from universities.recommendation import Recommendation
+
+
+def create_energy_bill(consumer_unit, contract, bill_date):
+    return EnergyBill.objects.create(
+        consumer_unit=consumer_unit,
+        contract=contract,
+        date=bill_date,
+        peak_consumption_in_kwh=100.0,
+        off_peak_consumption_in_kwh=200.0,
+        peak_measured_demand_in_kw=50.0,
+        off_peak_measured_demand_in_kw=60.0,
+    )
+
+
+@pytest.mark.django_db
+def test_load_energy_bills_by_month_only_returns_the_recommendation_window(consumer_unit_a, contract_a):
+    month_start = date.today().replace(day=1)
+    inside = [create_energy_bill(consumer_unit_a, contract_a, month_start - relativedelta(months=i)) for i in (0, 12)]
+    create_energy_bill(consumer_unit_a, contract_a, month_start - relativedelta(months=13))
+
+    energy_bills_by_month = Recommendation.load_energy_bills_by_month(consumer_unit_a.id)
+
+    assert energy_bills_by_month == {(bill.date.year, bill.date.month): bill for bill in inside}
+
+
+@pytest.mark.django_db
+def test_pending_energy_bills_share_the_loaded_window(consumer_unit_a, contract_a, django_assert_max_num_queries):
+    month_start = date.today().replace(day=1)
+    for i in range(1, 7):
+        create_energy_bill(consumer_unit_a, contract_a, month_start - relativedelta(months=i))
+
+    with django_assert_max_num_queries(2):
+        energy_bills = consumer_unit_a.get_energy_bills_for_recommendation()
+        pending_bills = consumer_unit_a.get_energy_bills_pending(energy_bills)
+
+    assert [bill["energy_bill"] is not None for bill in energy_bills] == [True] * 6 + [False] * 6
+    assert pending_bills == consumer_unit_a.get_energy_bills_pending()
+
+
+@pytest.mark.django_db
+def test_all_energy_bills_grid_is_built_with_one_query(consumer_unit_a, contract_a, django_assert_num_queries):
+    month_start = date.today().replace(day=1)
+    filled = month_start - relativedelta(months=2)
+    create_energy_bill(consumer_unit_a, contract_a, filled)
+
+    with django_assert_num_queries(1):
+        energy_bills = Recommendation.get_all_energy_bills_by_consumer_unit(consumer_unit_a.id, contract_a.start_date)
+
+    grid = {(bill["year"], bill["month"] + 1): bill for year in energy_bills.values() for bill in year}
+    previous_month = month_start - relativedelta(months=1)
+    out_of_window = month_start - relativedelta(months=13)
+
+    assert grid[(filled.year, filled.month)]["energy_bill"]["date"] == filled
+    assert grid[(filled.year, filled.month)]["is_energy_bill_pending"] is False
+    assert grid[(previous_month.year, previous_month.month)]["is_energy_bill_pending"] is True
+    assert grid[(month_start.year, month_start.month)]["is_energy_bill_pending"] is False
+    assert grid[(out_of_window.year, out_of_window.month)]["is_energy_bill_pending"] is False
@@ -0,0 +1,76 @@
+from datetime import date
+
+import pytest
+
+from dateutil.relativedelta import relativedelta
+from rest_framework import status
+
+from contracts.models import Contract, EnergyBill
+from tariffs.models import Tariff
+from tests.fixtures import distributor_a, university_a, user_a
+from universities.models import ConsumerUnit
+
+ENDPOINT = "/api/consumer-units/"
+MONTH_START = date.today().replace(day=1)
+
+
+def create_consumer_unit(university, distributor, name, contract_start_date, bill_months):
+    consumer_unit = ConsumerUnit.objects.create(university=university, name=name, code=name)
+    contract = Contract.objects.create(
+        consumer_unit=consumer_unit,
+        distributor=distributor,
+        tariff_flag=Tariff.BLUE,
+        start_date=contract_start_date,
+        subgroup="A3",
+        peak_contracted_demand_in_kw=100.00,
+        off_peak_contracted_demand_in_kw=50.00,
+    )
+    for months_ago in bill_months:
+        EnergyBill.objects.create(
+            consumer_unit=consumer_unit,
+            contract=contract,
+            date=MONTH_START - relativedelta(months=months_ago),
+        )
+    return consumer_unit
+
+
+@pytest.fixture
+def consumer_units(university_a, distributor_a):
+    scenarios = [
+        (MONTH_START - relativedelta(years=3), []),
+        (MONTH_START - relativedelta(years=3), [0, 1, 2, 11, 12]),
+        (MONTH_START - relativedelta(years=3), [1, 3, 12, 13]),
+        (MONTH_START - relativedelta(months=5, days=-10), [1, 2, 4]),
+        (MONTH_START - relativedelta(months=12), [0, 12]),
+        (MONTH_START + relativedelta(months=2), []),
+    ]
+    return [
+        create_consumer_unit(university_a, distributor_a, f"UC {i}", start_date, bill_months)
+        for i, (start_date, bill_months) in enumerate(scenarios)
+    ]
+
+
+@pytest.mark.django_db
+def test_list_annotations_match_consumer_unit_properties(consumer_units, user_a):
+    annotated = ConsumerUnit.objects.filter(id__in=[unit.id for unit in consumer_units]).with_list_annotations(
+        user_a.id
+    )
+
+    for unit in annotated.order_by("id"):
+        plain = ConsumerUnit.objects.get(id=unit.id)
+        assert unit.date == plain.date
+        assert unit.is_current_energy_bill_filled == plain.is_current_energy_bill_filled
+        assert unit.pending_energy_bills_number == plain.pending_energy_bills_number
+
+
+@pytest.mark.django_db
+def test_list_queries_do_not_grow_with_consumer_units(client, user_a, consumer_units, django_assert_max_num_queries):
+    user_a.add_or_remove_favorite_consumer_unit(consumer_units[2].id, "add")
+    client.force_authenticate(user_a)
+
+    with django_assert_max_num_queries(3):
+        response = client.get(ENDPOINT)
+
+    assert response.status_code == status.HTTP_200_OK
+    favorites = [consumer_unit["id"] for consumer_unit in response.json() if consumer_unit["is_favorite"]]
+    assert favorites == [consumer_units[2].id]
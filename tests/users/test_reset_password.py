@@ -0,0 +1,29 @@
+import pytest
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+
+ENDPOINT = "/api/reset-password/"
+
+
+@pytest.mark.django_db
+class TestResetPasswordEndpoint:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def test_does_not_expose_job(self):
+        response = self.client.post(f"{ENDPOINT}?email={'a' * 250}@example.com")
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert "job_id" not in response.json()
+        assert len(Job.objects.get().key) <= Job._meta.get_field("key").max_length
+
+    def test_same_email_is_sent_once(self, settings):
+        settings.JOBS_ALWAYS_EAGER = False
+
+        self.client.post(f"{ENDPOINT}?email=Usuario@example.com")
+        self.client.post(f"{ENDPOINT}?email=%20usuario@example.com")
+
+        assert Job.objects.filter(name="users.send_email_reset_password").count() == 1
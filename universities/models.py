@@ -1,6 +1,10 @@
 from datetime import date
 
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils.translation import gettext_lazy as _
 
 from contracts.models import Contract, EnergyBill
@@ -46,6 +50,56 @@ class University(models.Model):
         return f"{self.acronym} - {self.name}"
 
 
+class ConsumerUnitQuerySet(models.QuerySet):
+    def with_contracts(self):
+        """Carrega os contratos de todas as unidades em uma única consulta,
+        usados por `current_contract`, `oldest_contract` e `previous_contract`"""
+        return self.prefetch_related(
+            Prefetch(
+                "contract_set",
+                queryset=Contract.objects.order_by("start_date", "id"),
+                to_attr="_contracts_by_start_date",
+            )
+        )
+
+    def with_list_annotations(self, user_id):
+        """Anota os dados exibidos na listagem de unidades consumidoras, que de
+        outra forma custariam várias consultas por unidade: data do contrato
+        mais antigo, fatura do mês atual, meses com fatura na janela de
+        recomendação e se a unidade é favorita do usuário."""
+        from users.models import UniversityUser
+
+        month_start = date.today().replace(day=1)
+        window_size = settings.IDEAL_ENERGY_BILLS_FOR_RECOMMENDATION
+        previous_months_start = month_start - relativedelta(months=window_size - 1)
+        oldest_month_start = month_start - relativedelta(months=window_size)
+
+        energy_bills = EnergyBill.objects.filter(consumer_unit=OuterRef("pk"))
+        energy_bills_after_oldest_contract = energy_bills.annotate(month=TruncMonth("date")).filter(
+            month__gte=OuterRef("oldest_contract_start_date")
+        )
+        previous_energy_bills_months = (
+            energy_bills_after_oldest_contract.filter(date__gte=previous_months_start, date__lt=month_start)
+            .values("consumer_unit")
+            .annotate(count=Count("month", distinct=True))
+            .values("count")
+        )
+
+        return self.annotate(
+            oldest_contract_start_date=Subquery(
+                Contract.objects.filter(consumer_unit=OuterRef("pk")).order_by("start_date").values("start_date")[:1]
+            ),
+            current_energy_bill_filled=Exists(
+                energy_bills.filter(date__gte=month_start, date__lt=month_start + relativedelta(months=1))
+            ),
+            previous_energy_bills_months=Coalesce(Subquery(previous_energy_bills_months), 0),
+            oldest_window_energy_bill_filled=Exists(
+                energy_bills_after_oldest_contract.filter(date__gte=oldest_month_start, date__lt=previous_months_start)
+            ),
+            is_favorite=Exists(UniversityUser.objects.filter(id=user_id, favorite_consumer_units=OuterRef("pk"))),
+        )
+
+
 class ConsumerUnit(models.Model):
     name = models.CharField(
         max_length=100,
@@ -80,6 +134,8 @@ class ConsumerUnit(models.Model):
     is_active = models.BooleanField(default=True)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    objects = ConsumerUnitQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["university", "code"], name="unique_consumer_unit_university_code"),
@@ -89,49 +145,86 @@ class ConsumerUnit(models.Model):
     def __str__(self):
         return f"{self.name} - {self.code}"
 
+    def get_contracts_by_start_date(self) -> "list[Contract]":
+        """Contratos da unidade ordenados pela data de início. São carregados
+        uma única vez por instância (ou por `ConsumerUnitQuerySet.with_contracts`)
+        e descartados quando um contrato da unidade é salvo ou removido."""
+        if "_contracts_by_start_date" not in self.__dict__:
+            self._contracts_by_start_date = list(self.contract_set.order_by("start_date", "id"))
+        return self._contracts_by_start_date
+
+    def clear_contracts_cache(self):
+        self.__dict__.pop("_contracts_by_start_date", None)
+
     @property
     def current_contract(self) -> Contract:
-        return self.contract_set.all().order_by("start_date").last()
+        contracts = self.get_contracts_by_start_date()
+        return contracts[-1] if contracts else None
 
     @property
     def oldest_contract(self) -> Contract:
-        return self.contract_set.all().order_by("start_date").first()
+        contracts = self.get_contracts_by_start_date()
+        return contracts[0] if contracts else None
 
     @property
     def previous_contract(self) -> Contract:
-        if self.current_contract is None:
+        current_contract = self.current_contract
+        if current_contract is None:
             return None
 
-        return self.contract_set.filter(start_date__lt=self.current_contract.start_date).order_by("start_date").last()
+        previous_contracts = [
+            contract
+            for contract in self.get_contracts_by_start_date()
+            if contract.start_date < current_contract.start_date
+        ]
+        return previous_contracts[-1] if previous_contracts else None
 
     @property
     def date(self):
+        if "oldest_contract_start_date" in self.__dict__:
+            return self.oldest_contract_start_date
+
         return self.oldest_contract.start_date
 
     @property
     def is_current_energy_bill_filled(self):
+        if "current_energy_bill_filled" in self.__dict__:
+            return self.current_energy_bill_filled
+
         if EnergyBill.get_energy_bill(self.id, date.today().month, date.today().year):
             return True
         return False
 
     @property
     def pending_energy_bills_number(self):
-        return len(self.get_energy_bills_pending())
+        if "previous_energy_bills_months" in self.__dict__:
+            return self._count_pending_energy_bills_from_annotations()
 
-    @classmethod
-    def check_insert_is_favorite_on_consumer_units(cls, consumer_unit_list, user_id):
-        from users.models import UniversityUser
-
-        updated_consumer_unit_list = []
-        university_user: UniversityUser = UniversityUser.objects.get(id=user_id)
+        return len(self.get_energy_bills_pending())
 
-        for unit in consumer_unit_list:
-            unit_dict = dict(unit)
-            unit_dict["is_favorite"] = university_user.check_if_consumer_unit_is_your_favorite(unit_dict["id"])
+    def _count_pending_energy_bills_from_annotations(self):
+        """Mesma contagem de `get_energy_bills_pending`, a partir das anotações
+        de `ConsumerUnitQuerySet.with_list_annotations`"""
+        start_date = self.oldest_contract_start_date
+        if start_date is None:
+            return 0
+
+        # A janela de recomendação inclui o mês atual apenas se a fatura dele já foi lançada
+        month_start = date.today().replace(day=1)
+        first_month = 0 if self.current_energy_bill_filled else 1
+        window = [
+            month_start - relativedelta(months=i)
+            for i in range(first_month, first_month + settings.IDEAL_ENERGY_BILLS_FOR_RECOMMENDATION)
+        ]
+        months_after_start_date = sum(1 for month in window if month >= start_date)
 
-            updated_consumer_unit_list.append(unit_dict)
+        filled_months = self.previous_energy_bills_months
+        if self.current_energy_bill_filled:
+            filled_months += int(month_start >= start_date)
+        else:
+            filled_months += int(self.oldest_window_energy_bill_filled)
 
-        return updated_consumer_unit_list
+        return months_after_start_date - filled_months
 
     def get_energy_bills_by_year(self, year):
         if year < self.date.year or year > date.today().year:
@@ -148,21 +241,13 @@ class ConsumerUnit(models.Model):
 
         return list(energy_bills_dates)
 
-    def get_energy_bills_pending(self):
-        energy_bills_pending = []
-        energy_bills = self.get_energy_bills_for_recommendation()
-
-        for energy_bill in energy_bills:
-            energy_bill_date = date(energy_bill["year"], energy_bill["month"], 1)
-
-            if energy_bill_date >= self.oldest_contract.start_date:
-                if energy_bill["energy_bill"] is None:
-                    energy_bills_pending.append(energy_bill)
-
-        return list(energy_bills_pending)
+    def get_energy_bills_pending(self, energy_bills=None):
+        if energy_bills is None:
+            energy_bills = self.get_energy_bills_for_recommendation()
+        return Recommendation.build_energy_bills_pending(energy_bills, self.oldest_contract.start_date)
 
-    def get_energy_bills_for_recommendation(self):
-        return Recommendation.get_energy_bills_for_recommendation(self.id)
+    def get_energy_bills_for_recommendation(self, energy_bills_by_month=None):
+        return Recommendation.get_energy_bills_for_recommendation(self.id, energy_bills_by_month)
 
     def get_all_energy_bills(self):
         return Recommendation.get_all_energy_bills_by_consumer_unit(self.id, self.date)
@@ -1,6 +1,7 @@
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 
 from contracts.models import EnergyBill
 from utils.energy_bill_util import EnergyBillUtils
@@ -8,52 +9,75 @@ from utils.energy_bill_util import EnergyBillUtils
 
 class Recommendation:
     @classmethod
-    def get_energy_bills_for_recommendation(cls, consumer_unit_id):
-        energy_bills = []
-
+    def get_energy_bills_for_recommendation(cls, consumer_unit_id, energy_bills_by_month=None):
         try:
-            date_for_recommendation = Recommendation.set_date_for_recommendation(consumer_unit_id)
-            energy_bills_dates = EnergyBillUtils.generate_dates_for_recommendation(date_for_recommendation)
-
-            for energy_bill_object in energy_bills_dates:
-                energy_bill = EnergyBill.get_energy_bill(
-                    consumer_unit_id, energy_bill_object["month"], energy_bill_object["year"]
-                )
-
-                if energy_bill:
-                    energy_bill_object["energy_bill"] = EnergyBillUtils.energy_bill_dictionary(energy_bill)
-
-                energy_bills.append(energy_bill_object)
+            if energy_bills_by_month is None:
+                energy_bills_by_month = Recommendation.load_energy_bills_by_month(consumer_unit_id)
 
-            return energy_bills
+            date_for_recommendation = Recommendation.get_date_for_recommendation(energy_bills_by_month)
+            return Recommendation.build_energy_bills_for_recommendation(energy_bills_by_month, date_for_recommendation)
         except Exception as e:
             raise Exception(f"Error get energy bills for recommendation: {str(e)}") from e
 
+    @classmethod
+    def get_energy_bills_window(cls):
+        """Intervalo `[início, fim)` que contém todas as faturas que podem
+        entrar na recomendação: os 12 meses anteriores e o mês atual"""
+        today = date.today()
+        window_start = (today - relativedelta(months=settings.IDEAL_ENERGY_BILLS_FOR_RECOMMENDATION)).replace(day=1)
+        window_end = today.replace(day=1) + relativedelta(months=1)
+        return window_start, window_end
+
+    @classmethod
+    def load_energy_bills_by_month(cls, consumer_unit_id):
+        """Carrega as faturas da janela de recomendação em uma única consulta
+        por intervalo de `date`, indexadas por `(ano, mês)`"""
+        window_start, window_end = Recommendation.get_energy_bills_window()
+        energy_bills = EnergyBill.objects.filter(
+            consumer_unit=consumer_unit_id,
+            date__gte=window_start,
+            date__lt=window_end,
+        ).order_by("date", "id")
+
+        energy_bills_by_month = {}
+        for energy_bill in energy_bills:
+            energy_bills_by_month.setdefault((energy_bill.date.year, energy_bill.date.month), energy_bill)
+
+        return energy_bills_by_month
+
     @classmethod
     def get_all_energy_bills_by_consumer_unit(cls, consumer_unit_id, start_date):
         try:
-            date_for_recommendation = Recommendation.set_date_for_recommendation(consumer_unit_id)
-
-            energy_bills_recommendation_dates_list = EnergyBillUtils.generate_dates_for_recommendation(
-                date_for_recommendation
-            )
             energy_bills_lists = EnergyBillUtils.generate_dates(start_date, date.today())
 
+            # Uma única consulta ordenada com todas as faturas do período; a grade
+            # de anos/meses é montada em memória
+            energy_bills = EnergyBill.objects.filter(
+                consumer_unit=consumer_unit_id,
+                date__gte=start_date.replace(day=1),
+                date__lt=date(date.today().year + 1, 1, 1),
+            ).order_by("date", "id")
+
+            energy_bills_by_month = {}
+            for energy_bill in energy_bills:
+                energy_bills_by_month.setdefault((energy_bill.date.year, energy_bill.date.month), energy_bill)
+
+            date_for_recommendation = Recommendation.get_date_for_recommendation(energy_bills_by_month)
+            energy_bills_recommendation_months = {
+                (energy_bill_date["year"], energy_bill_date["month"])
+                for energy_bill_date in EnergyBillUtils.generate_dates_for_recommendation(date_for_recommendation)
+            }
+
             for years in energy_bills_lists:
                 for energy_bill_object in energy_bills_lists[str(years)]:
-                    energy_bill = EnergyBill.get_energy_bill(
-                        consumer_unit_id, energy_bill_object["month"], energy_bill_object["year"]
-                    )
-
-                    is_date_be_on_recommendation_list = EnergyBillUtils.is_date_be_on_recommendation_list(
-                        energy_bills_recommendation_dates_list, energy_bill_object
-                    )
+                    month = (energy_bill_object["year"], energy_bill_object["month"])
+                    energy_bill = energy_bills_by_month.get(month)
 
                     if energy_bill:
                         energy_bill_object["energy_bill"] = EnergyBillUtils.energy_bill_dictionary(energy_bill)
                         energy_bill_object["is_energy_bill_pending"] = False
                     else:
-                        energy_bill_object["is_energy_bill_pending"] = is_date_be_on_recommendation_list
+                        energy_bill_object["is_energy_bill_pending"] = month in energy_bills_recommendation_months
 
                     energy_bill_object["month"] -= 1
 
@@ -62,14 +86,46 @@ class Recommendation:
             raise Exception(f"Error get all energy bills by consumer unit: {str(e)}") from e
 
     @classmethod
-    def set_date_for_recommendation(cls, consumer_unit_id):
-        date_for_recommendation = date.today()
+    def set_date_for_recommendation(cls, consumer_unit_id, energy_bills_by_month=None):
+        if energy_bills_by_month is None:
+            energy_bills_by_month = Recommendation.load_energy_bills_by_month(consumer_unit_id)
 
-        current_energy_bill = EnergyBill.get_energy_bill(
-            consumer_unit_id, date_for_recommendation.month, date_for_recommendation.year
-        )
+        return Recommendation.get_date_for_recommendation(energy_bills_by_month)
 
-        if current_energy_bill:
+    @classmethod
+    def get_date_for_recommendation(cls, energy_bills_by_month: dict):
+        """Mesma regra de `set_date_for_recommendation`, mas usando as faturas
+        já carregadas, indexadas por `(ano, mês)`"""
+        date_for_recommendation = date.today()
+
+        if (date_for_recommendation.year, date_for_recommendation.month) in energy_bills_by_month:
             date_for_recommendation += relativedelta(months=1)
 
         return date_for_recommendation
+
+    @classmethod
+    def build_energy_bills_for_recommendation(cls, energy_bills_by_month: dict, date_for_recommendation: date):
+        """Mesmo formato de `get_energy_bills_for_recommendation`, montado a
+        partir das faturas já carregadas, indexadas por `(ano, mês)`"""
+        energy_bills = EnergyBillUtils.generate_dates_for_recommendation(date_for_recommendation)
+
+        for energy_bill_object in energy_bills:
+            energy_bill = energy_bills_by_month.get((energy_bill_object["year"], energy_bill_object["month"]))
+
+            if energy_bill:
+                energy_bill_object["energy_bill"] = EnergyBillUtils.energy_bill_dictionary(energy_bill)
+
+        return energy_bills
+
+    @classmethod
+    def build_energy_bills_pending(cls, energy_bills: list[dict], oldest_contract_start_date: date):
+        energy_bills_pending = []
+
+        for energy_bill in energy_bills:
+            energy_bill_date = date(energy_bill["year"], energy_bill["month"], 1)
+
+            if energy_bill_date >= oldest_contract_start_date:
+                if energy_bill["energy_bill"] is None:
+                    energy_bills_pending.append(energy_bill)
+
+        return energy_bills_pending
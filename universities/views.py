@@ -51,9 +51,12 @@ class ConsumerUnitViewSet(ReadOnlyCacheMixin, ReadOnlyModelViewSet):
 
     @method_decorator(cache_page(cache_timeout, key_prefix=cache_key_prefix))
     def list(self, request: Request, *args, **kwargs):
-        queryset = self.get_queryset()
+        queryset = list(self.get_queryset().with_list_annotations(request.user.id))
         serializer = self.get_serializer(queryset, many=True)
-        consumer_units = ConsumerUnit.check_insert_is_favorite_on_consumer_units(serializer.data, request.user.id)
+        consumer_units = [
+            {**consumer_unit, "is_favorite": instance.is_favorite}
+            for instance, consumer_unit in zip(queryset, serializer.data)
+        ]
         consumer_units = sorted(consumer_units, key=lambda x: (not x["is_active"], not x["is_favorite"], x["name"]))
         return Response(consumer_units, status=status.HTTP_200_OK)
 
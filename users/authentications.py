@@ -1,3 +1,5 @@
+import hashlib
+
 from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ObjectDoesNotExist
 from drf_yasg.utils import swagger_auto_schema
@@ -10,6 +12,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from jobs.queue import enqueue
 from users.models import CustomUser, UserToken
 from utils.email.send_email import (
     send_email_first_access_password,
@@ -215,9 +218,14 @@ class ResetPasswordByAdmin(APIView):
         if request_user.id == user_for_reset.id:
             raise Exception("Utilize o esqueci minha senha")
 
-        Password.send_email_reset_password_by_admin(user_for_reset.email)
+        job = enqueue(
+            "users.send_email_reset_password_by_admin",
+            {"email": user_for_reset.email},
+            user=request_user,
+            key=f"users.send_email_reset_password_by_admin.{user_for_reset.id}",
+        )
 
-        return Response({"message": "Enviado"})
+        return Response({"message": "Envio agendado", "job_id": job.id}, status.HTTP_202_ACCEPTED)
 
 
 CODE_PASSWORD_TOKEN_OK = 1  # Usuário tem um Password Token válido
@@ -234,13 +242,20 @@ class ResetPassword(APIView):
     def post(self, request):
         try:
             request_user_email = request.GET.get("email")
-            Password.send_email_reset_password(request_user_email)
+            # Endpoint público: o job não é exposto e a chave usa um hash do
+            # email, com tamanho fixo
+            email_hash = hashlib.sha256((request_user_email or "").strip().lower().encode()).hexdigest()
+            enqueue(
+                "users.send_email_reset_password",
+                {"email": request_user_email},
+                key=f"users.send_email_reset_password.{email_hash}",
+            )
             response = EndpointsUtils.create_message_endpoint_response(
                 status=EndpointsUtils.status_success,
-                message="O email foi enviado para o usuário com link de redefinição de senha",
+                message="O email com link de redefinição de senha será enviado para o usuário",
             )
 
-            return Response(response, status.HTTP_200_OK)
+            return Response(response, status.HTTP_202_ACCEPTED)
         except Exception as error:
             response = EndpointsUtils.create_message_endpoint_response(
                 status=EndpointsUtils.status_error, message=str(error)
@@ -10,7 +10,7 @@ from . import models
 
 class CustomUserManager(BaseUserManager):
     def create(self, email, password=None, **extra_fields):
-        from .authentications import Password
+        from jobs.queue import enqueue
 
         try:
             if not email:
@@ -30,7 +30,7 @@ class CustomUserManager(BaseUserManager):
                     user.set_password(generate_random_password())
                     user.save()
 
-                    Password.send_email_first_access_password(user)
+                    enqueue("users.send_email_first_access_password", {"user_id": user.id})
                 else:
                     user.set_password(password)
                     user.save()
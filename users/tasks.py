@@ -0,0 +1,18 @@
+from jobs.queue import task
+from users.authentications import Password
+from users.models import UniversityUser
+
+
+@task("users.send_email_first_access_password")
+def send_email_first_access_password(user_id: int):
+    Password.send_email_first_access_password(UniversityUser.objects.get(id=user_id))
+
+
+@task("users.send_email_reset_password")
+def send_email_reset_password(email: str):
+    Password.send_email_reset_password(email)
+
+
+@task("users.send_email_reset_password_by_admin")
+def send_email_reset_password_by_admin(email: str):
+    Password.send_email_reset_password_by_admin(email)